@@ -0,0 +1,215 @@
+"""Reel audio: voiceover plus an ambient bed, ducked, faded and loudness-normalized in NumPy.
+
+    voice = decode("voice.mp3")                      # float32 (samples, 2) at 48 kHz
+    bed = drone(voice.shape[0] / RATE + 1)           # or decode("ambience.ogg"), looped to length
+    pcm, info = mix(voice, bed, duration=12.5)       # {"lufs": -14.0, "peak_db": -1.2, ...}
+    write_wav("mix.wav", pcm)                        # one 16-bit PCM stream for the encoder
+
+Everything works on whole arrays. ffmpeg decodes each input once to 48 kHz stereo float.
+BS.1770 loudness uses the K-weighting biquads, applied as their frequency response on an
+FFT of the signal, then a mean square per 100 ms hop. The 400 ms gating blocks (75%
+overlap) are sums of four hops, gated at -70 LUFS and then 10 LU below the ungated mean.
+The ducking key is the voice RMS over 10 ms blocks. The bed is pulled down `duck_db` from
+slightly before each phrase until `hold` seconds after it, and the edges are smoothed
+with a moving average. The offline mix can look ahead, so no attack is ever late. The peak
+ceiling works the same way: a gain per 10 ms block, spread to its neighbours and smoothed,
+then interpolated to the samples. The encoder gets a single PCM file and makes one AAC
+encode, instead of a moviepy composite of two audio clips.
+"""
+import subprocess
+import wave
+
+import numpy as np
+
+RATE = 48000
+
+# ITU-R BS.1770-4 K-weighting at 48 kHz: high shelf (head), then the RLB high-pass
+_K_SHELF = ([1.53512485958697, -2.69169618940638, 1.19839281085285], [1.0, -1.69065929318241, 0.73248077421585])
+_K_HIGHPASS = ([1.0, -2.0, 1.0], [1.0, -1.99004745483398, 0.99007225036621])
+
+
+def db_to_gain(db):
+    return 10.0 ** (np.asarray(db, dtype=np.float64) / 20.0)
+
+
+def decode(path, rate=RATE):
+    """Any audio file ffmpeg reads, as float32 (samples, 2) at `rate`."""
+    from reel_render import ffmpeg_exe
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", path, "-vn",
+                             "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "2", "-ar", str(rate), "-"],
+                            capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {result.stderr.decode('utf-8', 'replace').strip()[-400:]}")
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, 2)
+
+
+def write_wav(path, pcm, rate=RATE):
+    """float (samples, channels) in [-1, 1] to a 16-bit PCM WAV; returns `path`."""
+    data = (np.clip(pcm, -1.0, 1.0) * 32767.0).round().astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(data.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(data.tobytes())
+    return path
+
+
+def fit(x, n, loop=False):
+    """`x` cut or zero-padded (or tiled, with `loop`) to exactly `n` samples."""
+    if len(x) >= n:
+        return x[:n]
+    if loop and len(x):
+        return np.resize(x, (n,) + x.shape[1:])
+    return np.concatenate([x, np.zeros((n - len(x),) + x.shape[1:], dtype=x.dtype)])
+
+
+def _fft_size(n):
+    """Smallest 2^a * 3^b * 5^c >= n (pocketfft is fast on those; a power of two can be 45% longer)."""
+    best = 1 << int(np.ceil(np.log2(n)))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            best = min(best, p35 << max(0, int(np.ceil(np.log2(n / p35)))))
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _k_weight(x):
+    """K-weighted copy of `x`: both biquads applied through one real FFT (zero-padded, no wrap-around)."""
+    n = len(x)
+    size = _fft_size(n + RATE // 2)   # the high-pass tail dies out well within 0.5 s
+    z = np.exp(-1j * np.pi * np.arange(size // 2 + 1) / (size // 2))   # e^-jw on the rfft bins
+    response = np.ones_like(z)
+    for b, a in (_K_SHELF, _K_HIGHPASS):
+        response *= np.polyval(b[::-1], z) / np.polyval(a[::-1], z)
+    spectrum = np.fft.rfft(x, size, axis=0) * response[:, None]
+    return np.fft.irfft(spectrum, size, axis=0)[:n]
+
+
+def loudness(x, rate=RATE):
+    """Integrated loudness in LUFS (BS.1770 gating); -inf for silence or under 400 ms of audio."""
+    if rate != RATE:
+        raise ValueError(f"loudness() expects {RATE} Hz audio (the K-weighting coefficients are for it)")
+    hop = rate // 10
+    hops = len(x) // hop
+    if hops < 4:
+        return float("-inf")
+    y = _k_weight(np.asarray(x[:hops * hop], dtype=np.float64))
+    power = (y * y).reshape(hops, hop, -1).mean(axis=1).sum(axis=1)   # per 100 ms, channels summed
+    blocks = (power[:-3] + power[1:-2] + power[2:-1] + power[3:]) / 4
+    with np.errstate(divide="ignore"):
+        lufs = -0.691 + 10 * np.log10(blocks)
+        blocks = blocks[lufs > -70.0]
+        if not len(blocks):
+            return float("-inf")
+        relative = -0.691 + 10 * np.log10(blocks.mean()) - 10.0
+        gated = blocks[-0.691 + 10 * np.log10(blocks) > relative]
+        return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def _smooth(values, width):
+    """Moving average over `width` entries with edge padding (same length)."""
+    if width <= 1:
+        return values
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode="edge")
+    return np.convolve(padded, np.ones(width) / width, mode="valid")
+
+
+def _spread(values, before, after, reduce=np.maximum):
+    """Running max (or min) over the window [i - before, i + after] of a 1-D array."""
+    fill = -np.inf if reduce is np.maximum else np.inf
+    padded = np.concatenate([np.full(before, fill), values, np.full(after, fill)])
+    view = np.lib.stride_tricks.sliding_window_view(padded, before + after + 1)
+    return view.max(axis=1) if reduce is np.maximum else view.min(axis=1)
+
+
+def _to_samples(block_values, block, n):
+    """Per-block values linearly interpolated at every sample (block centres as anchors)."""
+    centres = (np.arange(len(block_values)) + 0.5) * block
+    return np.interp(np.arange(n), centres, block_values).astype(np.float32)
+
+
+def _block_stat(x, block, stat):
+    blocks = -(-len(x) // block)
+    padded = fit(np.abs(x).max(axis=1) if stat == "peak" else (x * x).mean(axis=1), blocks * block)
+    shaped = padded.reshape(blocks, block)
+    return shaped.max(axis=1) if stat == "peak" else np.sqrt(shaped.mean(axis=1))
+
+
+def duck_gain(key, rate=RATE, depth_db=-10.0, threshold_db=-45.0, lead=0.15, hold=0.5, smooth=0.25, block=0.01):
+    """Per-sample gain for the bed: `depth_db` while `key` (the voice) is above `threshold_db` RMS."""
+    size = max(1, int(rate * block))
+    with np.errstate(divide="ignore"):
+        level = 20 * np.log10(_block_stat(key, size, "rms"))
+    active = (level > threshold_db).astype(np.float64)
+    # Down from `lead` before speech until `hold` after it; a pause shorter than that keeps the bed down
+    active = _spread(active, int(hold / block), int(lead / block))
+    ducked = _smooth(active, int(smooth / block)) * depth_db
+    return _to_samples(db_to_gain(ducked), size, len(key))
+
+
+def fades(n, rate=RATE, fade_in=0.3, fade_out=1.0):
+    """Equal-power fade-in/fade-out envelope of `n` samples."""
+    t = np.arange(n, dtype=np.float64)
+    ramp = np.minimum(np.clip(t / max(1.0, fade_in * rate), 0, 1), np.clip((n - t) / max(1.0, fade_out * rate), 0, 1))
+    return np.sin(0.5 * np.pi * ramp).astype(np.float32)
+
+
+def limit(x, rate=RATE, ceiling_db=-1.0, release=0.08, block=0.005):
+    """Pull every block whose peak passes `ceiling_db` down to it, smoothly; then a hard clip as a net."""
+    size = max(1, int(rate * block))
+    ceiling = float(db_to_gain(ceiling_db))
+    peaks = _block_stat(x, size, "peak")
+    gains = np.minimum(1.0, ceiling / np.maximum(peaks, 1e-9))
+    reach = max(1, int(release / block))
+    # Every block within `reach` of a loud one is held at least as low, so the average stays under it
+    gains = _smooth(_spread(gains, reach, reach, reduce=np.minimum), reach)
+    return np.clip(x * _to_samples(gains, size, len(x))[:, None], -ceiling, ceiling)
+
+
+def drone(seconds, rate=RATE, seed=0):
+    """A quiet synthesized ambient pad (stacked fifths on A with slow swells and airy noise), stereo."""
+    n = int(round(seconds * rate))
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / rate
+    out = np.zeros((n, 2), dtype=np.float32)
+    for k, freq in enumerate((55.0, 82.5, 110.0, 164.8, 220.0, 329.6)):
+        swell = 0.6 + 0.4 * np.sin(2 * np.pi * (0.05 + 0.02 * k) * t + rng.uniform(0, 2 * np.pi))
+        for ch, detune in enumerate((-0.15, 0.15)):   # slight detune per side for width
+            out[:, ch] += (swell * np.sin(2 * np.pi * (freq + detune) * t + rng.uniform(0, 2 * np.pi)) / (k + 1.5))
+    noise = np.fft.rfft(rng.standard_normal((n, 2)), axis=0)
+    noise[int(1200 * n / rate):] = 0                  # keep the air below 1.2 kHz
+    air = np.fft.irfft(noise, n, axis=0)
+    out += (0.08 / max(1e-9, air.std())) * air.astype(np.float32)
+    return out * fades(n, rate, fade_in=2.0, fade_out=2.0)[:, None]
+
+
+def mix(voice, bed=None, rate=RATE, duration=None, bed_lu=-18.0, duck_db=-10.0, target_lufs=-14.0,
+        ceiling_db=-1.0, fade_in=0.3, fade_out=1.0):
+    """Voice over a ducked bed, faded, normalized to `target_lufs` and held under `ceiling_db`.
+
+    The bed (looped to length) is leveled `bed_lu` LU below the voice before ducking.
+    Returns (float32 (samples, 2) PCM, info dict).
+    """
+    n = int(round(duration * rate)) if duration else len(voice)
+    voice = fit(np.asarray(voice, dtype=np.float32), n)
+    voice_lufs = loudness(voice, rate)
+    out = voice.copy()
+    info = {"input_lufs": voice_lufs, "bed": bed is not None}
+    if bed is not None and len(bed):
+        bed = fit(np.asarray(bed, dtype=np.float32), n, loop=True)
+        bed_lufs = loudness(bed, rate)
+        if np.isfinite(bed_lufs):
+            reference = voice_lufs if np.isfinite(voice_lufs) else target_lufs
+            bed = bed * float(db_to_gain(reference + bed_lu - bed_lufs))
+            out += bed * duck_gain(voice, rate, duck_db)[:, None]
+    out *= fades(n, rate, fade_in, fade_out)[:, None]
+    mixed_lufs = loudness(out, rate)
+    gain_db = target_lufs - mixed_lufs if np.isfinite(mixed_lufs) else 0.0
+    out = limit(out * float(db_to_gain(gain_db)), rate, ceiling_db)
+    peak = float(np.abs(out).max()) if n else 0.0
+    info.update(gain_db=gain_db, lufs=loudness(out, rate),
+                peak_db=float(20 * np.log10(peak)) if peak > 0 else float("-inf"), seconds=n / rate)
+    return out.astype(np.float32), info
@@ -0,0 +1,345 @@
+"""Resident daemon for the daily bot: cron-style scheduler, idle pre-generation and a control socket.
+
+The daemon knows nothing about Gemini or email; daily_bot.py hands it callbacks:
+
+    prepare(key)        -> post        build a post for tenant `key` (slow: Gemini, image, reel)
+    deliver(key, post)  -> None        send a prepared post (fast: email only)
+    warmup()            -> None        run once on the worker thread (imports, warm browser)
+    shutdown()          -> None        run on the worker thread when stopping
+
+All callbacks run on a single worker thread, so thread-bound resources such as a
+Playwright browser can be created in warmup() and reused by every run.
+"""
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]  # minute hour dom month dow
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day-of-month month day-of-week), evaluated in UTC.
+
+    Supports '*', lists ('1,15'), ranges ('9-17'), steps ('*/15', '0-30/10') and 7 as Sunday.
+    """
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: {expr!r}")
+        self.expr = expr
+        sets = []
+        for i, (field, (lo, hi)) in enumerate(zip(fields, _FIELD_RANGES)):
+            values = self._parse_field(field, lo, 7 if i == 4 else hi)
+            if i == 4 and 7 in values:
+                values = (values - {7}) | {0}
+            sets.append(values)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = sets
+        self.dom_any = fields[2] == '*'
+        self.dow_any = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field, lo, hi):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step: {field!r}")
+            if part == '*':
+                start, end = lo, hi
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-', 1))
+            else:
+                start = int(part)
+                end = hi if step > 1 else start
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron value out of range {lo}-{hi}: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.dom_any and self.dow_any:
+            return True
+        if self.dom_any:
+            return dow
+        if self.dow_any:
+            return dom
+        return dom or dow
+
+    def next_after(self, dt):
+        """First matching minute strictly after dt (timezone-aware, UTC)."""
+        t = dt.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+
+def default_control_address():
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(tempfile.gettempdir(), 'astroboli-bot.sock')
+    return 'tcp:127.0.0.1:8766'
+
+
+def send_command(address, command, timeout=600):
+    """Send one control command to a running daemon and return its JSON reply."""
+    if address.startswith('tcp:'):
+        host, port = address[4:].rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)), timeout=timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    with sock, sock.makefile('rwb') as f:
+        f.write((command.strip() + '\n').encode('utf-8'))
+        f.flush()
+        return json.loads(f.readline().decode('utf-8') or '{}')
+
+
+class BotDaemon:
+    """Keeps the bot resident, pre-generates posts while idle and delivers them on schedule."""
+
+    def __init__(self, schedule, prepare, deliver, keys=('default',), warmup=None, shutdown=None,
+                 ahead=1, max_age=36 * 3600, idle_margin=300, control_address=None):
+        self.schedule = schedule if isinstance(schedule, CronSchedule) else CronSchedule(schedule)
+        self.prepare = prepare
+        self.deliver = deliver
+        self.keys = list(keys)
+        self.warmup = warmup
+        self.shutdown_hook = shutdown
+        self.ahead = ahead
+        self.max_age = max_age
+        self.idle_margin = idle_margin
+        self.control_address = control_address or default_control_address()
+
+        self._jobs = queue.Queue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._ready = {key: deque() for key in self.keys}   # (created, post)
+        self._pending_pregen = set()
+        self._busy = None
+        self._next_run = None
+        self._history = deque(maxlen=20)
+        self._started = time.time()
+        self._warm = False
+        self._server = None
+
+    # -- worker ----------------------------------------------------------------
+    def _worker(self):
+        if self.warmup:
+            started = time.perf_counter()
+            try:
+                self.warmup()
+            except Exception as e:
+                print(f"⚠️ Warmup failed: {e}")
+            print(f"🔥 Warm in {time.perf_counter() - started:.1f}s")
+        self._warm = True
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                self._run_job(*job)
+        finally:
+            if self.shutdown_hook:
+                self.shutdown_hook()
+
+    def _take_ready(self, key):
+        with self._lock:
+            ready = self._ready[key]
+            while ready:
+                created, post = ready.popleft()
+                if time.time() - created <= self.max_age:
+                    return post
+        return None
+
+    def _run_job(self, kind, key, done=None):
+        with self._lock:
+            self._busy = f"{kind}:{key}"
+        started = time.perf_counter()
+        record = {'kind': kind, 'key': key, 'at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+        post = None
+        try:
+            if kind == 'pregen':
+                post = self.prepare(key)
+                with self._lock:
+                    self._ready[key].append((time.time(), post))
+            else:
+                post = self._take_ready(key)
+                record['pregenerated'] = post is not None
+                if post is None:
+                    post = self.prepare(key)
+                self.deliver(key, post)
+            record['ok'] = True
+        except Exception as e:
+            record['ok'] = False
+            record['error'] = str(e)
+            traceback.print_exc()
+            if kind == 'deliver' and post is not None:
+                with self._lock:
+                    self._ready[key].appendleft((time.time(), post))  # keep it for the retry
+        finally:
+            record['seconds'] = round(time.perf_counter() - started, 3)
+            with self._lock:
+                self._busy = None
+                if kind == 'pregen':
+                    self._pending_pregen.discard(key)
+                self._history.append(record)
+            if done:
+                done.put(record)
+            self._wake.set()
+
+    # -- scheduling ------------------------------------------------------------
+    def _enqueue(self, kind, key, done=None):
+        if kind == 'pregen':
+            with self._lock:
+                if key in self._pending_pregen:
+                    return False
+                self._pending_pregen.add(key)
+        self._jobs.put((kind, key, done))
+        return True
+
+    def _maybe_pregenerate(self, now):
+        if not self._warm or not self._jobs.empty() or self._busy:
+            return
+        if self._next_run and (self._next_run - now).total_seconds() < self.idle_margin:
+            return  # too close to a delivery; don't start a long render now
+        for key in self.keys:
+            with self._lock:
+                short = len(self._ready[key]) < self.ahead and key not in self._pending_pregen
+            if short:
+                self._enqueue('pregen', key)
+                return
+
+    def _scheduler(self):
+        now = datetime.now(timezone.utc)
+        self._next_run = self.schedule.next_after(now)
+        print(f"⏰ Next delivery: {self._next_run.isoformat(timespec='minutes')}")
+        while not self._stop.is_set():
+            now = datetime.now(timezone.utc)
+            if now >= self._next_run:
+                for key in self.keys:
+                    self._enqueue('deliver', key)
+                self._next_run = self.schedule.next_after(now)
+                print(f"⏰ Next delivery: {self._next_run.isoformat(timespec='minutes')}")
+            self._maybe_pregenerate(now)
+            wait = min(30.0, max(0.5, (self._next_run - now).total_seconds()))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    # -- control socket --------------------------------------------------------
+    def status(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'uptime_s': round(time.time() - self._started),
+                'schedule': self.schedule.expr,
+                'next_run': self._next_run.isoformat(timespec='minutes') if self._next_run else None,
+                'warm': self._warm,
+                'busy': self._busy,
+                'queued': self._jobs.qsize(),
+                'ready': {key: len(posts) for key, posts in self._ready.items()},
+                'history': list(self._history),
+            }
+
+    def handle_command(self, line):
+        parts = line.split()
+        if not parts:
+            return {'error': 'empty command'}
+        cmd, args = parts[0].lower(), parts[1:]
+        keys = args or self.keys
+        unknown = [k for k in keys if k not in self._ready]
+        if cmd in ('trigger', 'pregen') and unknown:
+            return {'error': f"unknown tenant(s): {', '.join(unknown)}"}
+        if cmd == 'status':
+            return self.status()
+        if cmd == 'trigger':
+            done = queue.Queue()
+            for key in keys:
+                self._enqueue('deliver', key, done)
+            self._wake.set()
+            return {'results': [done.get() for _ in keys]}
+        if cmd == 'pregen':
+            queued = [key for key in keys if self._enqueue('pregen', key)]
+            self._wake.set()
+            return {'queued': queued}
+        if cmd == 'stop':
+            self.stop()
+            return {'stopping': True}
+        return {'error': f"unknown command {cmd!r} (status, trigger [tenant], pregen [tenant], stop)"}
+
+    def _start_control(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline().decode('utf-8', 'replace').strip()
+                try:
+                    reply = daemon.handle_command(line)
+                except Exception as e:
+                    reply = {'error': str(e)}
+                self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+
+        address = self.control_address
+        if address.startswith('tcp:'):
+            host, port = address[4:].rsplit(':', 1)
+            server_cls = socketserver.ThreadingTCPServer
+            server_cls.allow_reuse_address = True
+            self._server = server_cls((host, int(port)), Handler)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='bot-control', daemon=True).start()
+        print(f"🎛️ Control socket: {address}")
+
+    # -- lifecycle -------------------------------------------------------------
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run(self):
+        """Run until stopped via the control socket, SIGTERM or Ctrl+C."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        worker = threading.Thread(target=self._worker, name='bot-worker')
+        worker.start()
+        self._start_control()
+        try:
+            self._scheduler()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            self._server.shutdown()
+            self._server.server_close()
+            if not self.control_address.startswith('tcp:') and os.path.exists(self.control_address):
+                os.unlink(self.control_address)
+            self._jobs.put(None)
+            worker.join()
+            print("👋 Daemon stopped")
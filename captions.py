@@ -0,0 +1,171 @@
+"""Burned-in reel captions: glyphs rasterized once into an atlas, cues blended into frames with NumPy.
+
+    words = [(0.00, 0.42, "Welcome"), (0.42, 0.61, "to"), ...]   # seconds, e.g. from TTS WordBoundary
+    captions = Captions(words, (1080, 1920))
+    frame = captions.apply(frame, t)                                # HxWx3 uint8, text composited
+
+The font is drawn once per character into two alpha atlases, fill and fill+outline. A cue
+(one line of words) is assembled by slicing glyph cells out of the atlas, which takes
+microseconds, and is cached per highlighted word. Per frame, only the caption's bounding box
+is alpha-blended, so a 1080x1920 frame costs a couple of milliseconds however long the script
+is. That avoids a moviepy TextClip (a full Pillow render plus compositing) per word.
+"""
+import bisect
+import os
+import string
+
+import numpy as np
+
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",
+)
+FILL = (255, 255, 255)
+HIGHLIGHT = (212, 175, 55)   # brand gold (#D4AF37) for the word being spoken
+OUTLINE = (20, 12, 38)       # brand indigo, darkened
+
+
+def _load_font(path, size):
+    from PIL import ImageFont
+    for candidate in ([path] if path else []) + list(FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            return ImageFont.truetype(candidate, size)
+    return ImageFont.load_default(size=size)
+
+
+class GlyphAtlas:
+    """Fill and outline alpha masks for a character set, rendered once with Pillow."""
+
+    def __init__(self, chars="", size=72, stroke=5, font_path=None):
+        from PIL import Image, ImageDraw
+        font = _load_font(font_path, size)
+        chars = sorted(set(string.printable.strip() + " " + chars) - set("\t\n\r\x0b\x0c"))
+        ascent, descent = font.getmetrics()
+        self.size = size
+        self.stroke = stroke
+        self.height = ascent + descent + 2 * stroke
+        self.advance = {c: int(round(font.getlength(c))) for c in chars}
+        self.cells = {}
+        x = 0
+        for c in chars:
+            self.cells[c] = (x, self.advance[c] + 2 * stroke)
+            x += self.advance[c] + 2 * stroke
+        fill = Image.new("L", (x, self.height))
+        shape = Image.new("L", (x, self.height))
+        fill_draw, shape_draw = ImageDraw.Draw(fill), ImageDraw.Draw(shape)
+        for c, (cx, _) in self.cells.items():
+            fill_draw.text((cx + stroke, stroke), c, font=font, fill=255)
+            shape_draw.text((cx + stroke, stroke), c, font=font, fill=255, stroke_width=stroke, stroke_fill=255)
+        self.fill = np.asarray(fill, dtype=np.float32) / 255.0
+        self.shape = np.asarray(shape, dtype=np.float32) / 255.0
+
+    def width(self, text):
+        return sum(self.advance.get(c, self.advance["?"]) for c in text) + 2 * self.stroke
+
+    def render(self, text):
+        """(fill alpha, outline+fill alpha, per-character x offsets) for one line of text."""
+        fill = np.zeros((self.height, self.width(text)), dtype=np.float32)
+        shape = np.zeros_like(fill)
+        offsets = []
+        x = 0
+        for c in text:
+            c = c if c in self.cells else "?"
+            cx, cw = self.cells[c]
+            np.maximum(fill[:, x:x + cw], self.fill[:, cx:cx + cw], out=fill[:, x:x + cw])
+            np.maximum(shape[:, x:x + cw], self.shape[:, cx:cx + cw], out=shape[:, x:x + cw])
+            offsets.append(x)
+            x += self.advance[c]
+        offsets.append(x)
+        return fill, shape, offsets
+
+
+def estimate_word_timings(text, duration, start=0.3):
+    """Spread words over `duration` seconds in proportion to their length (used without TTS timings)."""
+    words = text.split()
+    if not words:
+        return []
+    weights = [len(w) + 2 for w in words]
+    per_unit = max(0.0, duration - start) / sum(weights)
+    timings, t = [], start
+    for word, weight in zip(words, weights):
+        timings.append((t, t + weight * per_unit, word))
+        t += weight * per_unit
+    return timings
+
+
+class Captions:
+    """Line-by-line captions with the spoken word highlighted, for frames of `frame_size` (w, h)."""
+
+    def __init__(self, words, frame_size, atlas=None, y_frac=0.72, max_width_frac=0.86, fade=0.12):
+        self.frame_w, self.frame_h = frame_size
+        text = "".join(w for _, _, w in words)
+        self.atlas = atlas or GlyphAtlas(text, size=max(24, self.frame_w // 15), stroke=max(2, self.frame_w // 216))
+        self.y = int(self.frame_h * y_frac) - self.atlas.height // 2
+        self.fade = fade
+        self.cues = self._layout([(float(s), float(e), str(w)) for s, e, w in words if str(w).strip()],
+                                 int(self.frame_w * max_width_frac))
+        self.starts = [cue["start"] for cue in self.cues]
+        self._layers = {}
+
+    def _layout(self, words, max_width):
+        cues, line = [], []
+        for word in words:
+            if line and self.atlas.width(" ".join(w for _, _, w in line + [word])) > max_width:
+                cues.append(line)
+                line = []
+            line.append(word)
+        if line:
+            cues.append(line)
+        laid_out = []
+        for i, line in enumerate(cues):
+            end = line[-1][1] + 0.3
+            if i + 1 < len(cues):
+                next_start = cues[i + 1][0][0]
+                end = next_start if next_start - line[-1][1] < 0.6 else min(end, next_start)  # bridge short pauses
+            laid_out.append({"start": line[0][0], "end": end, "words": line, "text": " ".join(w for _, _, w in line)})
+        return laid_out
+
+    def _layer(self, index, active):
+        """Premultiplied RGB, alpha and x position of cue `index` with word `active` highlighted."""
+        key = (index, active)
+        if key not in self._layers:
+            cue = self.cues[index]
+            fill, shape, offsets = self.atlas.render(cue["text"])
+            colors = np.empty((fill.shape[1], 3), dtype=np.float32)
+            colors[:] = FILL
+            if active is not None:
+                first = sum(len(w) + 1 for _, _, w in cue["words"][:active])
+                last = first + len(cue["words"][active][2])
+                colors[offsets[first]:offsets[last] + 2 * self.atlas.stroke] = HIGHLIGHT
+            outline = np.array(OUTLINE, dtype=np.float32)
+            premultiplied = shape[..., None] * outline + fill[..., None] * (colors - outline)[None]
+            x = max(0, (self.frame_w - fill.shape[1]) // 2)
+            self._layers[key] = (premultiplied[:, :self.frame_w - x], shape[:, :self.frame_w - x], x)
+        return self._layers[key]
+
+    def cue_at(self, t):
+        """(cue index, active word index or None) shown at time t, or None."""
+        i = bisect.bisect_right(self.starts, t) - 1
+        if i < 0 or t >= self.cues[i]["end"]:
+            return None
+        words = self.cues[i]["words"]
+        active = next((k for k, (s, e, _) in enumerate(words) if s <= t < e), None)
+        return i, active
+
+    def apply(self, frame, t):
+        """Return `frame` with the caption for time t blended in (the input array is not modified)."""
+        shown = self.cue_at(t)
+        if shown is None:
+            return frame
+        premultiplied, alpha, x = self._layer(*shown)
+        fade = min(1.0, (t - self.cues[shown[0]]["start"]) / self.fade) if self.fade else 1.0
+        if fade < 1.0:
+            premultiplied, alpha = premultiplied * fade, alpha * fade
+        h, w = alpha.shape
+        y = min(max(0, self.y), self.frame_h - h)
+        out = np.array(frame, dtype=np.uint8, copy=True)
+        region = out[y:y + h, x:x + w].astype(np.float32)
+        out[y:y + h, x:x + w] = (region * (1.0 - alpha[..., None]) + premultiplied + 0.5).astype(np.uint8)
+        return out
@@ -0,0 +1,375 @@
+"""Local HTTP content API over the run directories, for the iOS companion app.
+
+    python content_server.py --runs runs --port 8787 --token s3cret
+    python daily_bot.py --serve                    # same, with RUNS_DIR and the CONTENT_API_* settings
+
+    GET /posts                     newest first: [{"id", "created", "caption", "hashtags", "image": {...}, ...}]
+    GET /posts/latest              the newest run that has a post image (any id also accepts "latest")
+    GET /posts/<id>                one post as JSON (caption, hashtags, video prompt, media URLs + ETags)
+    GET /posts/<id>/image          post.jpg (1080x1080)
+    GET /posts/<id>/thumb          360 px JPEG rendition, made on first request and cached in the run
+    GET /posts/<id>/original       image_raw.jpg as downloaded
+    GET /posts/<id>/reel           reel.mp4
+    GET /posts/<id>/caption        {"brand_name", "caption", "hashtags", "video_prompt"}
+
+Media ETags are strong: they are the sha256 recorded in the run manifest when the artifact was
+written, so they cost no hashing per request. JSON bodies are tagged with a hash of the body.
+`If-None-Match` (and `If-Modified-Since` when no ETag is sent) answers 304. A single
+`Range: bytes=...` (with `If-Range`) answers 206, or 416 when the range is outside the file.
+File bodies go out through loop.sendfile(), which is os.sendfile on Linux and macOS, so the
+reel moves from the page cache to the socket without passing through Python. A phone can
+therefore re-poll cheaply, resume an interrupted download and seek inside a reel.
+
+With a token configured every request needs `Authorization: Bearer <token>` or `?token=`.
+The server binds 127.0.0.1 unless told otherwise.
+"""
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+MEDIA = {  # route -> (manifest stage, content type)
+    "image": ("post", "image/jpeg"),
+    "original": ("image_raw", "image/jpeg"),
+    "reel": ("reel", "video/mp4"),
+}
+THUMB_WIDTH = 360
+_RUN_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+_REASONS = {200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+            404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable", 431: "Headers Too Large",
+            500: "Internal Server Error"}
+
+
+def parse_range(header, size):
+    """(start, length) for a single `bytes=` range, None to ignore the header, or "unsatisfiable"."""
+    m = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header or "")
+    if not m or not (m.group(1) or m.group(2)):
+        return None  # absent, malformed or multi-range: serve the whole file
+    if m.group(1):
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+        if start >= size or end < start:
+            return "unsatisfiable"
+    else:
+        suffix = int(m.group(2))
+        if suffix == 0 or size == 0:
+            return "unsatisfiable"
+        start, end = max(0, size - suffix), size - 1
+    return start, end - start + 1
+
+
+def _http_date(ts):
+    return email.utils.formatdate(ts, usegmt=True)
+
+
+class ContentServer:
+    """asyncio HTTP/1.1 server (keep-alive, GET/HEAD) for the posts under a runs directory."""
+
+    def __init__(self, runs_dir, token=None, idle_timeout=30.0):
+        self.runs_dir = runs_dir
+        self.token = token or None
+        self.idle_timeout = idle_timeout
+        self.stats = {"requests": 0, "not_modified": 0, "partial": 0, "sendfile_bytes": 0}
+        self._manifests = {}  # run path -> (mtime_ns, manifest)
+        self._server = None
+
+    # -- runs ----------------------------------------------------------------------
+    def _manifest(self, path):
+        file = os.path.join(path, "manifest.json")
+        try:
+            mtime = os.stat(file).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._manifests.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(file, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._manifests[path] = (mtime, manifest)
+        return manifest
+
+    def _runs(self):
+        """[(path, manifest)] of runs with a post image, newest first."""
+        try:
+            names = os.listdir(self.runs_dir)
+        except OSError:
+            return []
+        runs = []
+        for name in names:
+            path = os.path.join(self.runs_dir, name)
+            manifest = self._manifest(path) if _RUN_ID.match(name) else None
+            if manifest and "post" in manifest.get("stages", {}):
+                runs.append((path, manifest))
+        runs.sort(key=lambda r: r[1].get("created", 0), reverse=True)
+        return runs
+
+    def _run(self, run_id):
+        if run_id == "latest":
+            runs = self._runs()
+            return runs[0] if runs else None
+        if not _RUN_ID.match(run_id):
+            return None
+        path = os.path.join(self.runs_dir, run_id)
+        manifest = self._manifest(path)
+        return (path, manifest) if manifest and "post" in manifest.get("stages", {}) else None
+
+    @staticmethod
+    def _content(path, manifest):
+        entry = manifest["stages"].get("content")
+        if not entry:
+            return {}
+        try:
+            with open(os.path.join(path, entry["file"]), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _caption(self, path, manifest):
+        content = self._content(path, manifest)
+        meta = content.get("meta") if isinstance(content.get("meta"), dict) else {}
+        prompt = None
+        entry = manifest["stages"].get("video_prompt")
+        if entry:
+            try:
+                with open(os.path.join(path, entry["file"]), encoding="utf-8") as f:
+                    prompt = f.read()
+            except OSError:
+                pass
+        return {"brand_name": content.get("brand_name"), "caption": content.get("caption"),
+                "hashtags": meta.get("hashtags") or [], "video_prompt": prompt}
+
+    def _post(self, path, manifest):
+        run_id = manifest["run_id"]
+        post = {"id": run_id, "created": manifest.get("created"), "delivered": "email" in manifest["stages"]}
+        post.update(self._caption(path, manifest))
+        for route, (stage, ctype) in MEDIA.items():
+            entry = manifest["stages"].get(stage)
+            post[route] = {"url": f"/posts/{run_id}/{route}", "etag": f'"{entry["sha256"]}"', "bytes": entry["bytes"],
+                           "type": ctype} if entry and entry.get("sha256") else None
+        post["thumb"] = {"url": f"/posts/{run_id}/thumb", "etag": self._thumb_etag(manifest), "type": "image/jpeg"}
+        return post
+
+    @staticmethod
+    def _thumb_etag(manifest):
+        return f'"{manifest["stages"]["post"]["sha256"]}-w{THUMB_WIDTH}"'
+
+    def _thumb(self, path, manifest):
+        """Path of the cached thumbnail rendition (made on first request, keyed by the post image hash)."""
+        thumb = os.path.join(path, f"thumb_{THUMB_WIDTH}_{manifest['stages']['post']['sha256'][:12]}.jpg")
+        if not os.path.exists(thumb):
+            from PIL import Image
+            with Image.open(os.path.join(path, manifest["stages"]["post"]["file"])) as im:
+                im = im.convert("RGB")
+                im.thumbnail((THUMB_WIDTH, THUMB_WIDTH * 4), Image.Resampling.LANCZOS)
+                tmp = f"{thumb}.{os.getpid()}.{threading.get_ident()}.tmp"
+                im.save(tmp, "JPEG", quality=85, optimize=True)
+            os.replace(tmp, thumb)
+        return thumb
+
+    # -- HTTP ----------------------------------------------------------------------
+    def _authorized(self, headers, query):
+        if not self.token:
+            return True
+        offered = headers.get("authorization", "")
+        offered = offered[7:].strip() if offered.lower().startswith("bearer ") else (query.get("token") or [""])[0]
+        return hmac.compare_digest(offered.encode(), self.token.encode())
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, "GET", 431, close=True)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+                    await self._respond(writer, "GET", 400, close=True)
+                    return
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+                self.stats["requests"] += 1
+                try:
+                    await self._route(writer, method, target, headers, close)
+                except ConnectionError:
+                    return
+                except Exception as e:  # a bad run directory must not take the server down
+                    print(f"⚠️ Content API error on {target}: {e}")
+                    await self._respond(writer, method, 500, close=True)
+                    return
+                if close:
+                    return
+        finally:
+            writer.close()
+
+    async def _route(self, writer, method, target, headers, close):
+        if method not in ("GET", "HEAD"):
+            return await self._respond(writer, method, 405, {"Allow": "GET, HEAD"}, close=close)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if not self._authorized(headers, query):
+            return await self._respond(writer, method, 401, {"WWW-Authenticate": "Bearer"}, close=close)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["posts"]:
+            body = [self._post(path, m) for path, m in self._runs()]
+            return await self._json(writer, method, headers, body, close)
+        if len(parts) < 2 or len(parts) > 3 or parts[0] != "posts":
+            return await self._respond(writer, method, 404, close=close)
+        found = self._run(parts[1])
+        if found is None:
+            return await self._respond(writer, method, 404, close=close)
+        path, manifest = found
+        if len(parts) == 2:
+            return await self._json(writer, method, headers, self._post(path, manifest), close)
+        route = parts[2]
+        if route == "caption":
+            return await self._json(writer, method, headers, self._caption(path, manifest), close)
+        if route == "thumb":
+            thumb = await asyncio.get_running_loop().run_in_executor(None, self._thumb, path, manifest)
+            return await self._file(writer, method, headers, thumb, self._thumb_etag(manifest), "image/jpeg", close)
+        if route in MEDIA:
+            stage, ctype = MEDIA[route]
+            entry = manifest["stages"].get(stage)
+            if entry and entry.get("file"):
+                return await self._file(writer, method, headers, os.path.join(path, entry["file"]),
+                                        f'"{entry["sha256"]}"', ctype, close)
+        return await self._respond(writer, method, 404, close=close)
+
+    def _not_modified(self, headers, etag, mtime):
+        match = headers.get("if-none-match")
+        if match is not None:
+            return match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in match.split(",")]
+        since = headers.get("if-modified-since")
+        if since and mtime is not None:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def _json(self, writer, method, headers, obj, close):
+        body = json.dumps(obj, indent=2).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        extra = {"ETag": etag, "Cache-Control": "no-cache"}
+        if self._not_modified(headers, etag, None):
+            self.stats["not_modified"] += 1
+            return await self._respond(writer, method, 304, extra, close=close)
+        return await self._respond(writer, method, 200, extra, body, "application/json", close)
+
+    async def _file(self, writer, method, headers, path, etag, ctype, close):
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return await self._respond(writer, method, 404, close=close)
+        with f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            extra = {"ETag": etag, "Last-Modified": _http_date(st.st_mtime), "Accept-Ranges": "bytes",
+                     "Cache-Control": "no-cache"}
+            if self._not_modified(headers, etag, st.st_mtime):
+                self.stats["not_modified"] += 1
+                return await self._respond(writer, method, 304, extra, close=close)
+            status, start, length = 200, 0, size
+            if_range = headers.get("if-range")
+            wanted = parse_range(headers.get("range"), size) if if_range in (None, etag) else None
+            if wanted == "unsatisfiable":
+                extra["Content-Range"] = f"bytes */{size}"
+                return await self._respond(writer, method, 416, extra, close=close)
+            if wanted is not None:
+                status, (start, length) = 206, wanted
+                extra["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+                self.stats["partial"] += 1
+            self._write_head(writer, status, extra, length, ctype, close)
+            await writer.drain()
+            if method == "HEAD" or not length:
+                return
+            await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+            self.stats["sendfile_bytes"] += length
+
+    @staticmethod
+    def _write_head(writer, status, extra, length, ctype, close):
+        lines = [f"HTTP/1.1 {status} {_REASONS[status]}", f"Date: {_http_date(time.time())}",
+                 "Server: astroboli-content", f"Content-Length: {length}"]
+        if ctype:
+            lines.append(f"Content-Type: {ctype}")
+        lines += [f"{k}: {v}" for k, v in extra.items()]
+        lines.append("Connection: close" if close else "Connection: keep-alive")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _respond(self, writer, method, status, extra=None, body=b"", ctype=None, close=False):
+        if status >= 400 and not body:
+            body, ctype = json.dumps({"error": _REASONS[status]}).encode(), "application/json"
+        self._write_head(writer, status, extra or {}, len(body), ctype, close)
+        if method != "HEAD" and body and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+    # -- lifecycle -----------------------------------------------------------------
+    async def start(self, host="127.0.0.1", port=8787):
+        self._server = await asyncio.start_server(self._handle, host, port, limit=16 * 1024)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, host="127.0.0.1", port=8787):
+        host, port = await self.start(host, port)
+        print(f"📡 Content API on http://{host}:{port}/posts (runs: {self.runs_dir}"
+              f"{', token required' if self.token else ''})")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self, host="127.0.0.1", port=8787):
+        """Run the server on its own event loop in a daemon thread; returns the bound (host, port)."""
+        ready = threading.Event()
+        bound = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                bound["address"] = loop.run_until_complete(self.start(host, port))
+            except OSError as e:  # e.g. port in use: raised in the caller
+                bound["error"] = e
+                return
+            finally:
+                ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="content-api", daemon=True).start()
+        ready.wait()
+        if "error" in bound:
+            raise bound["error"]
+        return bound["address"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve bot posts (images, captions, reels) over HTTP")
+    parser.add_argument("--runs", default=os.environ.get("RUNS_DIR", "runs"), help="Runs directory")
+    parser.add_argument("--host", default=os.environ.get("CONTENT_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("CONTENT_API_PORT", "8787")))
+    parser.add_argument("--token", default=os.environ.get("CONTENT_API_TOKEN"), help="Required bearer token")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(ContentServer(args.runs, args.token).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Procedural cosmic animation: drifting fBm nebula, parallax starfield, constellations and a zodiac glyph.
+
+    engine = CosmicEngine(duration=10.0, palette=("#2D1B4E", "#D4AF37", "#4ECDC4"), seed=7)
+    frame = engine.frame(0)                       # 1920x1080x3 uint8, a pure function of the index
+    data = cosmic_reel(duration=10.0, workers=4)  # MP4 bytes, rendered in chunks on a process pool
+
+Everything is NumPy and Pillow with a fixed amount of work per frame, so runtime depends only
+on duration and core count, never on the content, and no network is involved. The nebula is
+fBm value noise. Its octaves drift in different directions and it is evaluated on a 1/8-scale
+grid, then upsampled, which suits a field that is smooth anyway. Stars are Gaussian splats at
+subpixel positions in three depth layers with per-star twinkle. Constellation lines and the
+zodiac glyph are rasterized once into sparse pixel lists that each carry a reveal time, so
+"drawing" them on only costs a gather and a scatter per frame. Colours come from the brand
+palette: deep purple clouds, teal wisps, gold highlights, constellations and glyph.
+"""
+import datetime
+import math
+import os
+import random
+
+import numpy as np
+
+PALETTE = ("#2D1B4E", "#D4AF37", "#4ECDC4")
+ZODIAC = [  # (sign, glyph, first day as (month, day)), in calendar order
+    ("aquarius", "\u2652", (1, 20)), ("pisces", "\u2653", (2, 19)), ("aries", "\u2648", (3, 21)),
+    ("taurus", "\u2649", (4, 20)), ("gemini", "\u264a", (5, 21)), ("cancer", "\u264b", (6, 21)),
+    ("leo", "\u264c", (7, 23)), ("virgo", "\u264d", (8, 23)), ("libra", "\u264e", (9, 23)),
+    ("scorpio", "\u264f", (10, 23)), ("sagittarius", "\u2650", (11, 22)), ("capricorn", "\u2651", (12, 22)),
+]
+GLYPH_FONTS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Apple Symbols.ttf",
+    "C:/Windows/Fonts/seguisym.ttf",
+)
+
+
+def sun_sign_glyph(date=None):
+    """Zodiac glyph of the sun sign on `date` (default: today, UTC)."""
+    date = date or datetime.datetime.now(datetime.timezone.utc).date()
+    glyph = ZODIAC[-1][1]  # capricorn spans the new year
+    for _, symbol, first in ZODIAC:
+        if (date.month, date.day) >= first:
+            glyph = symbol
+    return glyph
+
+
+def _rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32)
+
+
+def _fbm(x, y, table, octaves=5):
+    """Value-noise fBm in [0, 1] at float coordinate arrays x, y (lattice values from `table`)."""
+    total = np.zeros_like(x)
+    amplitude, norm = 0.5, 0.0
+    for octave in range(octaves):
+        xi, yi = np.floor(x).astype(np.int32), np.floor(y).astype(np.int32)
+        xf, yf = x - xi, y - yi
+        u, v = xf * xf * (3 - 2 * xf), yf * yf * (3 - 2 * yf)
+        perm, values = table[octave % len(table)]
+        xi &= 255
+        yi &= 255
+        row0, row1 = perm[yi], perm[(yi + 1) & 255]
+        a, b = values[(row0 + xi) & 255], values[(row0 + xi + 1) & 255]
+        c, d = values[(row1 + xi) & 255], values[(row1 + xi + 1) & 255]
+        total += amplitude * (a + (b - a) * u + (c - a) * v + (a - b - c + d) * u * v)
+        norm += amplitude
+        amplitude *= 0.5
+        x, y = (x * 0.88 - y * 0.48) * 2.03 + 17.1, (x * 0.48 + y * 0.88) * 2.03 + 31.7  # rotate: octaves drift apart
+    return total / norm
+
+
+class CosmicEngine:
+    """Deterministic frame source: frame(i) depends only on i and the constructor arguments."""
+
+    def __init__(self, duration=10.0, size=(1080, 1920), fps=24, palette=PALETTE, seed=0, glyph=None,
+                 stars=1400, constellations=4, scale=8):
+        from PIL import Image
+        rng = random.Random(seed)
+        nprng = np.random.default_rng(seed)
+        self.width, self.height = size
+        self.fps = fps
+        self.frames = max(1, int(round(duration * fps)))
+        self.duration = self.frames / fps
+        self.deep, self.gold, self.teal = (_rgb(c) for c in palette[:3])
+        self._resample = Image.Resampling.BILINEAR
+
+        # Nebula grid (1/scale resolution) and drift direction
+        gw, gh = self.width // scale, self.height // scale
+        ys, xs = np.mgrid[0:gh, 0:gw].astype(np.float32)
+        self.gx, self.gy = xs / 40.0, ys / 40.0
+        self.table = [(nprng.permutation(256).astype(np.int32), nprng.random(256).astype(np.float32))
+                      for _ in range(5)]
+        angle = rng.uniform(0, 2 * math.pi)
+        self.flow = (math.cos(angle) * 0.045, math.sin(angle) * 0.045)
+        vignette = np.clip(1.2 - 0.7 * (((xs / gw) - 0.5) ** 2 * 2.2 + ((ys / gh) - 0.5) ** 2 * 1.6), 0.3, 1.0)
+        self.vignette = vignette[..., None].astype(np.float32)
+
+        # Stars: three depth layers drifting at different speeds (parallax), each with its own twinkle
+        depth = nprng.choice([0.35, 0.7, 1.0], size=stars, p=[0.55, 0.3, 0.15]).astype(np.float32)
+        self.star_x = nprng.uniform(0, self.width, stars).astype(np.float32)
+        self.star_y = nprng.uniform(0, self.height, stars).astype(np.float32)
+        self.star_v = depth * 14.0  # px/s upward
+        self.star_sigma = 0.55 + 0.6 * depth
+        self.star_level = (nprng.uniform(0.35, 1.0, stars) * (0.5 + 0.5 * depth)).astype(np.float32)
+        self.star_freq = nprng.uniform(0.3, 1.6, stars).astype(np.float32)
+        self.star_phase = nprng.uniform(0, 2 * math.pi, stars).astype(np.float32)
+        tints = np.stack([np.full(3, 255.0), self.gold * 0.6 + 102, self.teal * 0.5 + 127]).astype(np.float32)
+        self.star_tint = tints[nprng.choice(3, size=stars, p=[0.7, 0.18, 0.12])]
+        off = np.arange(-2, 3, dtype=np.float32)
+        self.splat_dy, self.splat_dx = (a.ravel() for a in np.meshgrid(off, off, indexing="ij"))
+
+        # Constellations and glyph: sparse pixels with a reveal time each
+        layers = [self._constellations(rng, constellations)]
+        glyph = glyph if glyph is not None else sun_sign_glyph()
+        if glyph:
+            layers.append(self._glyph(glyph))
+        layers = [layer for layer in layers if layer is not None]
+        if layers:
+            self.sparse = {key: np.concatenate([layer[key] for layer in layers]) for key in layers[0]}
+        else:
+            self.sparse = None
+
+    # -- precomputed overlays --------------------------------------------------
+    def _sparse_layer(self, mask, reveal, color, fade=0.4):
+        ys, xs = np.nonzero(mask > 3)
+        return {
+            "index": (ys * self.width + xs).astype(np.int64),
+            "alpha": (mask[ys, xs] / 255.0).astype(np.float32),
+            "reveal": reveal[ys, xs].astype(np.float32),
+            "fade": np.full(len(ys), fade, dtype=np.float32),
+            "color": np.broadcast_to(color, (len(ys), 3)).astype(np.float32),
+        }
+
+    def _constellations(self, rng, count):
+        from PIL import Image, ImageDraw, ImageFilter
+        if not count:
+            return None
+        mask = Image.new("L", (self.width, self.height))
+        reveal = np.full((self.height, self.width), np.inf, dtype=np.float32)
+        draw = ImageDraw.Draw(mask)
+        nodes = []
+        start, per_segment = 0.6, min(0.9, self.duration * 0.6 / (count * 5))
+        for k in range(count):
+            cx = rng.uniform(0.15, 0.85) * self.width
+            cy = (k + 0.5) / count * self.height * 0.9 + rng.uniform(-60, 60)
+            begin = start
+            points = [(cx, cy)]
+            for _ in range(rng.randint(4, 6)):
+                angle = rng.uniform(0, 2 * math.pi)
+                step = rng.uniform(70, 170)
+                x = min(self.width - 30, max(30, points[-1][0] + math.cos(angle) * step))
+                y = min(self.height - 30, max(30, points[-1][1] + math.sin(angle) * step))
+                points.append((x, y))
+            for (x0, y0), (x1, y1) in zip(points, points[1:]):
+                seg = Image.new("L", mask.size)
+                ImageDraw.Draw(seg).line((x0, y0, x1, y1), fill=170, width=2)
+                left, top = int(min(x0, x1)) - 3, int(min(y0, y1)) - 3
+                right, bottom = int(max(x0, x1)) + 4, int(max(y0, y1)) + 4
+                box = np.asarray(seg.crop((left, top, right, bottom)), dtype=np.uint8)
+                yy, xx = np.nonzero(box)
+                length = max(1.0, math.hypot(x1 - x0, y1 - y0))
+                along = ((xx + left - x0) * (x1 - x0) + (yy + top - y0) * (y1 - y0)) / length ** 2
+                times = start + np.clip(along, 0, 1) * per_segment
+                reveal[yy + top, xx + left] = np.minimum(reveal[yy + top, xx + left], times)
+                mask.paste(seg, (0, 0), seg)
+                start += per_segment
+            nodes += [(x, y, begin + i * per_segment) for i, (x, y) in enumerate(points)]
+        for x, y, when in nodes:  # a star lights up as its line arrives
+            draw.ellipse((x - 5, y - 5, x + 5, y + 5), fill=255)
+            rows, cols = slice(max(0, int(y) - 6), int(y) + 7), slice(max(0, int(x) - 6), int(x) + 7)
+            reveal[rows, cols] = np.minimum(reveal[rows, cols], when)
+        glow = mask.filter(ImageFilter.GaussianBlur(3))
+        combined = np.maximum(np.asarray(mask), np.asarray(glow).astype(np.uint16) * 2).clip(0, 255).astype(np.uint8)
+        # the blur spreads beyond the drawn pixels: give the halo the reveal time of its nearest line pixel
+        reveal = _spread_min(reveal, 6)
+        return self._sparse_layer(combined, reveal, self.gold * 0.55 + 115)
+
+    def _glyph(self, glyph):
+        from PIL import Image, ImageDraw, ImageFilter, ImageFont
+        path = next((p for p in GLYPH_FONTS if os.path.exists(p)), None)
+        if path is None:
+            return None
+        size = int(self.width * 0.42)
+        font = ImageFont.truetype(path, size)
+        mask = Image.new("L", (self.width, self.height))
+        cx, cy = self.width / 2, self.height * 0.36
+        ImageDraw.Draw(mask).text((cx, cy), glyph, font=font, fill=255, anchor="mm")
+        glow = mask.filter(ImageFilter.GaussianBlur(14))
+        combined = np.maximum(np.asarray(mask), (np.asarray(glow).astype(np.uint16) * 3 // 2).clip(0, 255).astype(np.uint8))
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        sweep = (np.arctan2(xs - cx, -(ys - cy)) % (2 * math.pi)) / (2 * math.pi)  # clockwise from 12 o'clock
+        start = min(1.5, self.duration * 0.15)
+        reveal = start + sweep * min(2.5, self.duration * 0.35)
+        return self._sparse_layer(combined, reveal, self.gold, fade=0.6)
+
+    # -- per frame -------------------------------------------------------------
+    def _nebula(self, t):
+        from PIL import Image
+        fx, fy = self.flow
+        density = _fbm(self.gx + fx * t * 3, self.gy + fy * t * 3, self.table)
+        wisps = _fbm(self.gx * 0.7 - fy * t * 2 + 40.0, self.gy * 0.7 + fx * t * 2 + 9.0, self.table[2:], octaves=4)
+        d = np.clip((density - 0.32) * 2.1, 0.0, 1.0)[..., None]
+        w = np.clip((wisps - 0.45) * 2.5, 0.0, 1.0)[..., None]
+        color = (np.array([6, 4, 16], dtype=np.float32) * (1 - d) + self.deep * 2.1 * d
+                 + self.teal * (0.55 * w * d) + self.gold * (np.clip(d - 0.75, 0, 1) * 1.2))
+        small = np.clip(color * self.vignette, 0, 255).astype(np.uint8)
+        return np.asarray(Image.fromarray(small).resize((self.width, self.height), self._resample))
+
+    def _stars(self, out, t):
+        flat = out.reshape(-1, 3)
+        y = (self.star_y - self.star_v * t) % self.height
+        x = self.star_x
+        twinkle = self.star_level * (0.7 + 0.3 * np.sin(self.star_freq * 2 * math.pi * t + self.star_phase))
+        px = np.floor(x)[:, None] + self.splat_dx[None]
+        py = np.floor(y)[:, None] + self.splat_dy[None]
+        dist2 = (px - x[:, None]) ** 2 + (py - y[:, None]) ** 2
+        weight = twinkle[:, None] * np.exp(-dist2 / (2 * self.star_sigma[:, None] ** 2))
+        inside = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height) & (weight > 0.01)
+        index = (py[inside] * self.width + px[inside]).astype(np.int64)
+        add = weight[inside][:, None] * np.repeat(self.star_tint, inside.sum(axis=1), axis=0)
+        flat[index] = np.minimum(255, flat[index] + add).astype(np.uint8)
+
+    def _overlays(self, out, t):
+        s = self.sparse
+        if s is None:
+            return
+        alpha = s["alpha"] * np.clip((t - s["reveal"]) / s["fade"], 0, 1)
+        alpha *= 0.85 + 0.15 * math.sin(t * 2.1)
+        shown = alpha > 0.004
+        if not shown.any():
+            return
+        flat = out.reshape(-1, 3)
+        index = s["index"][shown]
+        a = alpha[shown][:, None]
+        base = flat[index].astype(np.float32)
+        flat[index] = np.minimum(255, base + (s["color"][shown] - base * 0.5) * a).astype(np.uint8)
+
+    def frame(self, index):
+        t = index / self.fps
+        out = np.array(self._nebula(t))
+        self._overlays(out, t)
+        self._stars(out, t)
+        return out
+
+    def __iter__(self):
+        for index in range(self.frames):
+            yield self.frame(index)
+
+
+def _spread_min(values, radius):
+    """Min-filter a float array by `radius` pixels (separable, via shifted minimums)."""
+    out = values.copy()
+    for axis in (0, 1):
+        src = out.copy()
+        for shift in range(1, radius + 1):
+            for sign in (1, -1):
+                rolled = np.roll(src, sign * shift, axis=axis)
+                np.minimum(out, rolled, out=out)
+    return out
+
+
+def cosmic_reel(duration=10.0, size=(1080, 1920), fps=24, palette=PALETTE, seed=0, glyph=None, workers=None,
+                preset="ultrafast", crf=18):
+    """Render the cosmic animation and return MP4 bytes (chunks on `workers` processes)."""
+    from reel_render import render_parallel
+    kwargs = {"duration": duration, "size": size, "fps": fps, "palette": tuple(palette), "seed": seed,
+              "glyph": glyph if glyph is not None else sun_sign_glyph()}
+    return render_parallel(CosmicEngine, kwargs, max(1, int(round(duration * fps))), size, fps,
+                           workers=workers, preset=preset, crf=crf)
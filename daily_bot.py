@@ -1,23 +1,19 @@
 import os
 import time
-import requests
-import google.generativeai as genai
 import random
 import urllib.parse
 import json
 import argparse
+import atexit
 from dotenv import load_dotenv
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
-from email.mime.base import MIMEBase
-from email import encoders
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
 from io import BytesIO
 import tempfile
-import numpy as np
-import asyncio
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Heavy dependencies (google.generativeai, requests, PIL, smtplib/email, asyncio) are imported
+# inside the functions that use them, so `--dry-run --mock` and helper-only imports stay fast.
+# Check with: python scripts/import_profile.py
 
 # Load secrets from .env file if present (Local dev)
 load_dotenv()
@@ -32,6 +28,119 @@ FAL_KEY = os.environ.get("FAL_KEY")  # https://fal.ai
 LUMA_API_KEY = os.environ.get("LUMA_API_KEY")  # https://lumalabs.ai
 REPLICATE_API_TOKEN = os.environ.get("REPLICATE_API_TOKEN")  # https://replicate.com
 
+# Service base URLs (override to point the pipeline at the local stand-in services)
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT")  # e.g. http://127.0.0.1:8765
+POLLINATIONS_URL = os.environ.get("POLLINATIONS_URL", "https://image.pollinations.ai")
+_FAL_LIVE_QUEUE = "https://queue.fal.run"
+FAL_QUEUE_URL = os.environ.get("FAL_QUEUE_URL", _FAL_LIVE_QUEUE)
+LUMA_API_URL = os.environ.get("LUMA_API_URL", "https://api.lumalabs.ai")
+REPLICATE_API_URL = os.environ.get("REPLICATE_API_URL", "https://api.replicate.com")
+MODELSLAB_API_URL = os.environ.get("MODELSLAB_API_URL", "https://modelslab.com")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") != "0"
+SPLIT_DELIVERY = os.environ.get("SPLIT_DELIVERY", "0") != "0"  # email the image first, the reel as a reply
+
+# Video provider cascade order (comma-separated names, see VIDEO_PROVIDERS below)
+VIDEO_PROVIDER_ORDER = os.environ.get("VIDEO_PROVIDERS", "browser,fal,luma,replicate,huggingface,modelslab,kenburns,cosmic")
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "0"))  # reel render processes (0 = one per CPU)
+REEL_SEGMENTED = os.environ.get("REEL_SEGMENTED", "1") != "0"  # chunked multi-process final render (0 = moviepy)
+REEL_PRESET = os.environ.get("REEL_PRESET", "medium")  # libx264 preset of the final reel
+REEL_CRF = int(os.environ.get("REEL_CRF", "23"))
+REEL_AUTOTUNE = os.environ.get("REEL_AUTOTUNE", "1") != "0"  # preset/CRF from this machine's measured curve (encoder_tune.py)
+ENCODER_TUNE_PATH = os.environ.get("ENCODER_TUNE_PATH", os.path.join("history", "encoder_tune.json"))
+REEL_RENDER_BUDGET = float(os.environ.get("REEL_RENDER_BUDGET", "0"))  # seconds (0 = no slower than REEL_PRESET/REEL_CRF)
+REEL_TARGET_MB = float(os.environ.get("REEL_TARGET_MB", "8"))  # size cap for the reel's video (0 = none)
+ENCODER_TUNE_MIN_BUDGET = float(os.environ.get("ENCODER_TUNE_MIN_BUDGET", "300"))  # seconds of render budget a benchmark may eat into
+JOB_DEADLINE = os.environ.get("JOB_DEADLINE", "")  # unix time the job gets killed; the render budget shrinks to fit
+VIDEO_POLL_INTERVAL = float(os.environ.get("VIDEO_POLL_INTERVAL", "5"))
+VOICEOVER_ENABLED = os.environ.get("VOICEOVER_ENABLED", "1") != "0"
+CAPTIONS_ENABLED = os.environ.get("CAPTIONS_ENABLED", "1") != "0"  # burned-in subtitles synced to the voiceover
+CAPTION_FONT = os.environ.get("CAPTION_FONT")  # .ttf path; defaults to DejaVu Sans Bold / Arial Bold
+AUDIO_MIX = os.environ.get("AUDIO_MIX", "1") != "0"  # ducked ambient bed + loudness normalization (0 = raw voiceover)
+AMBIENT_BED = os.environ.get("AMBIENT_BED", "drone")  # audio file looped under the voice, "drone" (synthesized) or ""
+AMBIENT_BED_LU = float(os.environ.get("AMBIENT_BED_LU", "-18"))  # bed loudness relative to the voice
+AUDIO_DUCK_DB = float(os.environ.get("AUDIO_DUCK_DB", "-10"))  # bed attenuation while the voice speaks
+AUDIO_TARGET_LUFS = float(os.environ.get("AUDIO_TARGET_LUFS", "-14"))  # integrated loudness of the reel audio
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+
+# One structured-output Gemini call for content + video prompt (0 = legacy two free-form calls)
+GEMINI_STRUCTURED = os.environ.get("GEMINI_STRUCTURED", "1") != "0"
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_CONTEXT_CACHE = os.environ.get("GEMINI_CONTEXT_CACHE", "1") != "0"  # explicit cache for long system prompts
+GEMINI_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", "3600"))
+
+# Near-duplicate history of generated prompts/captions (empty PROMPT_INDEX_PATH disables it)
+PROMPT_INDEX_PATH = os.environ.get("PROMPT_INDEX_PATH", os.path.join("history", "prompt_index.sqlite"))
+PROMPT_SIMILARITY_MAX = float(os.environ.get("PROMPT_SIMILARITY_MAX", "0.5"))  # estimated Jaccard
+PROMPT_DEDUP_ATTEMPTS = int(os.environ.get("PROMPT_DEDUP_ATTEMPTS", "3"))
+
+# Perceptual-hash history of downloaded images (empty IMAGE_INDEX_PATH disables duplicate checks)
+IMAGE_INDEX_PATH = os.environ.get("IMAGE_INDEX_PATH", os.path.join("history", "image_index.sqlite"))
+IMAGE_DUP_DISTANCE = int(os.environ.get("IMAGE_DUP_DISTANCE", "6"))  # pHash Hamming bits, max 7
+IMAGE_RESEED_ATTEMPTS = int(os.environ.get("IMAGE_RESEED_ATTEMPTS", "3"))
+IMAGE_CANDIDATES = int(os.environ.get("IMAGE_CANDIDATES", "1"))  # Pollinations seeds per attempt, best one kept
+IMAGE_FETCH_WORKERS = int(os.environ.get("IMAGE_FETCH_WORKERS", "4"))
+IMAGE_MIN_SIDE = int(os.environ.get("IMAGE_MIN_SIDE", "512"))  # smaller downloads are aborted after the header
+
+# Per-run artifact directories for --resume (empty RUNS_DIR disables checkpointing)
+RUNS_DIR = os.environ.get("RUNS_DIR", "runs")
+RUNS_KEEP = int(os.environ.get("RUNS_KEEP", "30"))  # completed runs kept on disk
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", "0"))  # RSS above which big artifacts are spooled to disk (0 = off)
+MEMORY_REPORT = os.environ.get("MEMORY_REPORT", "0") != "0"  # per-stage tracemalloc + RSS peaks
+PROFILE_STAGES = os.environ.get("PROFILE_STAGES", "0") != "0"  # per-stage stack sampling + flamegraphs
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+CONTENT_API_HOST = os.environ.get("CONTENT_API_HOST", "127.0.0.1")  # --serve: content API for the iOS app
+CONTENT_API_PORT = int(os.environ.get("CONTENT_API_PORT", "8787"))
+CONTENT_API_TOKEN = os.environ.get("CONTENT_API_TOKEN")  # required bearer token when set
+RATE_LIMITS = os.environ.get("RATE_LIMITS", "")  # JSON merged over DEFAULT_RATE_LIMITS, or "off"
+QUOTA_LEDGER_PATH = os.environ.get("QUOTA_LEDGER_PATH", os.path.join("history", "quota.sqlite"))  # empty: no ledger
+QUOTA_TZ = os.environ.get("QUOTA_TZ", "America/Los_Angeles")  # daily quotas reset at midnight here
+WORKSPACE_DIR = os.environ.get("WORKSPACE_DIR", "")  # scratch root for temp media (empty = /dev/shm, else $TMPDIR)
+WORKSPACE_MIN_FREE_MB = int(os.environ.get("WORKSPACE_MIN_FREE_MB", "512"))  # free space a root needs to be used
+
+# Brand family used when no tenant config is given
+BRAND_VARIATIONS = ["Astro Boli", "AstroBoli AI", "Astro AI", "AstroBoli", "Astro Boli AI"]
+
+# Settings for one branded feed; entries in a --tenants file override these per tenant
+DEFAULT_TENANT = {
+    "name": "astroboli",
+    "title": "Astroboli",             # shown in the email subject and heading
+    "brands": BRAND_VARIATIONS,       # one is picked at random per post
+    "recipient": None,                # defaults to YOUR_EMAIL
+    "website": "astroboli.com",
+    "required_hashtag": "#AstroboliAI",
+    "prompt_overrides": {},           # extra_instructions, video_prompt
+    "image_model": "flux",
+    "video_providers": None,          # defaults to VIDEO_PROVIDERS env order
+}
+
+# Client-side limits per provider (rate_limit.py): sustained calls/minute, back-to-back burst, calls/day.
+# "media" (result downloads from CDNs) is only counted.
+DEFAULT_RATE_LIMITS = {
+    "gemini": {"per_minute": 10, "burst": 5, "daily": 1500},   # free tier
+    "pollinations": {"per_minute": 12, "burst": 4},
+    "huggingface": {"per_minute": 6, "burst": 2},
+    "fal": {"per_minute": 60, "burst": 10},
+    "luma": {"per_minute": 30, "burst": 5},
+    "replicate": {"per_minute": 60, "burst": 10},
+    "modelslab": {"per_minute": 20, "burst": 3},
+}
+
+_http_lock = threading.Lock()
+_http_session = None
+_limiter_obj = None
+_gemini_lock = threading.Lock()
+_gemini_client = None
+_smtp_lock = threading.Lock()
+_smtp_conn = None
+_memory = None  # mem_budget.MemoryMonitor while a budget or the memory report is enabled
+_profiler = None  # stage_profile.StageProfiler while --profile is on
+_history_lock = threading.Lock()
+_prompt_index_obj = None
+_image_index_obj = None
+_warm_browser = None  # {"thread", "browser", "playwright"} while a daemon keeps Chromium resident
+
 def _extract_json_from_text(text: str) -> dict | None:
     """Attempt to extract and parse a JSON object from free-form text.
     This handles cases where the model wraps JSON in markdown code fences (```json ... ```)
@@ -78,27 +187,275 @@ def _clean_image_prompt(p: str) -> str:
     return p[:2000]
 
 
-def generate_astro_content():
-    """Generates a prompt and caption using Gemini."""
-    print("✨ Connecting to Gemini...")
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
+def _gemini():
+    """Return the GeminiClient shared by every caller (and tenant) in this process (see gemini_client.py)."""
+    global _gemini_client
+    with _gemini_lock:
+        if _gemini_client is None:
+            from gemini_client import GeminiClient
+            _gemini_client = GeminiClient(GEMINI_API_KEY, endpoint=GEMINI_API_ENDPOINT, model=GEMINI_MODEL,
+                                          cache_ttl=GEMINI_CACHE_TTL, explicit_cache=GEMINI_CONTEXT_CACHE,
+                                          limiter=_limiter())
+        return _gemini_client
+
+
+def _print_gemini_usage():
+    """One line with this process's total Gemini token use, if Gemini was called at all."""
+    if _gemini_client is not None and _gemini_client.usage:
+        t = _gemini_client.totals()
+        print(f"🧮 Gemini total: {t['calls']} calls, {t['prompt']} prompt tokens ({t['cached']} cached), "
+              f"{t['output']} output tokens, {t['seconds']:.1f}s")
+
+
+def _print_quota_usage():
+    """One line with today's calls per provider from the quota ledger."""
+    if _limiter_obj is not None and _limiter_obj.ledger is not None:
+        usage = _limiter_obj.usage()
+        if usage:
+            limits = _limiter_obj.limits
+            print("📊 Calls today: " + ", ".join(
+                f"{name} {calls}" + (f"/{limits[name].daily}" if name in limits and limits[name].daily else "")
+                for name, calls in usage.items()))
+
+
+def _limiter():
+    """Shared RateLimiter: token buckets per provider and the daily quota ledger (see rate_limit.py)."""
+    global _limiter_obj
+    with _http_lock:
+        if _limiter_obj is None:
+            from rate_limit import QuotaLedger, RateLimiter, parse_limits
+            ledger = QuotaLedger(QUOTA_LEDGER_PATH, tz=QUOTA_TZ) if QUOTA_LEDGER_PATH else None
+            _limiter_obj = RateLimiter(parse_limits(RATE_LIMITS, DEFAULT_RATE_LIMITS), ledger)
+        return _limiter_obj
+
+
+def _http(provider=None):
+    """Shared requests session so concurrent runs reuse pooled keep-alive connections.
+
+    With a provider name, requests go through that provider's rate limit and daily quota.
+    """
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            import requests
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+    return _limiter().session(_http_session, provider) if provider else _http_session
+
+
+# Words every image prompt repeats (quality boosters, format rules); ignored when comparing prompts
+_PROMPT_BOILERPLATE = """
+masterpiece best quality ultra high resolution 8k uhd hdr professional photography award winning trending
+on artstation hyperdetailed photorealistic lighting cinematic color grading octane render unreal engine 5
+ray tracing subsurface scattering square format aspect ratio 1 1080x1080 no text watermarks logos clean
+composition centered subject instagram optimized visit for your reading
+""".split()
+
+
+def _prompt_index():
+    """Shared near-duplicate index (see prompt_index.py), or None when PROMPT_INDEX_PATH is empty."""
+    global _prompt_index_obj
+    if not PROMPT_INDEX_PATH:
+        return None
+    with _history_lock:
+        if _prompt_index_obj is None:
+            from prompt_index import PromptIndex
+            _prompt_index_obj = PromptIndex(PROMPT_INDEX_PATH, ignore=_PROMPT_BOILERPLATE)
+        return _prompt_index_obj
+
+
+def _image_index():
+    """Shared perceptual-hash index (see image_index.py), or None when IMAGE_INDEX_PATH is empty."""
+    global _image_index_obj
+    if not IMAGE_INDEX_PATH:
+        return None
+    with _history_lock:
+        if _image_index_obj is None:
+            from image_index import ImageIndex
+            _image_index_obj = ImageIndex(IMAGE_INDEX_PATH)
+        return _image_index_obj
+
+
+def _tenant_settings(tenant=None):
+    """Merge a tenant entry over DEFAULT_TENANT."""
+    settings = dict(DEFAULT_TENANT)
+    settings.update(tenant or {})
+    settings["prompt_overrides"] = dict(settings.get("prompt_overrides") or {})
+    return settings
+
+
+def _checkpoint_bytes(run, stage, filename, produce, **info):
+    """Return the stage's artifact from the run directory if intact, else produce() and store it."""
+    if run is not None and run.has(stage):
+        print(f"♻️ {stage}: reusing {filename} from run {run.run_id}")
+        return run.read_bytes(stage)
+    data = produce()
+    if run is not None and data is not None:
+        run.save_bytes(stage, filename, data, **info)
+    return data
+
+
+@contextmanager
+def _timed_stage(timings, name):
+    """Record the wall-clock duration (and, when monitored, the memory peaks) of a pipeline stage."""
+    start = time.perf_counter()
+    with _memory.stage(name) if _memory is not None else nullcontext(), \
+            _profiler.stage(name, owner=id(timings)) if _profiler is not None else nullcontext():
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - start
+
+
+def _start_memory_monitor(trace=False):
+    """Enable per-stage memory peaks and the MEMORY_BUDGET_MB spooling policy (mem_budget.py)."""
+    global _memory
+    if _memory is None:
+        from mem_budget import MemoryMonitor
+        _memory = MemoryMonitor(budget=MEMORY_BUDGET_MB << 20, trace=trace).start()
+    return _memory
+
+
+def _keep(data, name):
+    """Hold a large artifact in memory, or in a spooled temp file once the process is over budget."""
+    return _memory.keep(data, name) if _memory is not None else data
+
+
+def _report_memory(run=None):
+    if _memory is None or not _memory.stages:
+        return
+    print("🧠 Memory per stage: " + _memory.summary())
+    if run is not None:
+        with open(run.file('memory.json'), 'w', encoding='utf-8') as f:
+            json.dump(_memory.report(), f, indent=2)
+
+
+@contextmanager
+def _scratch_workspace(label):
+    """Scratch directory for temp media (workspace.py): the one already active on this thread, or a
+    new one, on tmpfs when it has WORKSPACE_MIN_FREE_MB free, removed when the block exits."""
+    from workspace import Workspace, current
+    if current() is not None:
+        yield current()
+        return
+    ws = Workspace(label, WORKSPACE_MIN_FREE_MB << 20, [WORKSPACE_DIR] if WORKSPACE_DIR else None)
+    print(f"🗂️ Workspace: {ws.directory} ({'tmpfs' if ws.tmpfs else 'disk'})")
+    with ws:
+        try:
+            yield ws
+        finally:
+            ws.measure()
+            print(f"🧹 Workspace removed (peak {ws.peak_bytes / 1e6:.1f} MB)")
+
+
+def _start_profiler():
+    """Sample the stack of each stage every PROFILE_INTERVAL_MS (stage_profile.py)."""
+    global _profiler
+    if _profiler is None:
+        from stage_profile import StageProfiler
+        _profiler = StageProfiler(interval=PROFILE_INTERVAL_MS / 1000).start()
+    return _profiler
+
+
+def _report_profile(run=None, timings=None):
+    """Print the top self-time functions per stage; collapsed stacks + flamegraphs go to <run>/profile/.
+
+    Only this run's samples are reported (stages are filed under their run's `timings`), so
+    concurrent tenants each get their own profile.
+    """
+    if _profiler is None:
+        return
+    profile = _profiler.take(id(timings))
+    if not profile.samples:
+        return
+    print("🔥 Top self time per stage:")
+    for line in profile.summary().splitlines():
+        print(f"    {line}")
+    if run is not None:
+        paths = profile.write(run.file('profile'))
+        print(f"🔥 Flamegraphs: {', '.join(os.path.basename(p) for p in paths if p.endswith('.html'))} "
+              f"in {run.file('profile')}")
+
+
+def _normalize_hashtags(hashtags_list, required='#AstroboliAI') -> list:
+    """Normalize model hashtags into exactly 5 tags, with the required brand tag always present."""
+    if isinstance(hashtags_list, str):
+        hashtags_list = [h.strip() for h in hashtags_list.replace(',', ' ').split() if h.strip()]
+    normalized = []
+    for h in hashtags_list:
+        h = h.strip()
+        if not h:
+            continue
+        if not h.startswith('#'):
+            h = f"#{h}"
+        normalized.append(h)
+    # Take top 5. If fewer than 5, pad with related tags; ensure #AstroboliAI is present.
+    top5 = normalized[:5]
+    if required.lower() in [t.lower() for t in top5]:
+        pass
+    else:
+        top5 = [required] + [t for t in top5 if t.lower() != required.lower()]
+        top5 = top5[:5]
+    defaults = ['#astrology', '#numerology', '#horoscope', '#zodiac']
+    i = 0
+    while len(top5) < 5 and i < len(defaults):
+        cand = defaults[i]
+        if cand not in top5:
+            top5.append(cand)
+        i += 1
+    return top5
+
+
+def generate_astro_content(tenant=None, brand_name=None):
+    """Generates a prompt and caption using Gemini.
 
+    Each result is checked against the posting history (prompt_index.py). If its image
+    prompt or caption is a near-duplicate of an earlier post, Gemini is asked again and
+    told to steer away from that post. After PROMPT_DEDUP_ATTEMPTS the least similar
+    candidate is used.
+    """
+    settings = _tenant_settings(tenant)
     # Randomize branding for variety
-    brand_variations = [
-        "Astro Boli",
-        "AstroBoli AI", 
-        "Astro AI",
-        "AstroBoli",
-        "Astro Boli AI"
-    ]
-    brand_name = random.choice(brand_variations)
-    brand_hashtag = brand_name.replace(" ", "")  # Remove spaces for hashtag
+    brand_name = brand_name or random.choice(settings["brands"])
+    index = _prompt_index()
+    if index is None:
+        return _generate_astro_content_once(settings, brand_name)
 
-    prompt = f"""
-    You are '{brand_name}' — a world-class digital artist and mystic astrologer creating MUSEUM-QUALITY cosmic art for astroboli.com.
+    scope = settings["name"]
+    best = None
+    avoid = None
+    for attempt in range(1, max(1, PROMPT_DEDUP_ATTEMPTS) + 1):
+        image_prompt, caption, meta = _generate_astro_content_once(settings, brand_name, avoid)
+        started = time.perf_counter()
+        prompt_sim, prompt_match = index.best_match(image_prompt, "prompt", scope)
+        caption_sim, caption_match = index.best_match(caption, "caption", scope)
+        lookup_ms = (time.perf_counter() - started) * 1000
+        similarity = max(prompt_sim, caption_sim)
+        if best is None or similarity < best[0]:
+            best = (similarity, image_prompt, caption, meta)
+        if similarity < PROMPT_SIMILARITY_MAX:
+            print(f"🧭 History check: max similarity {similarity:.2f} ({lookup_ms:.2f} ms)")
+            break
+        print(f"🔁 Attempt {attempt}: {similarity:.2f} similar to an earlier post; regenerating")
+        avoid = prompt_match if prompt_sim >= caption_sim else caption_match
+    else:
+        print(f"⚠️ Still {best[0]:.2f} similar after {attempt} attempts; using the most distinct one")
 
-    Generate a JSON object for today's horoscope with these keys:
+    _, image_prompt, caption, meta = best
+    index.add(image_prompt, "prompt", scope)
+    index.add(caption, "caption", scope)
+    return image_prompt, caption, meta
+
+
+# Static rules for post content. They are sent as the system instruction so Gemini can cache them
+# (see gemini_client.py); only _astro_request() changes between calls.
+_ASTRO_SYSTEM_INSTRUCTION = """
+    You are the brand named in the request — a world-class digital artist and mystic astrologer creating MUSEUM-QUALITY cosmic art for the brand's website.
+
+    For every request, generate a JSON object for today's horoscope with these keys:
 
     - "image_prompt": Create a MASTERPIECE-LEVEL prompt for Flux AI image generator. This must rival professional art. Include ALL of these elements:
     
@@ -148,79 +505,130 @@ def generate_astro_content():
       **AVOID:** blurry, low quality, text, watermarks, signatures, deformed, ugly, amateur, oversaturated, muddy colors
 
     - "caption": Engaging Instagram caption (≤280 chars):
-      * Weave {brand_name} naturally into mystical insight
+      * Weave the brand name naturally into mystical insight
       * Include actionable cosmic guidance for today
-      * End with "✨ Visit astroboli.com for your reading"
+      * End with "✨ Visit <website> for your reading"
       * Use 2-3 emojis: 🌙 ✨ 🔮 ⭐ 🌟 💫 ♈♉♊♋♌♍♎♏♐♑♒♓
       
     - "hashtags": Array of exactly 5 hashtags:
-      * First: #{brand_hashtag}
+      * First: the brand hashtag given in the request
       * Include mix of: #Astrology #CosmicEnergy #ZodiacSigns #Spirituality #Universe #Manifestation #DailyHoroscope #MysticArt
       
     - "alt_text": Vivid 1-2 sentence description for accessibility.
 
+    - "video_prompt" (only when the request asks for it): 1-2 sentences describing a cinematic, dreamy
+      10-15 second vertical Instagram Reel scene that matches today's image, in the requested video theme
+      (galaxies, stars, nebulas, zodiac symbols, cosmic particles; deep purples, gold, aurora colors), ending with
+      "FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds, 1080x1920 resolution."
+
+    Follow any extra instructions in the request.
+
     Return ONLY valid JSON. No markdown, no explanation.
 
-    Example:
-    {{
+    Example for brand "AstroBoli AI" and website astroboli.com:
+    {
       "image_prompt": "Ethereal cosmic queen emerging from a luminous nebula, flowing hair made of stardust and aurora colors, sacred geometry halo behind her head, bioluminescent crystal crown, volumetric god rays piercing purple cosmic clouds, floating zodiac symbols around her, art by Peter Mohrbacher and Alphonse Mucha, deep purple and gold color palette, mystical and powerful mood, hyperdetailed, 8K UHD, masterpiece, best quality, trending on ArtStation, cinematic lighting, octane render, square format 1:1, no text, no watermarks",
-      "caption": "The cosmos crowns you with infinite potential today. {brand_name} channels pure celestial energy for your transformation. ✨ Visit astroboli.com for your reading 🌙👑",
-      "hashtags": ["#{brand_hashtag}", "#Astrology", "#CosmicEnergy", "#Spirituality", "#ZodiacSigns"],
+      "caption": "The cosmos crowns you with infinite potential today. AstroBoli AI channels pure celestial energy for your transformation. ✨ Visit astroboli.com for your reading 🌙👑",
+      "hashtags": ["#AstroBoliAI", "#Astrology", "#CosmicEnergy", "#Spirituality", "#ZodiacSigns"],
       "alt_text": "A majestic cosmic queen with stardust hair emerging from purple nebula clouds, wearing a glowing crystal crown."
-    }}
-    """
+    }
+"""
 
-    response = model.generate_content(prompt)
-    text = response.text
+
+def _astro_request(settings, brand_name, avoid=None, with_video=False):
+    """Per-call part of the content prompt; with_video also asks for the reel's video prompt (structured mode)."""
+    website = settings["website"]
+    brand_hashtag = brand_name.replace(" ", "")  # Remove spaces for hashtag
+    lines = [f"Brand: {brand_name}", f"Website: {website}", f"Brand hashtag: #{brand_hashtag}"]
+    extra_instructions = settings["prompt_overrides"].get("extra_instructions", "")
+    if extra_instructions:
+        lines.append(f"Extra instructions: {extra_instructions}")
+    if avoid:
+        lines.append("This must clearly differ from an earlier post. Use a different art style, "
+                     f"subject and wording than: \"{avoid[:400]}\"")
+    if with_video:
+        theme = settings["prompt_overrides"].get("video_theme", "Astrology, zodiac, cosmic energy, mystical, ethereal")
+        lines.append(f"Include video_prompt. Video theme: {theme}")
+    return "\n".join(lines)
+
+
+def _finish_content(data, settings):
+    """Normalize a parsed content object into (image_prompt, full_caption, meta)."""
+    website = settings["website"]
+    site_keyword = website.split('.')[0].lower()
+    image_prompt = data.get("image_prompt") or data.get("IMAGE_PROMPT") or ""
+    caption_part = data.get("caption") or data.get("CAPTION") or ""
+    hashtags_list = data.get("hashtags") or data.get("HASHTAGS") or []
+    top5 = _normalize_hashtags(hashtags_list, settings["required_hashtag"])
+    hashtags_str = " ".join(top5)
+    # Clean image prompt from CTA / code fences
+    image_prompt = _clean_image_prompt(image_prompt)
+    # Ensure brand CTA in caption
+    if site_keyword not in caption_part.lower():
+        caption_part = f"{caption_part.strip()} — Visit https://{website}"
+    full_caption = f"{caption_part}\n\n{hashtags_str}".strip()
+    meta = {'hashtags': top5}
+    if data.get("alt_text"):
+        meta['alt_text'] = data["alt_text"].strip()
+    return image_prompt, full_caption, meta
+
+
+# Response schema for the single structured-output call (GEMINI_STRUCTURED=1)
+_POST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "image_prompt": {"type": "string"},
+        "caption": {"type": "string"},
+        "hashtags": {"type": "array", "items": {"type": "string"}},
+        "alt_text": {"type": "string"},
+        "video_prompt": {"type": "string"},
+    },
+    "required": ["image_prompt", "caption", "hashtags", "alt_text", "video_prompt"],
+}
+
+
+def _generate_post_content(settings, brand_name, avoid=None):
+    """One structured-output Gemini call returning post content plus the reel's video prompt in meta."""
+    print("✨ Connecting to Gemini (structured output)...")
+    text = _gemini().generate(_astro_request(settings, brand_name, avoid, with_video=True),
+                              system=_ASTRO_SYSTEM_INSTRUCTION, schema=_POST_SCHEMA, label="content")
+    data = json.loads(text)
+    image_prompt, caption, meta = _finish_content(data, settings)
+    meta['video_prompt'] = _ensure_reel_format(data["video_prompt"].strip())
+    return image_prompt, caption, meta
+
+
+def _generate_astro_content_once(settings, brand_name, avoid=None):
+    """One Gemini call for (image_prompt, caption, meta); `avoid` is earlier text to steer away from."""
+    if GEMINI_STRUCTURED:
+        try:
+            return _generate_post_content(settings, brand_name, avoid)
+        except Exception as e:
+            print(f"⚠️ Structured generation failed ({e}); falling back to free-form prompts")
+
+    print("✨ Connecting to Gemini...")
+    website = settings["website"]
+    site_keyword = website.split('.')[0].lower()
+    required_tag = settings["required_hashtag"]
+
+    text = _gemini().generate(_astro_request(settings, brand_name, avoid),
+                              system=_ASTRO_SYSTEM_INSTRUCTION, label="content")
 
     # Prefer JSON output from the model; fall back to original heuristics if needed
     try:
         data = _extract_json_from_text(text) or {}
         if not data:
             raise ValueError("No JSON found in model output")
-        image_prompt = data.get("image_prompt") or data.get("IMAGE_PROMPT") or ""
-        caption_part = data.get("caption") or data.get("CAPTION") or ""
-        hashtags_list = data.get("hashtags") or data.get("HASHTAGS") or []
-        # Normalize hashtags
-        if isinstance(hashtags_list, str):
-            hashtags_list = [h.strip() for h in hashtags_list.replace(',', ' ').split() if h.strip()]
-        normalized = []
-        for h in hashtags_list:
-            h = h.strip()
-            if not h:
-                continue
-            if not h.startswith('#'):
-                h = f"#{h}"
-            normalized.append(h)
-        # Take top 5. If fewer than 5, pad with related tags; ensure #AstroboliAI is present.
-        top5 = normalized[:5]
-        if '#astroboliai' in [t.lower() for t in top5]:
-            pass
-        else:
-            top5 = ['#AstroboliAI'] + [t for t in top5 if t.lower() != '#astroboliai']
-            top5 = top5[:5]
-        defaults = ['#astrology', '#numerology', '#horoscope', '#zodiac']
-        i = 0
-        while len(top5) < 5 and i < len(defaults):
-            cand = defaults[i]
-            if cand not in top5:
-                top5.append(cand)
-            i += 1
-        hashtags_str = " ".join(top5)
-        # Clean image prompt from CTA / code fences
-        image_prompt = _clean_image_prompt(image_prompt)
-        # Ensure brand CTA in caption
-        if "astroboli" not in caption_part.lower():
-            caption_part = f"{caption_part.strip()} — Visit https://astroboli.com"
-        full_caption = f"{caption_part}\n\n{hashtags_str}".strip()
-        return image_prompt, full_caption, {'hashtags': top5}
+        return _finish_content(data, settings)
     except Exception:
         # Fallback to older parsing for non-JSON responses
         try:
-            # Try to extract a possible JSON inside text even if not pure JSON
+            # JSON that is not a plain object, e.g. the post wrapped in a one-element array
             data = _extract_json_from_text(text)
-            if data:
-                return generate_astro_content_from_data(data)
+            if isinstance(data, list):
+                data = next((d for d in data if isinstance(d, dict)), None)
+            if isinstance(data, dict) and data:
+                return _finish_content(data, settings)
             image_prompt = text.split("IMAGE_PROMPT:")[1].split("CAPTION:")[0].strip()
             caption_part = text.split("CAPTION:")[1].split("HASHTAGS:")[0].strip()
             hashtags = text.split("HASHTAGS:")[1].strip()
@@ -232,8 +640,8 @@ def generate_astro_content():
                     h = f"#{h}"
                 normalized.append(h)
             top5 = normalized[:5]
-            if '#AstroboliAI' not in [t for t in top5]:
-                top5 = ['#AstroboliAI'] + [t for t in top5 if t.lower() != '#astroboliai']
+            if required_tag not in [t for t in top5]:
+                top5 = [required_tag] + [t for t in top5 if t.lower() != required_tag.lower()]
                 top5 = top5[:5]
             defaults = ['#astrology', '#numerology', '#horoscope', '#zodiac']
             i = 0
@@ -243,8 +651,8 @@ def generate_astro_content():
                     top5.append(cand)
                 i += 1
             # Ensure brand CTA
-            if "astroboli" not in caption_part.lower():
-                caption_part = f"{caption_part}\n\nVisit https://astroboli.com"
+            if site_keyword not in caption_part.lower():
+                caption_part = f"{caption_part}\n\nVisit https://{website}"
             full_caption = f"{caption_part}\n\n{' '.join(top5)}"
             image_prompt = _clean_image_prompt(image_prompt)
             return image_prompt, full_caption, top5
@@ -253,47 +661,51 @@ def generate_astro_content():
             raw = text.strip()
             # Make a brief caption + default hashtag
             short_caption = (raw[:240] + "...") if len(raw) > 240 else raw
-            if "astroboli" not in short_caption.lower():
-                short_caption = f"{short_caption}\n\nVisit https://astroboli.com"
-            defaults = ['#AstroboliAI', '#astrology', '#numerology', '#horoscope', '#zodiac']
+            if site_keyword not in short_caption.lower():
+                short_caption = f"{short_caption}\n\nVisit https://{website}"
+            defaults = [required_tag, '#astrology', '#numerology', '#horoscope', '#zodiac']
             return short_caption[:800], f"{short_caption}\n\n{' '.join(defaults)}", defaults
 
-def generate_video_prompt():
+# Static rules for the standalone video-prompt call (legacy mode); the theme is the per-call part
+_VIDEO_SYSTEM_INSTRUCTION = """
+Generate a creative, mystical, cosmic-themed video prompt for an Instagram Reel.
+
+REQUIREMENTS:
+- Theme: the theme given in the request
+- Style: Cinematic, dreamy, magical, 4K quality
+- Visual elements: galaxies, stars, nebulas, zodiac symbols, cosmic particles
+- Colors: Deep purples, gold, aurora colors, cosmic blues
+- Mood: Peaceful, inspiring, spiritual, transformative
+
+STRICT FORMAT REQUIREMENTS (MUST INCLUDE):
+- Instagram Reels portrait format: 9:16 aspect ratio
+- Resolution: 1080x1920 pixels
+- Duration: 10-15 seconds
+- Vertical video orientation
+
+Return ONLY the video prompt text (1-2 sentences describing the scene), followed by the format requirements.
+Do not include any explanation or markdown formatting.
+
+Example output:
+"A mystical cosmic queen emerges from swirling nebula clouds, her flowing hair made of shimmering stardust, zodiac constellations dancing around her. FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds, 1080x1920 resolution."
+"""
+
+def _ensure_reel_format(video_prompt):
+    """Append the Reels format requirements unless the prompt already states them."""
+    if "9:16" not in video_prompt or "1080x1920" not in video_prompt:
+        video_prompt = f"{video_prompt} FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds duration, 1080x1920 resolution."
+    return video_prompt
+
+def generate_video_prompt(tenant=None):
     """Generate a unique video prompt using Gemini AI for Instagram Reels format."""
     print("🎬 Generating unique video prompt...")
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        prompt = """
-        Generate a creative, mystical, cosmic-themed video prompt for an Instagram Reel.
-        
-        REQUIREMENTS:
-        - Theme: Astrology, zodiac, cosmic energy, mystical, ethereal
-        - Style: Cinematic, dreamy, magical, 4K quality
-        - Visual elements: galaxies, stars, nebulas, zodiac symbols, cosmic particles
-        - Colors: Deep purples, gold, aurora colors, cosmic blues
-        - Mood: Peaceful, inspiring, spiritual, transformative
-        
-        STRICT FORMAT REQUIREMENTS (MUST INCLUDE):
-        - Instagram Reels portrait format: 9:16 aspect ratio
-        - Resolution: 1080x1920 pixels
-        - Duration: 10-15 seconds
-        - Vertical video orientation
+        theme = _tenant_settings(tenant)["prompt_overrides"].get(
+            "video_theme", "Astrology, zodiac, cosmic energy, mystical, ethereal")
+        text = _gemini().generate(f"Theme: {theme}", system=_VIDEO_SYSTEM_INSTRUCTION, label="video_prompt")
+        video_prompt = text.strip()
         
-        Return ONLY the video prompt text (1-2 sentences describing the scene), followed by the format requirements.
-        Do not include any explanation or markdown formatting.
-        
-        Example output:
-        "A mystical cosmic queen emerges from swirling nebula clouds, her flowing hair made of shimmering stardust, zodiac constellations dancing around her. FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds, 1080x1920 resolution."
-        """
-        
-        response = model.generate_content(prompt)
-        video_prompt = response.text.strip()
-        
-        # Ensure format requirements are included
-        if "9:16" not in video_prompt or "1080x1920" not in video_prompt:
-            video_prompt = f"{video_prompt} FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds duration, 1080x1920 resolution."
+        video_prompt = _ensure_reel_format(video_prompt)
         
         print(f"📝 Video prompt generated: {video_prompt[:80]}...")
         return video_prompt
@@ -304,29 +716,134 @@ def generate_video_prompt():
         return "Mystical cosmic astrology scene with swirling galaxies, glowing zodiac constellations, ethereal purple and gold aurora lights, magical stardust particles floating through space, cinematic dreamy atmosphere. FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds duration, 1080x1920 resolution."
 
 
-def get_image_url(prompt):
+def get_image_url(prompt, model="flux", seed=None):
     """Generates an image URL from Pollinations.ai."""
     print(f"Generating image for: {prompt[:50]}...")
     encoded_prompt = urllib.parse.quote(prompt)
-    seed = random.randint(1, 1000000)
-    image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1080&height=1080&seed={seed}&nologo=true&model=flux"
+    seed = seed if seed is not None else random.randint(1, 1000000)
+    image_url = f"{POLLINATIONS_URL}/prompt/{encoded_prompt}?width=1080&height=1080&seed={seed}&nologo=true&model={model}"
     return image_url
 
 def download_image(url):
-    """Download image from URL and return bytes."""
+    """Stream an image from URL and return its bytes, decoded on the fly (see image_stream.py).
+
+    Non-image responses and images smaller than IMAGE_MIN_SIDE are aborted after the first
+    few KB. The returned bytes carry the decoded PIL image as `.image`.
+    """
     print("Downloading image...")
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.content
-    else:
-        raise Exception(f"Failed to download image: {response.status_code}")
+    from image_stream import stream_image
+    response = _http('pollinations').get(url, timeout=120, stream=True)
+    try:
+        if response.status_code != 200:
+            raise Exception(f"Failed to download image: {response.status_code}")
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and not content_type.startswith(("image/", "application/octet-stream")):
+            raise Exception(f"Failed to download image: got {content_type}")
+        return stream_image(response.iter_content(64 * 1024), min_side=IMAGE_MIN_SIDE)
+    finally:
+        response.close()
+
+def _download_candidates(prompt, model, count):
+    """Download `count` differently seeded Pollinations images, IMAGE_FETCH_WORKERS at a time.
+
+    Failed downloads are skipped; raises only if every one fails.
+    """
+    def fetch(_):
+        image_url = get_image_url(prompt, model)
+        print(f"🖼️ Image URL: {image_url}")
+        return download_image(image_url)
+
+    from concurrent.futures import ThreadPoolExecutor
+    images, errors = [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(count, IMAGE_FETCH_WORKERS))) as pool:
+        futures = [pool.submit(fetch, n) for n in range(count)]
+        for future in futures:
+            try:
+                images.append(future.result())
+            except Exception as e:
+                errors.append(e)
+    if not images:
+        raise errors[0]
+    if errors:
+        print(f"⚠️ {len(errors)} of {count} image downloads failed: {errors[0]}")
+    return images
+
+def _pick_best_image(candidates):
+    """Score (image_data, fingerprint) candidates with image_quality.py and return the best one."""
+    from image_quality import score_image
+    scored = []
+    for image_data, fp in candidates:
+        try:
+            scores = score_image(image_data)
+        except Exception as e:
+            print(f"⚠️ Image could not be scored ({e})")
+            continue
+        scored.append((scores["total"], image_data, fp, scores))
+    if not scored:
+        return candidates[0]
+    scored.sort(key=lambda s: s[0], reverse=True)
+    for rank, (total, _, _, scores) in enumerate(scored):
+        parts = ", ".join(f"{k} {v:.2f}" for k, v in scores.items() if k != "total")
+        print(f"{'🏆' if rank == 0 else '  '} Image score {total:.3f} ({parts})")
+    return scored[0][1], scored[0][2]
+
+def download_unique_image(prompt, model="flux", ref=None):
+    """Download a Pollinations image, reseeding while it is blank/flat or a near-duplicate of an earlier one.
+
+    Each attempt fetches IMAGE_CANDIDATES seeds concurrently. Every download is fingerprinted
+    (image_index.py) before any processing; when several usable candidates remain, the best
+    by image_quality.py score is kept. After IMAGE_RESEED_ATTEMPTS extra tries, the most
+    distinct non-degenerate image is used. A failed download counts as a failed attempt; if
+    every candidate is degenerate, or the last attempt fails with nothing usable, this raises.
+    """
+    from image_index import fingerprint
+    index = _image_index()
+    best = None  # (distance or 65, image_data, fingerprint)
+    for attempt in range(max(0, IMAGE_RESEED_ATTEMPTS) + 1):
+        fresh = []
+        try:
+            candidates = _download_candidates(prompt, model, max(1, IMAGE_CANDIDATES))
+        except Exception as e:
+            if attempt == max(0, IMAGE_RESEED_ATTEMPTS) and best is None:
+                raise
+            print(f"⚠️ Image attempt {attempt + 1} failed to download ({e}); reseeding")
+            continue
+        for image_data in candidates:
+            try:
+                fp = fingerprint(image_data)
+            except Exception as e:
+                print(f"⚠️ Downloaded image could not be decoded ({e}); reseeding")
+                continue
+            problem = fp.degenerate()
+            if problem:
+                print(f"⚠️ Image attempt {attempt + 1} is {problem}; reseeding")
+                continue
+            distance, match = index.nearest(fp.phash, IMAGE_DUP_DISTANCE) if index is not None else (None, None)
+            if distance is None:
+                fresh.append((image_data, fp))
+                continue
+            print(f"⚠️ Image attempt {attempt + 1} is {distance} bits from an earlier image {match or ''}; reseeding")
+            if best is None or distance > best[0]:
+                best = (distance, image_data, fp)
+        if fresh:
+            image_data, fp = _pick_best_image(fresh) if len(fresh) > 1 else fresh[0]
+            best = (65, image_data, fp)
+            break
+    if best is None:
+        raise Exception(f"Pollinations returned only blank or undecodable images after {attempt + 1} attempts")
+    if best[0] <= IMAGE_DUP_DISTANCE:
+        print(f"⚠️ Using a near-duplicate image ({best[0]} bits) after {attempt + 1} attempts")
+    if index is not None:
+        index.add(best[2], ref=ref)
+    return best[1]
 
 def process_for_instagram(image_bytes):
     """Process image for Instagram - ensure exact 1:1 ratio (1080x1080), NO text overlay."""
     print("Processing image for Instagram...")
+    from PIL import Image
     
-    # Open image
-    img = Image.open(BytesIO(image_bytes)).convert("RGB")
+    # Open image (streamed downloads arrive already decoded)
+    img = (getattr(image_bytes, "image", None) or Image.open(BytesIO(image_bytes))).convert("RGB")
     original_w, original_h = img.size
     print(f"Original image: {original_w}x{original_h}")
     
@@ -366,8 +883,15 @@ def process_for_instagram(image_bytes):
     
     return output.getvalue()
 
-async def generate_voiceover(text, output_path):
-    """Generate highly natural AI voiceover using edge-tts with best voices."""
+async def generate_voiceover(text, output_path, words=None):
+    """Generate highly natural AI voiceover using edge-tts with best voices.
+
+    If `words` is a list, (start, end, word) timings in seconds are appended to it from
+    the TTS WordBoundary events (used for burned-in captions).
+    """
+    if not VOICEOVER_ENABLED:
+        print("Voiceover disabled (VOICEOVER_ENABLED=0)")
+        return False
     try:
         import edge_tts
         
@@ -386,9 +910,16 @@ async def generate_voiceover(text, output_path):
             text, 
             voice,
             rate="-5%",  # Slightly slower for dramatic effect
-            pitch="+0Hz"  # Natural pitch
+            pitch="+0Hz",  # Natural pitch
+            boundary="WordBoundary"
         )
-        await communicate.save(output_path)
+        with open(output_path, "wb") as audio:
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio.write(chunk["data"])
+                elif chunk["type"] == "WordBoundary" and words is not None:
+                    # offsets and durations are in 100 ns ticks
+                    words.append((chunk["offset"] / 1e7, (chunk["offset"] + chunk["duration"]) / 1e7, chunk["text"]))
         
         print(f"✨ Voiceover generated with {voice}")
         return True
@@ -396,37 +927,40 @@ async def generate_voiceover(text, output_path):
         print(f"Error generating voiceover: {e}")
         return False
 
-def download_ai_video(prompt, duration=8):
+def download_ai_video(prompt, duration=8, provider_names=None, image_bytes=None, local_duration=None):
     """
     Download AI-generated video from multiple providers.
-    Priority: Browser automation (free) > API keys > Free fallbacks
+    Default priority (VIDEO_PROVIDERS env): Browser automation (free) > API keys > Free fallbacks > local renders
+    Providers in LOCAL_VIDEO_PROVIDERS render on this machine for `local_duration` seconds;
+    those in STILL_VIDEO_PROVIDERS animate `image_bytes` and are skipped without it.
     """
     print(f"🎥 Generating AI video: {prompt[:60]}...")
     
-    providers = []
+    if provider_names is None:
+        provider_names = [n.strip() for n in VIDEO_PROVIDER_ORDER.split(',') if n.strip()]
     
-    # 1. Browser automation (100% free, best option)
-    providers.append(_try_browser_video)
+    # Authenticated APIs are only tried when their key is configured
+    api_keys = {"fal": FAL_KEY, "luma": LUMA_API_KEY, "replicate": REPLICATE_API_TOKEN}
     
-    # 2. Authenticated APIs (if configured)
-    if FAL_KEY:
-        providers.append(_try_fal_video)
-    if LUMA_API_KEY:
-        providers.append(_try_luma_api_video)
-    if REPLICATE_API_TOKEN:
-        providers.append(_try_replicate_video)
-    
-    # 3. Free API fallbacks
-    providers.extend([
-        _try_huggingface_video,
-        _try_modelslab_video,
-    ])
+    providers = []
+    for name in provider_names:
+        if name not in VIDEO_PROVIDERS:
+            print(f"  ⚠️ Unknown video provider: {name}")
+            continue
+        if name in api_keys and not api_keys[name]:
+            continue
+        if name in STILL_VIDEO_PROVIDERS and image_bytes is None:
+            continue
+        providers.append((name, VIDEO_PROVIDERS[name]))
     
     print(f"  Available providers: {len(providers)}")
     
-    for provider in providers:
+    for name, provider in providers:
         try:
-            result = provider(prompt, duration)
+            if name in LOCAL_VIDEO_PROVIDERS:
+                result = provider(prompt, local_duration or duration, image_bytes)
+            else:
+                result = provider(prompt, duration)
             if result and _is_valid_video(result):
                 return result
         except Exception as e:
@@ -471,160 +1005,195 @@ def _browser_pixelbin(prompt):
     print("    Pixelbin.io: Requires login, skipping...")
     return None
 
+def _acquire_browser():
+    """Return (browser, release). Reuses the warm daemon browser when called from its owner thread."""
+    warm = _warm_browser
+    if warm and warm["thread"] == threading.get_ident():
+        return warm["browser"], lambda: None
+
+    from playwright.sync_api import sync_playwright
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=True)
+
+    def release():
+        browser.close()
+        playwright.stop()
+    return browser, release
+
+def start_warm_browser():
+    """Launch a Chromium instance that stays up for the life of the calling thread (daemon mode)."""
+    global _warm_browser
+    try:
+        from playwright.sync_api import sync_playwright
+        playwright = sync_playwright().start()
+        browser = playwright.chromium.launch(headless=True)
+    except Exception as e:
+        print(f"⚠️ Warm browser unavailable: {str(e)[:80]}")
+        return False
+    _warm_browser = {"thread": threading.get_ident(), "browser": browser, "playwright": playwright}
+    return True
+
+def stop_warm_browser():
+    global _warm_browser
+    warm, _warm_browser = _warm_browser, None
+    if warm:
+        try:
+            warm["browser"].close()
+            warm["playwright"].stop()
+        except Exception:
+            pass
+
 def _browser_gizai(prompt):
     """Automate GizAI free video generator."""
     print("    Trying: GizAI (giz.ai/video)...")
     
-    from playwright.sync_api import sync_playwright
+    browser, release = _acquire_browser()
+    context = browser.new_context(
+        viewport={'width': 1920, 'height': 1080},
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    )
+    page = context.new_page()
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        page = context.new_page()
+    try:
+        # Navigate to GizAI video generator
+        print("    Loading GizAI video page...")
+        page.goto("https://giz.ai/video", timeout=120000)
         
-        try:
-            # Navigate to GizAI video generator
-            print("    Loading GizAI video page...")
-            page.goto("https://giz.ai/video", timeout=120000)
-            
-            # Wait for page to be fully loaded
-            page.wait_for_load_state("domcontentloaded", timeout=60000)
-            page.wait_for_timeout(5000)  # Extra wait for JS to initialize
-            
-            # Try to find prompt input with multiple selectors
-            print("    Looking for prompt input...")
-            input_selectors = [
-                'textarea[placeholder*="prompt"]',
-                'textarea[placeholder*="describe"]',
-                'textarea[placeholder*="Enter"]',
-                'input[placeholder*="prompt"]',
-                'textarea',
-                '[contenteditable="true"]',
-            ]
-            
-            prompt_input = None
-            for selector in input_selectors:
-                try:
-                    elem = page.locator(selector).first
-                    if elem.is_visible(timeout=3000):
-                        prompt_input = elem
-                        print(f"    Found input with selector: {selector[:30]}")
-                        break
-                except:
-                    continue
-            
-            if not prompt_input:
-                print("    Could not find prompt input field")
-                return None
-            
-            # Fill the prompt
-            prompt_input.fill(prompt)
-            page.wait_for_timeout(1000)
-            
-            # Find and click generate button
-            print("    Looking for generate button...")
-            button_selectors = [
-                'button:has-text("Generate")',
-                'button:has-text("Create")',
-                'button:has-text("Make")',
-                'button[type="submit"]',
-                '[role="button"]:has-text("Generate")',
-            ]
-            
-            generate_btn = None
-            for selector in button_selectors:
+        # Wait for page to be fully loaded
+        page.wait_for_load_state("domcontentloaded", timeout=60000)
+        page.wait_for_timeout(5000)  # Extra wait for JS to initialize
+        
+        # Try to find prompt input with multiple selectors
+        print("    Looking for prompt input...")
+        input_selectors = [
+            'textarea[placeholder*="prompt"]',
+            'textarea[placeholder*="describe"]',
+            'textarea[placeholder*="Enter"]',
+            'input[placeholder*="prompt"]',
+            'textarea',
+            '[contenteditable="true"]',
+        ]
+        
+        prompt_input = None
+        for selector in input_selectors:
+            try:
+                elem = page.locator(selector).first
+                if elem.is_visible(timeout=3000):
+                    prompt_input = elem
+                    print(f"    Found input with selector: {selector[:30]}")
+                    break
+            except:
+                continue
+        
+        if not prompt_input:
+            print("    Could not find prompt input field")
+            return None
+        
+        # Fill the prompt
+        prompt_input.fill(prompt)
+        page.wait_for_timeout(1000)
+        
+        # Find and click generate button
+        print("    Looking for generate button...")
+        button_selectors = [
+            'button:has-text("Generate")',
+            'button:has-text("Create")',
+            'button:has-text("Make")',
+            'button[type="submit"]',
+            '[role="button"]:has-text("Generate")',
+        ]
+        
+        generate_btn = None
+        for selector in button_selectors:
+            try:
+                elem = page.locator(selector).first
+                if elem.is_visible(timeout=3000):
+                    generate_btn = elem
+                    print(f"    Found button with selector: {selector[:30]}")
+                    break
+            except:
+                continue
+        
+        if not generate_btn:
+            print("    Could not find generate button")
+            return None
+        
+        generate_btn.click()
+        print("    Clicked generate, waiting for video (up to 5 min)...")
+        
+        # Wait for video to be generated
+        # Look for video element, download link, or result container
+        result_selectors = [
+            'video',
+            'video source',
+            'a[download]',
+            'a:has-text("Download")',
+            '[class*="result"] video',
+            '[class*="output"] video',
+        ]
+        
+        video_element = None
+        for _ in range(60):  # Check every 5 seconds for 5 minutes
+            page.wait_for_timeout(5000)
+            for selector in result_selectors:
                 try:
                     elem = page.locator(selector).first
-                    if elem.is_visible(timeout=3000):
-                        generate_btn = elem
-                        print(f"    Found button with selector: {selector[:30]}")
+                    if elem.is_visible(timeout=1000):
+                        video_element = elem
                         break
                 except:
                     continue
-            
-            if not generate_btn:
-                print("    Could not find generate button")
-                return None
-            
-            generate_btn.click()
-            print("    Clicked generate, waiting for video (up to 5 min)...")
-            
-            # Wait for video to be generated
-            # Look for video element, download link, or result container
-            result_selectors = [
-                'video',
-                'video source',
-                'a[download]',
-                'a:has-text("Download")',
-                '[class*="result"] video',
-                '[class*="output"] video',
-            ]
-            
-            video_element = None
-            for _ in range(60):  # Check every 5 seconds for 5 minutes
-                page.wait_for_timeout(5000)
-                for selector in result_selectors:
-                    try:
-                        elem = page.locator(selector).first
-                        if elem.is_visible(timeout=1000):
-                            video_element = elem
-                            break
-                    except:
-                        continue
-                if video_element:
-                    break
-                print("    Still waiting...")
-            
-            if not video_element:
-                print("    Timeout: No video appeared after 5 minutes")
-                return None
-            
-            # Get video URL
-            video_url = None
+            if video_element:
+                break
+            print("    Still waiting...")
+        
+        if not video_element:
+            print("    Timeout: No video appeared after 5 minutes")
+            return None
+        
+        # Get video URL
+        video_url = None
+        try:
+            # Try video source first
+            video_src = page.locator('video source').first
+            if video_src.count() > 0:
+                video_url = video_src.get_attribute('src')
+        except:
+            pass
+        
+        if not video_url:
             try:
-                # Try video source first
-                video_src = page.locator('video source').first
-                if video_src.count() > 0:
-                    video_url = video_src.get_attribute('src')
+                # Try video element directly
+                video_elem = page.locator('video').first
+                video_url = video_elem.get_attribute('src')
             except:
                 pass
+        
+        if not video_url:
+            try:
+                # Try download link
+                download_link = page.locator('a[download]').first
+                video_url = download_link.get_attribute('href')
+            except:
+                pass
+        
+        if video_url:
+            if not video_url.startswith('http'):
+                video_url = f"https://giz.ai{video_url}"
             
-            if not video_url:
-                try:
-                    # Try video element directly
-                    video_elem = page.locator('video').first
-                    video_url = video_elem.get_attribute('src')
-                except:
-                    pass
-            
-            if not video_url:
-                try:
-                    # Try download link
-                    download_link = page.locator('a[download]').first
-                    video_url = download_link.get_attribute('href')
-                except:
-                    pass
-            
-            if video_url:
-                if not video_url.startswith('http'):
-                    video_url = f"https://giz.ai{video_url}"
+            print(f"    Found video URL: {video_url[:60]}...")
+            response = _http('media').get(video_url, timeout=120)
+            if response.status_code == 200 and len(response.content) > 50000:
+                print(f"    ✅ GizAI video: {len(response.content)//1024}KB")
+                return response.content
+        
+        print("    Could not extract video URL")
                 
-                print(f"    Found video URL: {video_url[:60]}...")
-                import requests
-                response = requests.get(video_url, timeout=120)
-                if response.status_code == 200 and len(response.content) > 50000:
-                    print(f"    ✅ GizAI video: {len(response.content)//1024}KB")
-                    return response.content
-            
-            print("    Could not extract video URL")
-                    
-        except Exception as e:
-            print(f"    GizAI error: {str(e)[:80]}")
-        finally:
-            browser.close()
+    except Exception as e:
+        print(f"    GizAI error: {str(e)[:80]}")
+    finally:
+        context.close()
+        release()
     
     return None
 
@@ -636,9 +1205,15 @@ def _try_fal_video(prompt, duration):
         print("    ⚠️ FAL_KEY not configured")
         return None
     
+    if FAL_QUEUE_URL != _FAL_LIVE_QUEUE:  # fal_client always targets the live queue
+        return _try_fal_rest_video(prompt)
     try:
         import fal_client
-        
+    except ImportError:
+        print("    ⚠️ fal-client not installed, using REST API...")
+        return _try_fal_rest_video(prompt)
+
+    try:
         # Use Kling 2.5 Turbo for fast, high-quality generation
         result = fal_client.subscribe(
             "fal-ai/kling-video/v1.5/standard/text-to-video",
@@ -652,72 +1227,74 @@ def _try_fal_video(prompt, duration):
         
         if result and result.get("video") and result["video"].get("url"):
             video_url = result["video"]["url"]
-            video_response = requests.get(video_url, timeout=120)
+            video_response = _http('media').get(video_url, timeout=120)
             
             if video_response.status_code == 200:
                 print(f"    ✅ Fal.ai Kling video: {len(video_response.content)//1024}KB")
                 return video_response.content
                 
-    except ImportError:
-        print("    ⚠️ fal-client not installed, using REST API...")
-        # Fallback to REST API
-        try:
-            headers = {"Authorization": f"Key {FAL_KEY}", "Content-Type": "application/json"}
-            payload = {
-                "prompt": prompt,
-                "duration": "5",
-                "aspect_ratio": "9:16",
-            }
-            
-            # Submit request
-            response = requests.post(
-                "https://queue.fal.run/fal-ai/kling-video/v1.5/standard/text-to-video",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                request_id = data.get("request_id")
-                
-                if request_id:
-                    # Poll for result
-                    for _ in range(60):  # Wait up to 5 minutes
-                        time.sleep(5)
-                        status_resp = requests.get(
-                            f"https://queue.fal.run/fal-ai/kling-video/v1.5/standard/text-to-video/requests/{request_id}/status",
-                            headers=headers,
-                            timeout=30
-                        )
-                        if status_resp.status_code == 200:
-                            status_data = status_resp.json()
-                            if status_data.get("status") == "COMPLETED":
-                                result_resp = requests.get(
-                                    f"https://queue.fal.run/fal-ai/kling-video/v1.5/standard/text-to-video/requests/{request_id}",
-                                    headers=headers,
-                                    timeout=30
-                                )
-                                if result_resp.status_code == 200:
-                                    result_data = result_resp.json()
-                                    if result_data.get("video", {}).get("url"):
-                                        video_url = result_data["video"]["url"]
-                                        video_resp = requests.get(video_url, timeout=120)
-                                        if video_resp.status_code == 200:
-                                            print(f"    ✅ Fal.ai video: {len(video_resp.content)//1024}KB")
-                                            return video_resp.content
-                                break
-                            elif status_data.get("status") == "FAILED":
-                                print(f"    ❌ Fal.ai failed: {status_data.get('error')}")
-                                break
-                                
-        except Exception as e:
-            print(f"    Fal.ai REST error: {e}")
     except Exception as e:
         print(f"    Fal.ai error: {e}")
     
     return None
 
+def _try_fal_rest_video(prompt):
+    """Fal.ai queue REST API (Kling): submit, poll the status, then download the video."""
+    try:
+        headers = {"Authorization": f"Key {FAL_KEY}", "Content-Type": "application/json"}
+        payload = {
+            "prompt": prompt,
+            "duration": "5",
+            "aspect_ratio": "9:16",
+        }
+
+        # Submit request
+        response = _http('fal').post(
+            f"{FAL_QUEUE_URL}/fal-ai/kling-video/v1.5/standard/text-to-video",
+            headers=headers,
+            json=payload,
+            timeout=30
+        )
+
+        if response.status_code == 200:
+            data = response.json()
+            request_id = data.get("request_id")
+
+            if request_id:
+                # Poll for result
+                for _ in range(60):  # Wait up to 5 minutes
+                    time.sleep(VIDEO_POLL_INTERVAL)
+                    status_resp = _http('fal').get(
+                        f"{FAL_QUEUE_URL}/fal-ai/kling-video/v1.5/standard/text-to-video/requests/{request_id}/status",
+                        headers=headers,
+                        timeout=30
+                    )
+                    if status_resp.status_code == 200:
+                        status_data = status_resp.json()
+                        if status_data.get("status") == "COMPLETED":
+                            result_resp = _http('fal').get(
+                                f"{FAL_QUEUE_URL}/fal-ai/kling-video/v1.5/standard/text-to-video/requests/{request_id}",
+                                headers=headers,
+                                timeout=30
+                            )
+                            if result_resp.status_code == 200:
+                                result_data = result_resp.json()
+                                if result_data.get("video", {}).get("url"):
+                                    video_url = result_data["video"]["url"]
+                                    video_resp = _http('media').get(video_url, timeout=120)
+                                    if video_resp.status_code == 200:
+                                        print(f"    ✅ Fal.ai video: {len(video_resp.content)//1024}KB")
+                                        return video_resp.content
+                            break
+                        elif status_data.get("status") == "FAILED":
+                            print(f"    ❌ Fal.ai failed: {status_data.get('error')}")
+                            break
+
+    except Exception as e:
+        print(f"    Fal.ai REST error: {e}")
+    
+    return None
+
 def _try_luma_api_video(prompt, duration):
     """Try Luma AI official API for video generation."""
     print("  Trying: Luma AI API...")
@@ -739,8 +1316,8 @@ def _try_luma_api_video(prompt, duration):
             "loop": False,
         }
         
-        response = requests.post(
-            "https://api.lumalabs.ai/dream-machine/v1/generations",
+        response = _http('luma').post(
+            f"{LUMA_API_URL}/dream-machine/v1/generations",
             headers=headers,
             json=payload,
             timeout=30
@@ -753,9 +1330,9 @@ def _try_luma_api_video(prompt, duration):
             if generation_id:
                 # Poll for completion
                 for _ in range(60):  # Wait up to 5 minutes
-                    time.sleep(5)
-                    status_resp = requests.get(
-                        f"https://api.lumalabs.ai/dream-machine/v1/generations/{generation_id}",
+                    time.sleep(VIDEO_POLL_INTERVAL)
+                    status_resp = _http('luma').get(
+                        f"{LUMA_API_URL}/dream-machine/v1/generations/{generation_id}",
                         headers=headers,
                         timeout=30
                     )
@@ -767,7 +1344,7 @@ def _try_luma_api_video(prompt, duration):
                         if state == "completed":
                             video_url = status_data.get("assets", {}).get("video")
                             if video_url:
-                                video_resp = requests.get(video_url, timeout=120)
+                                video_resp = _http('media').get(video_url, timeout=120)
                                 if video_resp.status_code == 200:
                                     print(f"    ✅ Luma AI video: {len(video_resp.content)//1024}KB")
                                     return video_resp.content
@@ -807,8 +1384,8 @@ def _try_replicate_video(prompt, duration):
             }
         }
         
-        response = requests.post(
-            "https://api.replicate.com/v1/predictions",
+        response = _http('replicate').post(
+            f"{REPLICATE_API_URL}/v1/predictions",
             headers=headers,
             json=payload,
             timeout=30
@@ -821,9 +1398,9 @@ def _try_replicate_video(prompt, duration):
             if prediction_id:
                 # Poll for completion
                 for _ in range(60):
-                    time.sleep(5)
-                    status_resp = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
+                    time.sleep(VIDEO_POLL_INTERVAL)
+                    status_resp = _http('replicate').get(
+                        f"{REPLICATE_API_URL}/v1/predictions/{prediction_id}",
                         headers=headers,
                         timeout=30
                     )
@@ -836,7 +1413,7 @@ def _try_replicate_video(prompt, duration):
                             output = status_data.get("output")
                             video_url = output[0] if isinstance(output, list) else output
                             if video_url:
-                                video_resp = requests.get(video_url, timeout=120)
+                                video_resp = _http('media').get(video_url, timeout=120)
                                 if video_resp.status_code == 200:
                                     print(f"    ✅ Replicate video: {len(video_resp.content)//1024}KB")
                                     return video_resp.content
@@ -868,6 +1445,7 @@ def _try_luma_video(prompt, duration):
         for space in spaces_to_try:
             try:
                 print(f"    Connecting to {space}...")
+                _limiter().acquire('huggingface')
                 client = Client(space, verbose=False)
                 
                 # Luma spaces typically use text prompt input
@@ -913,6 +1491,7 @@ def _try_huggingface_video(prompt, duration):
         for space in spaces_to_try:
             try:
                 print(f"    Connecting to {space}...")
+                _limiter().acquire('huggingface')
                 client = Client(space, verbose=False)
                 
                 # Most video spaces use predict() with prompt and other params
@@ -942,7 +1521,7 @@ def _try_modelslab_video(prompt, duration):
     
     try:
         # ModelsLab offers free tier - no API key for limited use
-        api_url = "https://modelslab.com/api/v6/video/text2video"
+        api_url = f"{MODELSLAB_API_URL}/api/v6/video/text2video"
         
         payload = {
             "key": "",  # Empty for free tier
@@ -955,13 +1534,13 @@ def _try_modelslab_video(prompt, duration):
             "fps": 8,
         }
         
-        response = requests.post(api_url, json=payload, timeout=120)
+        response = _http('modelslab').post(api_url, json=payload, timeout=120)
         
         if response.status_code == 200:
             data = response.json()
             if data.get("status") == "success" and data.get("output"):
                 video_url = data["output"][0] if isinstance(data["output"], list) else data["output"]
-                video_response = requests.get(video_url, timeout=60)
+                video_response = _http('media').get(video_url, timeout=60)
                 if video_response.status_code == 200:
                     print(f"    ✅ ModelsLab video: {len(video_response.content)//1024}KB")
                     return video_response.content
@@ -973,50 +1552,20 @@ def _try_modelslab_video(prompt, duration):
     
     return None
 
+def _probe_video(content):
+    """Container metadata (video_probe.VideoInfo) if content is a complete MP4/WebM video, else None."""
+    from video_probe import VideoInvalid, probe
+    if not content:
+        return None
+    try:
+        return probe(content)
+    except VideoInvalid as e:
+        print(f"    ❌ Rejected video: {e}")
+        return None
+
 def _is_valid_video(content):
-    """Check if content is actually a video file (not an image)."""
-    if not content or len(content) < 1000:
-        return False
-    
-    # Check video magic bytes
-    # MP4/MOV: starts with ftyp after 4 bytes
-    # WebM: starts with 0x1A45DFA3
-    # AVI: starts with RIFF...AVI
-    header = content[:12]
-    
-    # MP4/MOV check
-    if len(header) >= 8 and header[4:8] == b'ftyp':
-        return True
-    # WebM check  
-    if header[:4] == b'\x1a\x45\xdf\xa3':
-        return True
-    # AVI check
-    if header[:4] == b'RIFF' and len(header) >= 12 and header[8:12] == b'AVI ':
-        return True
-    # OGG video check
-    if header[:4] == b'OggS':
-        return True
-        
-    # Reject common image formats
-    # JPEG
-    if header[:2] == b'\xff\xd8':
-        print("    ❌ Rejected: received JPEG image instead of video")
-        return False
-    # PNG
-    if header[:4] == b'\x89PNG':
-        print("    ❌ Rejected: received PNG image instead of video")
-        return False
-    # GIF
-    if header[:3] == b'GIF':
-        print("    ❌ Rejected: received GIF instead of video")
-        return False
-    # WebP
-    if header[:4] == b'RIFF' and len(header) >= 12 and header[8:12] == b'WEBP':
-        print("    ❌ Rejected: received WebP image instead of video")
-        return False
-    
-    # Unknown format but large enough to potentially be video
-    return len(content) > 500000  # 500KB minimum for unknown format
+    """Check if content is a playable video: moov/tracks/duration/size read from the container headers."""
+    return _probe_video(content) is not None
 
 def _try_pollinations_video(prompt, duration):
     """Try Pollinations.ai for video generation."""
@@ -1026,8 +1575,56 @@ def _try_pollinations_video(prompt, duration):
     print("    ⚠️ Pollinations video API currently unavailable")
     return None
 
-def generate_reel(image_bytes, caption_text, brand_name):
-    """Generate a professional Instagram Reel with AI voiceover and video effects."""
+def _try_ken_burns_video(prompt, duration, image_bytes):
+    """Local fallback: pan/zoom/parallax reel rendered from the post image (reel_render.py)."""
+    print("  Trying: Ken Burns (local)...")
+    import hashlib
+    from reel_render import ken_burns_reel
+    started = time.perf_counter()
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    data = ken_burns_reel(image_bytes, duration=duration, seed=seed)
+    print(f"    ✅ Ken Burns reel: {duration:.1f}s rendered in {time.perf_counter() - started:.1f}s, {len(data) // 1024}KB")
+    return data
+
+def _brand_palette():
+    """Brand hex colours in the order the art direction lists them (purple, gold, teal)."""
+    import re
+    colors = re.findall(r"\((#[0-9A-Fa-f]{6})\)", _ASTRO_SYSTEM_INSTRUCTION)
+    return tuple(colors[:3]) if len(colors) >= 3 else None
+
+def _try_cosmic_video(prompt, duration, image_bytes=None):
+    """Local, always-available fallback: procedural nebula/star/zodiac animation (cosmic_engine.py)."""
+    print("  Trying: Cosmic engine (local)...")
+    import hashlib
+    from cosmic_engine import PALETTE, cosmic_reel
+    started = time.perf_counter()
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    data = cosmic_reel(duration=duration, palette=_brand_palette() or PALETTE, seed=seed,
+                       workers=RENDER_WORKERS or None)
+    print(f"    ✅ Cosmic reel: {duration:.1f}s rendered in {time.perf_counter() - started:.1f}s, {len(data) // 1024}KB")
+    return data
+
+# Video providers by name, in the order used by VIDEO_PROVIDER_ORDER
+VIDEO_PROVIDERS = {
+    "browser": _try_browser_video,
+    "fal": _try_fal_video,
+    "luma": _try_luma_api_video,
+    "replicate": _try_replicate_video,
+    "huggingface": _try_huggingface_video,
+    "modelslab": _try_modelslab_video,
+    "luma_space": _try_luma_video,
+    "pollinations": _try_pollinations_video,
+    "kenburns": _try_ken_burns_video,
+    "cosmic": _try_cosmic_video,
+}
+STILL_VIDEO_PROVIDERS = {"kenburns"}  # need the post image
+LOCAL_VIDEO_PROVIDERS = STILL_VIDEO_PROVIDERS | {"cosmic"}  # called with (prompt, reel duration, post image)
+
+def generate_reel(image_bytes, caption_text, brand_name, provider_names=None, website="astroboli.com", run=None):
+    """Generate a professional Instagram Reel with AI voiceover and video effects.
+
+    With a run directory, the voiceover and the AI clip are checkpointed and reused on --resume.
+    """
     print("🎬 Generating Professional Instagram Reel...")
     
     try:
@@ -1038,136 +1635,271 @@ def generate_reel(image_bytes, caption_text, brand_name):
         print("WARNING: moviepy not available, skipping reel generation")
         return None
     
-    try:
-        # Instagram Reels specs: 9:16 aspect ratio, 1080x1920
-        REEL_WIDTH = 1080
-        REEL_HEIGHT = 1920
-        FPS = 24
-        
-        # Extract a short, punchy script from caption for voiceover
-        # Remove hashtags and website links for cleaner voiceover
-        script_lines = caption_text.split('\n')
-        script = script_lines[0] if script_lines else "Embrace the cosmic energy today"
-        script = script.split('#')[0].strip()
-        script = script.replace('https://astroboli.com', '').replace('astroboli.com', '')
-        script = script.replace('Visit', '').strip()
-        
-        # Add brand intro for professionalism
-        full_script = f"Welcome to {brand_name}. {script}. Visit astroboli dot com for your complete reading."
+    with _scratch_workspace('reel') as ws:
+        try:
+            # Instagram Reels specs: 9:16 aspect ratio, 1080x1920
+            REEL_WIDTH = 1080
+            REEL_HEIGHT = 1920
+            FPS = 24
         
-        print(f"Script: {full_script[:80]}...")
+            # Extract a short, punchy script from caption for voiceover
+            # Remove hashtags and website links for cleaner voiceover
+            script_lines = caption_text.split('\n')
+            script = script_lines[0] if script_lines else "Embrace the cosmic energy today"
+            script = script.split('#')[0].strip()
+            script = script.replace(f'https://{website}', '').replace(website, '')
+            script = script.replace('Visit', '').strip()
         
-        # Generate voiceover
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as audio_tmp:
-            audio_path = audio_tmp.name
+            # Add brand intro for professionalism
+            full_script = f"Welcome to {brand_name}. {script}. Visit {website.replace('.', ' dot ')} for your complete reading."
         
-        # Run async voiceover generation
-        voiceover_success = asyncio.run(generate_voiceover(full_script, audio_path))
+            print(f"Script: {full_script[:80]}...")
         
-        if not voiceover_success or not os.path.exists(audio_path):
-            print("Voiceover generation failed, continuing without audio")
-            audio_path = None
+            # Generate voiceover (or reuse the checkpointed one)
+            words = []  # (start, end, word) timings for the captions
+            if run is not None and run.has('voiceover'):
+                audio_path = run.path_of('voiceover')
+                words = run.manifest['stages']['voiceover'].get('words') or []
+                print("♻️ Reusing voiceover from run checkpoint")
+            else:
+                audio_path = ws.path('.mp3')
+            
+                # Run async voiceover generation
+                import asyncio
+                voiceover_success = asyncio.run(generate_voiceover(full_script, audio_path, words))
+            
+                if not voiceover_success or not os.path.exists(audio_path):
+                    print("Voiceover generation failed, continuing without audio")
+                    audio_path = None
+                    words = []
+                elif run is not None:
+                    audio_path = run.adopt_file('voiceover', 'voiceover.mp3', audio_path, script=full_script, words=words)
         
-        # Get audio duration to match video length
-        if audio_path:
-            audio_clip = AudioFileClip(audio_path)
-            DURATION = audio_clip.duration + 1  # Add 1 second buffer
-            audio_clip.close()
-        else:
-            DURATION = 10
+            # Get audio duration to match video length
+            if audio_path:
+                audio_clip = AudioFileClip(audio_path)
+                DURATION = audio_clip.duration + 1  # Add 1 second buffer
+                audio_clip.close()
+            else:
+                DURATION = 10
         
-        print(f"Reel duration target: {DURATION:.1f}s")
+            print(f"Reel duration target: {DURATION:.1f}s")
+
+            if audio_path and AUDIO_MIX:
+                try:
+                    audio_path = _mix_reel_audio(audio_path, DURATION, ws)
+                except Exception as e:
+                    print(f"⚠️ Audio mix failed ({e}), using the raw voiceover")
         
-        # ===== TRY AI VIDEO GENERATION FIRST =====
-        # Create a cosmic video prompt for Pollinations.ai
-        video_prompt = f"Mystical cosmic astrology scene, swirling galaxies, zodiac constellations, ethereal purple and gold colors, glowing stars, nebula clouds, magical celestial energy, cinematic, 4K quality, slow motion particles, dreamy atmosphere"
+            # ===== TRY AI VIDEO GENERATION FIRST =====
+            # Create a cosmic video prompt for Pollinations.ai
+            video_prompt = f"Mystical cosmic astrology scene, swirling galaxies, zodiac constellations, ethereal purple and gold colors, glowing stars, nebula clouds, magical celestial energy, cinematic, 4K quality, slow motion particles, dreamy atmosphere"
         
-        # Try to download AI-generated video from Pollinations.ai
-        ai_video_data = download_ai_video(video_prompt, duration=min(10, int(DURATION)))
+            # Try to download AI-generated video from Pollinations.ai
+            if run is not None and run.has('ai_clip'):
+                print("♻️ Reusing AI clip from run checkpoint")
+                ai_video_data = run.read_bytes('ai_clip')
+            else:
+                ai_video_data = download_ai_video(video_prompt, duration=min(10, int(DURATION)), provider_names=provider_names,
+                                                  image_bytes=image_bytes, local_duration=DURATION)
+                if ai_video_data is not None and run is not None:
+                    run.save_bytes('ai_clip', 'ai_clip.mp4', ai_video_data)
         
-        use_ai_video = ai_video_data is not None
+            clip_info = _probe_video(ai_video_data) if ai_video_data is not None else None
+            use_ai_video = clip_info is not None
+            if use_ai_video:
+                loops = DURATION / clip_info.duration if clip_info.duration else 0
+                length = f"{clip_info.duration:.1f}s" if clip_info.duration else "duration unknown"
+                print(f"🎞️ Clip: {clip_info.width}x{clip_info.height} {clip_info.codec} {length}"
+                      f"{f' @ {clip_info.fps:g}fps' if clip_info.fps else ''}"
+                      f"{f', looped {loops:.1f}x' if loops > 1 else ''}")
         
-        if use_ai_video:
-            print("✅ Using AI-generated video from Pollinations.ai")
-            # Save AI video to temp file
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as vid_tmp:
-                vid_tmp.write(ai_video_data)
-                ai_video_path = vid_tmp.name
+            if use_ai_video:
+                print("✅ Using generated video clip")
+                # Save AI video to the workspace
+                ai_video_path = run.path_of('ai_clip') if run is not None else ws.write(ai_video_data, '.mp4')
+                ai_video_data = None  # on disk now; the renderer reads it from there
             
-            # Load AI video as clip
-            from moviepy.video.io.VideoFileClip import VideoFileClip
-            video_clip = VideoFileClip(ai_video_path)
+                if REEL_SEGMENTED:
+                    video_data = _render_reel_segmented(ai_video_path, audio_path, DURATION, full_script, words,
+                                                        (REEL_WIDTH, REEL_HEIGHT), FPS)
+                    print(f"✅ Professional reel generated: {REEL_WIDTH}x{REEL_HEIGHT}, {DURATION:.1f}s, size: {len(video_data)//1024}KB")
+                    return video_data
             
-            # Resize to Instagram Reels dimensions (9:16)
-            video_clip = video_clip.resized((REEL_WIDTH, REEL_HEIGHT))
+                # Load AI video as clip
+                from moviepy.video.io.VideoFileClip import VideoFileClip
+                video_clip = VideoFileClip(ai_video_path)
             
-            # Loop or trim to match audio duration
-            if video_clip.duration < DURATION:
-                # Loop the video
-                loops_needed = int(DURATION / video_clip.duration) + 1
-                from moviepy.video.fx.loop import loop
-                video_clip = loop(video_clip, n=loops_needed).with_duration(DURATION)
-            else:
-                video_clip = video_clip.subclipped(0, DURATION)
+                # Resize to Instagram Reels dimensions (9:16)
+                if tuple(video_clip.size) != (REEL_WIDTH, REEL_HEIGHT):
+                    video_clip = video_clip.resized((REEL_WIDTH, REEL_HEIGHT))
+            
+                # Loop or trim to match audio duration
+                if video_clip.duration < DURATION:
+                    # Loop the video
+                    loops_needed = int(DURATION / video_clip.duration) + 1
+                    from moviepy.video.fx.loop import loop
+                    video_clip = loop(video_clip, n=loops_needed).with_duration(DURATION)
+                else:
+                    video_clip = video_clip.subclipped(0, DURATION)
                 
-        else:
-            # NO FALLBACK - User requested real AI video only
-            print("❌ AI video generation failed - no reel will be created")
-            print("💡 All providers returned errors. Real AI video required - no fallback to animated images.")
-            return None
+            else:
+                # No local fallback unless "kenburns" or "cosmic" is in the provider list
+                print("❌ AI video generation failed - no reel will be created")
+                print("💡 All providers returned errors. Add 'cosmic' to VIDEO_PROVIDERS for a local animated reel.")
+                return None
         
-        # ===== ADD AUDIO AND RENDER =====
-        if audio_path:
-            audio_clip = AudioFileClip(audio_path)
-            video_clip = video_clip.with_audio(audio_clip)
-            print("Audio attached to video")
+            # ===== BURNED-IN CAPTIONS =====
+            if CAPTIONS_ENABLED:
+                from captions import Captions, GlyphAtlas, estimate_word_timings
+                if not words:
+                    words = estimate_word_timings(full_script, DURATION - 1)
+                atlas = GlyphAtlas(full_script, size=REEL_WIDTH // 15, stroke=REEL_WIDTH // 216, font_path=CAPTION_FONT)
+                captions = Captions(words, (REEL_WIDTH, REEL_HEIGHT), atlas=atlas)
+                video_clip = video_clip.transform(lambda get_frame, t: captions.apply(get_frame(t), t))
+                print(f"💬 Captions: {len(words)} words in {len(captions.cues)} cues")
         
-        # Write final video
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp:
-            output_path = tmp.name
+            # ===== ADD AUDIO AND RENDER =====
+            if audio_path:
+                audio_clip = AudioFileClip(audio_path)
+                video_clip = video_clip.with_audio(audio_clip)
+                print("Audio attached to video")
         
-        print(f"Rendering reel to: {output_path}")
-        video_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac' if audio_path else None,
-            fps=FPS,
-            preset='medium'
-        )
+            # Write final video
+            output_path = ws.path('.mp4')
         
-        # Read the final video
-        with open(output_path, 'rb') as f:
-            video_data = f.read()
+            print(f"Rendering reel to: {output_path}")
+            video_clip.write_videofile(
+                output_path,
+                codec='libx264',
+                audio_codec='aac' if audio_path else None,
+                fps=FPS,
+                preset=REEL_PRESET,
+                ffmpeg_params=['-crf', str(REEL_CRF)]
+            )
         
-        # Cleanup
-        video_clip.close()
-        os.unlink(output_path)
-        if audio_path and os.path.exists(audio_path):
-            os.unlink(audio_path)
+            # Read the final video
+            with open(output_path, 'rb') as f:
+                video_data = f.read()
         
-        print(f"✅ Professional reel generated: {REEL_WIDTH}x{REEL_HEIGHT}, {DURATION:.1f}s, size: {len(video_data)//1024}KB")
+            # Cleanup (the workspace removes the clip and voiceover temp files)
+            video_clip.close()
+            ws.release(output_path)
         
-        return video_data
+            print(f"✅ Professional reel generated: {REEL_WIDTH}x{REEL_HEIGHT}, {DURATION:.1f}s, size: {len(video_data)//1024}KB")
         
-    except Exception as e:
-        print(f"ERROR generating reel: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+            return video_data
+        
+        except Exception as e:
+            print(f"ERROR generating reel: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-def send_email(image_data, caption, reel_data=None, video_prompt=None):
-    """Sends email with image, caption, and optional reel. If reel failed, includes video_prompt for manual creation."""
-    print("Sending email...")
-    
-    # Create message
+def _mix_reel_audio(voice_path, duration, ws):
+    """Voiceover over the ambient bed, ducked, faded and loudness-normalized into one WAV in `ws`."""
+    import audio_mix
+    started = time.perf_counter()
+    voice = audio_mix.decode(voice_path)
+    if AMBIENT_BED == 'drone':
+        bed = audio_mix.drone(duration)
+    else:
+        bed = audio_mix.decode(AMBIENT_BED) if AMBIENT_BED else None
+    pcm, info = audio_mix.mix(voice, bed, duration=duration, bed_lu=AMBIENT_BED_LU, duck_db=AUDIO_DUCK_DB,
+                              target_lufs=AUDIO_TARGET_LUFS)
+    path = audio_mix.write_wav(ws.path('.wav'), pcm)
+    print(f"🎚️ Audio mix: voice {info['input_lufs']:.1f} → {info['lufs']:.1f} LUFS, peak {info['peak_db']:.1f} dBFS"
+          f"{f', bed {AMBIENT_BED}' if info['bed'] else ''} ({time.perf_counter() - started:.2f}s)")
+    return path
+
+def _render_budget(default=None, spent=0.0):
+    """Seconds the final render may take: REEL_RENDER_BUDGET (else `default`) less `spent`, capped by JOB_DEADLINE."""
+    budget = REEL_RENDER_BUDGET or default
+    if budget is not None:
+        budget -= spent
+    if JOB_DEADLINE:
+        left = float(JOB_DEADLINE) - time.time() - 120  # keep two minutes to send the email
+        budget = left if budget is None else min(budget, left)
+    return budget
+
+def _tune_encoder(kwargs, frames, size, fps, workers):
+    """Preset/CRF for the final render from this machine's encoder curve (benchmarked once, then cached)."""
+    from encoder_tune import EncoderTuner, choose, estimate
+    from reel_render import ClipTimeline
+
+    def sample():  # two seconds from the middle of the actual timeline
+        source = ClipTimeline(**kwargs)
+        try:
+            first = max(0, frames // 2 - fps)
+            for index in range(first, min(frames, first + 2 * fps)):
+                yield source.frame(index)
+        finally:
+            source.close()
+
+    # A cache miss benchmarks inside this render: only when the budget can absorb it
+    budget = _render_budget()
+    tuner = EncoderTuner(ENCODER_TUNE_PATH)
+    started = time.perf_counter()
+    curve = tuner.curve(size, fps, sample, measure=budget is None or budget >= ENCODER_TUNE_MIN_BUDGET)
+    if curve is None:
+        print(f"🎛️ Encoder: {REEL_PRESET} crf {REEL_CRF}, no curve for this host and only {budget:.0f}s "
+              f"to render (benchmarking needs {ENCODER_TUNE_MIN_BUDGET:.0f}s)")
+        return REEL_PRESET, REEL_CRF
+    spent = time.perf_counter() - started if tuner.measured else 0.0
+    configured = estimate(curve, frames, REEL_PRESET, REEL_CRF, workers)
+    budget = _render_budget(configured.seconds if configured else None, spent)
+    pick = choose(curve, frames, budget, REEL_TARGET_MB * (1 << 20) if REEL_TARGET_MB else None, workers)
+    source = f", benchmark took {spent:.0f}s of the budget" if tuner.measured else (
+        f", scaled from {tuner.reused}" if tuner.reused else "")
+    print(f"🎛️ Encoder: {pick.preset} crf {pick.crf}, {pick.reason} (predicted {pick.seconds:.0f}s, "
+          f"{pick.bytes / (1 << 20):.1f}MB, SSIM {pick.ssim_db:.1f} dB{source})")
+    return pick.preset, pick.crf
+
+def _render_reel_segmented(clip_path, audio_path, duration, script, words, size, fps):
+    """Final reel render split into per-core chunks (reel_render.render_parallel): clip, captions, audio."""
+    from reel_render import ClipTimeline, render_parallel
+    if CAPTIONS_ENABLED and not words:
+        from captions import estimate_word_timings
+        words = estimate_word_timings(script, duration - 1)
+    frames = max(1, int(round(duration * fps)))
+    workers = max(1, min(RENDER_WORKERS or os.cpu_count() or 1, frames))
+    kwargs = {"clip_path": clip_path, "duration": duration, "size": size, "fps": fps,
+              "words": list(words) if CAPTIONS_ENABLED else None, "script": script, "caption_font": CAPTION_FONT}
+    if CAPTIONS_ENABLED:
+        print(f"💬 Captions: {len(words)} words")
+    preset, crf = REEL_PRESET, REEL_CRF
+    if REEL_AUTOTUNE:
+        try:
+            preset, crf = _tune_encoder(kwargs, frames, size, fps, workers)
+        except Exception as e:
+            print(f"⚠️ Encoder autotune failed ({e}), using {REEL_PRESET} crf {REEL_CRF}")
+    print(f"🧩 Rendering {frames} frames in {workers} chunk(s) ({preset}, crf {crf})")
+    started = time.perf_counter()
+    data = render_parallel(ClipTimeline, kwargs, frames, size, fps, workers=workers, preset=preset,
+                           crf=crf, audio_path=audio_path)
+    seconds = time.perf_counter() - started
+    print(f"    ⏱️ {seconds:.1f}s ({frames / seconds:.1f} frames/s)")
+    return data
+
+def _new_message(recipient=None):
+    """Empty multipart message with From/To and a Message-ID (so a follow-up can thread to it)."""
+    from email.mime.multipart import MIMEMultipart
+    from email.utils import make_msgid
     msg = MIMEMultipart()
     msg['From'] = YOUR_EMAIL
-    msg['To'] = YOUR_EMAIL
-    
-    has_reel = reel_data is not None
-    msg['Subject'] = 'Your Daily Astroboli Post & Reel are Ready!' if has_reel else 'Your Daily Astroboli Post is Ready!'
-    
-    # Email body
+    msg['To'] = recipient or YOUR_EMAIL
+    msg['Message-ID'] = make_msgid(domain=(YOUR_EMAIL or '').rpartition('@')[2] or 'astroboli.local')
+    return msg
+
+def _reel_section(has_reel, video_prompt=None, pending=False):
+    """HTML block describing the reel: attached, failed (with a manual video prompt), or to follow."""
+    if pending:
+        return """
+    <div style="background: #EBF8FF; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3182CE;">
+        <h3 style="color: #2A4365; margin-top: 0;">🎬 Reel on its way</h3>
+        <p style="color: #2C5282;">The reel is still rendering and will arrive as a reply to this email.</p>
+    </div>
+    """
     if has_reel:
         reel_section = """
     <div style="background: #E6FFFA; padding: 15px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #38B2AC;">
@@ -1194,11 +1926,47 @@ def send_email(image_data, caption, reel_data=None, video_prompt=None):
     """
     else:
         reel_section = ""
+    return reel_section
+
+def _attach_reel(msg, reel_data, streamed=False):
+    """Attach the reel as base64. With streamed=True the encoding is deferred to _smtp_send, which
+    writes it straight from the buffer (bytes or a spooled mmap) onto the socket."""
+    import base64
+    from email.mime.base import MIMEBase
+    reel = MIMEBase('video', 'mp4')
+    if streamed:
+        reel.streamed_payload = reel_data
+    else:
+        reel.set_payload(base64.encodebytes(reel_data).decode('ascii'))
+    reel['Content-Transfer-Encoding'] = 'base64'
+    reel.add_header('Content-Disposition', 'attachment', filename='astroboli_reel.mp4')
+    msg.attach(reel)
+    print("Reel attached to email")
+
+def _post_subject(title, has_reel=False, reel_pending=False):
+    if has_reel:
+        return f'Your Daily {title} Post & Reel are Ready!'
+    return f'Your Daily {title} Post is Ready!' + (' (reel to follow)' if reel_pending else '')
+
+def _build_email_message(image_data, caption, reel_data=None, video_prompt=None, recipient=None, title="Astroboli",
+                         reel_pending=False, streamed=False):
+    """Assemble the MIME message with the post image, caption and optional reel.
+
+    With reel_pending the reel is announced as a follow-up (split delivery). With streamed
+    the reel is only base64-encoded while _smtp_send writes it out.
+    """
+    from email.mime.image import MIMEImage
+    from email.mime.text import MIMEText
+    
+    msg = _new_message(recipient)
+    has_reel = reel_data is not None
+    msg['Subject'] = _post_subject(title, has_reel, reel_pending)
+    reel_section = _reel_section(has_reel, video_prompt, pending=reel_pending and not has_reel)
     
     body = f"""
 <html>
 <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-    <h2 style="color: #4A5568;">✨ Daily Astroboli Content Ready!</h2>
+    <h2 style="color: #4A5568;">✨ Daily {title} Content Ready!</h2>
     
     <p>Your mystical content for today has been generated and is ready to share on Instagram.</p>
     
@@ -1229,34 +1997,516 @@ def send_email(image_data, caption, reel_data=None, video_prompt=None):
     msg.attach(MIMEText(body, 'html'))
     
     # Attach image
-    image = MIMEImage(image_data, name='astroboli_post.jpg')
+    image = MIMEImage(bytes(image_data), name='astroboli_post.jpg')
     msg.attach(image)
     
     # Attach reel if available
     if reel_data:
-        reel = MIMEBase('video', 'mp4')
-        reel.set_payload(reel_data)
-        encoders.encode_base64(reel)
-        reel.add_header('Content-Disposition', 'attachment', filename='astroboli_reel.mp4')
-        msg.attach(reel)
-        print("Reel attached to email")
+        _attach_reel(msg, reel_data, streamed)
+    
+    return msg
+
+def _build_reel_followup(reel_data, video_prompt=None, in_reply_to=None, recipient=None, title="Astroboli",
+                         streamed=False):
+    """Reply to the split-delivery post email carrying the reel (or the manual video prompt)."""
+    from email.mime.text import MIMEText
+    msg = _new_message(recipient)
+    msg['Subject'] = f"Re: {_post_subject(title, reel_pending=True)}"
+    if in_reply_to:
+        msg['In-Reply-To'] = in_reply_to
+        msg['References'] = in_reply_to
+    body = f"""
+<html>
+<body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+    <h2 style="color: #4A5568;">🎬 Your {title} Reel</h2>
+    {_reel_section(reel_data is not None, video_prompt)}
+    <p style="color: #718096; font-size: 14px;">Use the caption from the post email above.</p>
+</body>
+</html>
+"""
+    msg.attach(MIMEText(body, 'html'))
+    if reel_data:
+        _attach_reel(msg, reel_data, streamed)
+    return msg
+
+def _smtp_send(msg):
+    """Send through one shared SMTP session, reconnecting if the server dropped it."""
+    import smtplib
+    global _smtp_conn
+    with _smtp_lock:
+        if _smtp_conn is not None:
+            try:
+                if _smtp_conn.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                _smtp_conn = None
+        if _smtp_conn is None:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=120)
+            if SMTP_STARTTLS:
+                server.starttls()
+            server.login(YOUR_EMAIL, EMAIL_PASSWORD)
+            _smtp_conn = server
+        spool, streams = _flatten_message(msg)
+        with spool:
+            _smtp_send_spooled(_smtp_conn, msg, spool, streams)
+
+def _flatten_message(msg):
+    """Serialize msg (CRLF line endings) into a temp file that spills to disk past the memory headroom.
+
+    Parts with a `streamed_payload` are flattened as a one-line placeholder token; returns
+    (spool, {token line: raw buffer}) so the sender can splice in their base64 on the fly.
+    """
+    import uuid
+    from email.generator import BytesGenerator
+    streams = {}
+    for part in msg.walk():
+        raw = getattr(part, 'streamed_payload', None)
+        if raw is not None:
+            token = f"streamed-payload-{uuid.uuid4().hex}"
+            part.set_payload(token)
+            streams[token.encode('ascii') + b"\r\n"] = raw
+    spool = _memory.spool_file() if _memory is not None else tempfile.SpooledTemporaryFile(max_size=64 << 20)
+    BytesGenerator(spool, policy=msg.policy).flatten(msg, linesep='\r\n')
+    spool.seek(0)
+    return spool, streams
+
+def _base64_lines(raw, block=57 * 1024):
+    """CRLF-terminated 76-column base64 lines of a buffer, encoded block by block."""
+    import base64
+    view = memoryview(raw)
+    for start in range(0, len(view), block):
+        yield base64.encodebytes(view[start:start + block]).replace(b"\n", b"\r\n")
+
+def _smtp_send_spooled(server, msg, spool, streams=None, block=1 << 16):
+    """SMTP transaction streaming DATA from `spool` in dot-stuffed blocks (no whole-message copies)."""
+    import smtplib
+    from email.utils import getaddresses
+    sender = getaddresses([msg['From']])[0][1]
+    recipients = [addr for _, addr in getaddresses(msg.get_all('To', []) + msg.get_all('Cc', []))]
+    server.ehlo_or_helo_if_needed()
+    code, resp = server.mail(sender)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    for addr in recipients:
+        code, resp = server.rcpt(addr)
+        if code not in (250, 251):
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused({addr: (code, resp)})
+    code, resp = server.docmd("data")
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, resp)
+    pending, size, last = [], 0, b"\r\n"
+    for line in spool:
+        if streams and line in streams:
+            server.send(b"".join(pending))
+            pending, size = [], 0
+            for encoded in _base64_lines(streams[line]):  # base64 lines never start with "."
+                server.send(encoded)
+            continue
+        if line[:1] == b".":
+            line = b"." + line
+        pending.append(line)
+        size += len(line)
+        last = line
+        if size >= block:
+            server.send(b"".join(pending))
+            pending, size = [], 0
+    if not last.endswith(b"\r\n"):
+        pending.append(b"\r\n")
+    pending.append(b".\r\n")
+    server.send(b"".join(pending))
+    code, resp = server.getreply()
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPDataError(code, resp)
+
+def _close_smtp():
+    global _smtp_conn
+    with _smtp_lock:
+        if _smtp_conn is not None:
+            import smtplib
+            try:
+                _smtp_conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            _smtp_conn = None
+
+def send_email(image_data, caption, reel_data=None, video_prompt=None, recipient=None, title="Astroboli",
+               reel_pending=False):
+    """Sends email with image, caption, and optional reel. If reel failed, includes video_prompt for manual creation.
+
+    Returns the Message-ID of the sent email.
+    """
+    print("Sending email...")
+    
+    msg = _build_email_message(image_data, caption, reel_data, video_prompt, recipient, title, reel_pending,
+                               streamed=True)
     
     # Send via Gmail SMTP
     try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(YOUR_EMAIL, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+        _smtp_send(msg)
         print("Email sent successfully!")
     except Exception as e:
         raise Exception(f"Failed to send email: {e}")
+    return msg['Message-ID']
 
-def main():
+def send_reel_followup(reel_data, video_prompt=None, in_reply_to=None, recipient=None, title="Astroboli"):
+    """Send the reel (or the manual video prompt) as a reply to the post email. Returns its Message-ID."""
+    print("Sending reel follow-up email...")
+    msg = _build_reel_followup(reel_data, video_prompt, in_reply_to, recipient, title, streamed=True)
+    try:
+        _smtp_send(msg)
+        print("Reel follow-up sent successfully!")
+    except Exception as e:
+        raise Exception(f"Failed to send reel follow-up email: {e}")
+    return msg['Message-ID']
+
+def _generate_mock_content():
+    """Deterministic mock content for reliable tests without a Gemini key."""
+    image_prompt = "Ethereal cosmic scene, gold and indigo palette, glowing stars, soft volumetric fog, intricate star textures, 1:1 aspect, 1080x1080, no watermark"
+    caption = "Astroboli AI - Today's cosmic energy: embrace small shifts. — Visit https://astroboli.com\n\n#AstroboliAI #astrology #numerology #horoscope #zodiac"
+    hashtags = ['#AstroboliAI', '#astrology', '#numerology', '#horoscope', '#zodiac']
+    return image_prompt, caption, {'hashtags': hashtags}
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Astroboli daily bot')
     parser.add_argument('--dry-run', action='store_true', help='Only generate content and validate hashtags (do not download image or send email)')
     parser.add_argument('--mock', action='store_true', help='Use a mock response instead of calling Gemini (for testing without API key)')
-    args = parser.parse_args()
+    parser.add_argument('--tenants', metavar='PATH', help='JSON tenant config: run one branded feed per tenant (see tenants.example.json)')
+    parser.add_argument('--tenant', action='append', metavar='NAME', help='Only run the named tenant(s) from --tenants')
+    parser.add_argument('--workers', type=int, default=4, help='Max tenants processed in parallel (default: 4)')
+    parser.add_argument('--daemon', action='store_true', help='Stay resident: warm clients, internal scheduler, idle pre-generation')
+    parser.add_argument('--schedule', default=os.environ.get("BOT_SCHEDULE", "0 10 * * *"), help="Daemon cron schedule in UTC (default: '0 10 * * *')")
+    parser.add_argument('--pregen-ahead', type=int, default=1, help='Posts per tenant to pre-generate while idle (default: 1)')
+    parser.add_argument('--control', default=None, help='Daemon control socket path, or tcp:HOST:PORT')
+    parser.add_argument('--ctl', metavar='COMMAND', help="Send a command to a running daemon: status, trigger [tenant], pregen [tenant], stop")
+    parser.add_argument('--resume', metavar='RUN_ID', help='Resume a failed run from RUNS_DIR, skipping stages whose artifacts are intact')
+    parser.add_argument('--split-delivery', action='store_true', default=SPLIT_DELIVERY,
+                        help='Email the image and caption as soon as they are ready; the reel follows as a reply')
+    parser.add_argument('--memory-report', action='store_true', default=MEMORY_REPORT,
+                        help='Trace per-stage peak memory (tracemalloc + RSS); saved as memory.json in the run directory')
+    parser.add_argument('--serve', action='store_true',
+                        help='Serve posts from RUNS_DIR over HTTP (content_server.py); with --daemon, alongside it')
+    parser.add_argument('--profile', action='store_true', default=PROFILE_STAGES,
+                        help='Sample CPU stacks per stage; collapsed stacks and HTML flamegraphs go to the run directory')
+    return parser
+
+def prepare_post(args, timings=None, tenant=None, run=None, on_image=None):
+    """Generate everything for one post (content, image, reel) without delivering it.
+
+    With a run directory every stage's output is checkpointed there, and stages that
+    already have an intact artifact are loaded instead of regenerated. `on_image(post)`
+    is called with the partial post as soon as the processed image exists, before the reel.
+    """
+    timings = {} if timings is None else timings
+    settings = _tenant_settings(tenant)
+
+    # 1. Generate Content
+    with _timed_stage(timings, 'content'):
+        if run is not None and run.has('content'):
+            content = run.read_json('content')
+            brand_name, prompt, caption, meta = content["brand_name"], content["prompt"], content["caption"], content["meta"]
+            print(f"♻️ content: reusing content.json from run {run.run_id}")
+        else:
+            brand_name = random.choice(settings["brands"])
+            if args.mock:
+                # Use deterministic mock data for reliable tests
+                prompt, caption, meta = _generate_mock_content()
+            else:
+                prompt, caption, meta = generate_astro_content(settings, brand_name)
+            if run is not None:
+                for stage in ('image_raw', 'post', 'video_prompt', 'voiceover', 'ai_clip', 'reel'):
+                    run.forget(stage)  # downstream artifacts belong to the old content
+                run.save_json('content', 'content.json',
+                              {"brand_name": brand_name, "prompt": prompt, "caption": caption, "meta": meta})
+    print(f"Prompt: {prompt}")
+    print(f"Caption:\n{caption}")
+
+    # If dry-run, validate hashtags and exit
+    if args.dry_run:
+        tags = meta.get('hashtags') if isinstance(meta, dict) else []
+        print(f"Hashtags generated: {tags}")
+        if not isinstance(tags, list) or len(tags) != 5:
+            print("Validation failed: hashtags must be a list of exactly 5 items.")
+            exit(2)
+        if not any(t.lower() == '#astroboliai' for t in tags):
+            print("Validation failed: #AstroboliAI must be present in hashtags.")
+            exit(3)
+        print("Dry-run validation passed: 5 hashtags (including #AstroboliAI) found.")
+        exit(0)
+
+    # 2-3. Get Image URL and download it (reseeded if blank or a repeat of an earlier image)
+    if run is not None and not run.has('image_raw'):
+        run.forget('post')
+    with _timed_stage(timings, 'download_image'):
+        image_data = _checkpoint_bytes(run, 'image_raw', 'image_raw.jpg', lambda: download_unique_image(
+            prompt, settings["image_model"], ref=run.run_id if run is not None else settings["name"]))
+    
+    # 4. Process image for Instagram (1:1 ratio, 1080x1080)
+    with _timed_stage(timings, 'process_image'):
+        processed_image = _checkpoint_bytes(run, 'post', 'post.jpg', lambda: process_for_instagram(image_data))
+    image_data, processed_image = _keep(image_data, 'image_raw'), _keep(processed_image, 'post')
+    post = {
+        "run": run,
+        "settings": settings,
+        "brand_name": brand_name,
+        "prompt": prompt,
+        "caption": caption,
+        "meta": meta,
+        "image_data": image_data,
+        "processed_image": processed_image,
+    }
+    if on_image is not None:
+        on_image(dict(post))
+    
+    # 5. Generate Instagram Reel (animated video from image)
+    # Video prompt for manual creation if automation fails (generated dynamically)
+    # (structured generation already returned one with the content)
+    with _timed_stage(timings, 'video_prompt'):
+        planned = meta.get('video_prompt') if isinstance(meta, dict) else None
+        video_prompt = _checkpoint_bytes(run, 'video_prompt', 'video_prompt.txt',
+                                         lambda: (planned or generate_video_prompt(settings)).encode('utf-8')).decode('utf-8')
+    
+    with _timed_stage(timings, 'reel'):
+        reel_data = _checkpoint_bytes(run, 'reel', 'reel.mp4', lambda: generate_reel(
+            image_data, caption, brand_name, provider_names=settings["video_providers"],
+            website=settings["website"], run=run))
+    reel_data = _keep(reel_data, 'reel')
+    
+    post.update(video_prompt=video_prompt, reel_data=reel_data, created=time.time())
+    return post
+
+def deliver_image_first(post, timings=None):
+    """Split delivery, part 1: email the post image and caption, announcing the reel as a follow-up.
+
+    Returns the Message-ID the reel email should reply to (recorded in the run, so a resumed
+    run replies to the email that was already sent).
+    """
+    timings = {} if timings is None else timings
+    settings = post["settings"]
+    run = post.get("run")
+    if run is not None and (run.has('email_post') or run.has('email')):
+        return run.manifest['stages'].get('email_post', {}).get('message_id')
+    with _timed_stage(timings, 'email_post'):
+        message_id = send_email(post["processed_image"], post["caption"], recipient=settings["recipient"],
+                                title=settings["title"], reel_pending=True)
+    if run is not None:
+        run.mark('email_post', recipient=settings["recipient"] or YOUR_EMAIL, message_id=message_id)
+    return message_id
+
+def deliver_post(post, timings=None):
+    """Send a prepared post by email (step 6).
+
+    If the image already went out on its own (split delivery, `post["reply_to"]` or an
+    `email_post` stage in the run), only the reel follow-up is sent, threaded to it.
+    """
+    timings = {} if timings is None else timings
+    settings = post["settings"]
+    reel_data = post["reel_data"]
+    run = post.get("run")
+    if run is not None and run.has('email'):
+        print(f"📭 Run {run.run_id} was already emailed; not sending again")
+        return timings
+    reply_to = post.get("reply_to")
+    if reply_to is None and run is not None and run.has('email_post'):
+        reply_to = run.manifest['stages']['email_post'].get('message_id')
+    # 6. Send Email with post image and reel (or video prompt if reel failed)
+    with _timed_stage(timings, 'email'):
+        if reply_to:
+            send_reel_followup(reel_data, post["video_prompt"] if reel_data is None else None, in_reply_to=reply_to,
+                               recipient=settings["recipient"], title=settings["title"])
+        else:
+            send_email(post["processed_image"], post["caption"], reel_data,
+                       video_prompt=post["video_prompt"] if reel_data is None else None,
+                       recipient=settings["recipient"], title=settings["title"])
+    if run is not None:
+        run.mark('email', recipient=settings["recipient"] or YOUR_EMAIL, with_reel=reel_data is not None)
+    return timings
+
+def _new_run_dir(settings):
+    """Create a run directory under RUNS_DIR, or return None when checkpointing is disabled."""
+    if not RUNS_DIR:
+        return None
+    from run_store import new_run
+    label = "".join(c if c.isalnum() or c in "-_" else "-" for c in settings["name"])
+    run = new_run(RUNS_DIR, label, settings)
+    print(f"📁 Run {run.run_id}: artifacts in {run.path}")
+    return run
+
+def run_pipeline(args, timings=None, tenant=None, run=None):
+    """Run one post generation + delivery. Returns per-stage wall-clock timings in seconds.
+
+    Unless this is a dry run, artifacts go to a run directory (a new one unless `run` is given)
+    so a failure can be retried with --resume <run-id>.
+    """
+    timings = {} if timings is None else timings
+    if run is None and not args.dry_run:
+        run = _new_run_dir(_tenant_settings(tenant))
+    try:
+        with _scratch_workspace(run.run_id if run is not None else _tenant_settings(tenant)["name"]):
+            if getattr(args, 'split_delivery', False) and not args.dry_run:
+                _run_split_delivery(args, timings, tenant, run)
+            else:
+                post = prepare_post(args, timings, tenant, run)
+                deliver_post(post, timings)
+    except Exception:
+        if run is not None:
+            print(f"💾 Artifacts kept in {run.path}; retry with: python daily_bot.py --resume {run.run_id}")
+        raise
+    finally:
+        _report_memory(run)
+        _report_profile(run, timings)
+    if run is not None and RUNS_KEEP >= 0:
+        from run_store import prune_runs
+        prune_runs(RUNS_DIR, RUNS_KEEP)
+    print("\n✨ Done! Check your email for today's post and reel.")
+    return timings
+
+def _run_split_delivery(args, timings, tenant, run):
+    """prepare_post + deliver_post, with the image email sent on a side thread while the reel renders."""
+    from concurrent.futures import ThreadPoolExecutor
+    started = time.perf_counter()
+    first = {}
+
+    def send_first(partial):
+        reply_to = deliver_image_first(partial, timings)
+        print(f"📨 Post image delivered {time.perf_counter() - started:.1f}s into the run; reel follows")
+        return reply_to
+
+    with ThreadPoolExecutor(max_workers=1) as mailer:
+        post = prepare_post(args, timings, tenant, run,
+                            on_image=lambda partial: first.setdefault("future", mailer.submit(send_first, partial)))
+        post["reply_to"] = first["future"].result()
+    deliver_post(post, timings)
+
+def load_tenants(path, names=None):
+    """Load tenant entries from a JSON file: {"defaults": {...}, "tenants": [{...}, ...]}."""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    defaults = config.get("defaults", {})
+    tenants = []
+    for entry in config.get("tenants", []):
+        tenant = dict(defaults)
+        tenant.update(entry)
+        if not tenant.get("name"):
+            raise ValueError(f"Tenant entry without a name in {path}")
+        if names and tenant["name"] not in names:
+            continue
+        tenants.append(tenant)
+    return tenants
+
+def run_tenants(args, tenants, workers=4):
+    """Run every tenant's pipeline on a bounded thread pool; one tenant's failure never stops the others.
+
+    The shared HTTP session, Gemini model and SMTP connection are reused across tenants.
+    Returns a list of {name, ok, error, seconds, timings} dicts in tenant order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run_one(tenant):
+        timings = {}
+        start = time.perf_counter()
+        try:
+            run_pipeline(args, timings, tenant)
+            return {"name": tenant["name"], "ok": True, "error": None,
+                    "seconds": time.perf_counter() - start, "timings": timings}
+        except Exception as e:
+            print(f"❌ Tenant {tenant['name']} failed: {e}")
+            return {"name": tenant["name"], "ok": False, "error": str(e),
+                    "seconds": time.perf_counter() - start, "timings": timings}
+
+    print(f"🏢 Running {len(tenants)} tenants on {workers} workers...")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run_one, tenants))
+
+    print("\n📊 Tenant summary:")
+    for r in results:
+        stages = ", ".join(f"{k}={v:.1f}s" for k, v in r["timings"].items())
+        status = "✅" if r["ok"] else f"❌ {r['error']}"
+        print(f"  {r['name']}: {status} ({r['seconds']:.1f}s) {stages}")
+    return results
+
+def _warm_up():
+    """Load heavy modules, codecs, the Gemini client and a browser once so daemon runs start hot."""
+    from PIL import Image
+    try:
+        from moviepy.video.io.VideoFileClip import VideoFileClip  # noqa: F401
+        from moviepy.audio.io.AudioFileClip import AudioFileClip  # noqa: F401
+        import imageio_ffmpeg
+        import subprocess
+        subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-version"], capture_output=True, timeout=30)
+    except Exception as e:
+        print(f"⚠️ Video stack warmup skipped: {e}")
+    Image.new("RGB", (8, 8)).resize((16, 16), Image.Resampling.LANCZOS)
+    if GEMINI_API_KEY:
+        _gemini().warm(_ASTRO_SYSTEM_INSTRUCTION)
+    _http()
+    if "browser" in VIDEO_PROVIDER_ORDER:
+        start_warm_browser()
+
+def run_daemon(args, tenants):
+    """Stay resident and deliver on args.schedule, pre-generating posts while idle."""
+    from bot_daemon import BotDaemon
+
+    by_name = {t["name"]: t for t in tenants}
+
+    def prepare(name):
+        timings = {}
+        run = _new_run_dir(_tenant_settings(by_name[name]))
+        try:
+            with _scratch_workspace(run.run_id if run is not None else name):
+                post = prepare_post(args, timings, by_name[name], run)
+        finally:
+            _report_profile(run, timings)
+        print(f"📦 Prepared post for {name}: " + ", ".join(f"{k}={v:.1f}s" for k, v in timings.items()))
+        return post
+
+    def deliver(name, post):
+        timings = {}
+        try:
+            deliver_post(post, timings)
+        finally:
+            _report_profile(post.get("run"), timings)
+        age = time.time() - post["created"]
+        print(f"📬 Delivered {name} in {timings['email']:.1f}s (post prepared {age / 60:.0f} min ago)")
+        if post.get("run") is not None and RUNS_KEEP >= 0:
+            from run_store import prune_runs
+            prune_runs(RUNS_DIR, RUNS_KEEP)
+
+    daemon = BotDaemon(args.schedule, prepare, deliver, keys=list(by_name), warmup=_warm_up,
+                       shutdown=stop_warm_browser, ahead=args.pregen_ahead, control_address=args.control)
+    daemon.run()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    atexit.register(_close_smtp)
+    from workspace import install_signal_handlers
+    install_signal_handlers()
+    if MEMORY_BUDGET_MB or args.memory_report:
+        _start_memory_monitor(trace=args.memory_report)
+    if args.profile:
+        _start_profiler()
+
+    if args.ctl:
+        from bot_daemon import default_control_address, send_command
+        reply = send_command(args.control or default_control_address(), args.ctl)
+        print(json.dumps(reply, indent=2))
+        exit(1 if "error" in reply else 0)
+
+    if args.serve:
+        from content_server import ContentServer
+        server = ContentServer(RUNS_DIR or "runs", CONTENT_API_TOKEN)
+        if not args.daemon:
+            import asyncio
+            try:
+                asyncio.run(server.serve_forever(CONTENT_API_HOST, CONTENT_API_PORT))
+            except KeyboardInterrupt:
+                pass
+            return
+        host, port = server.start_in_thread(CONTENT_API_HOST, CONTENT_API_PORT)
+        print(f"📡 Content API on http://{host}:{port}/posts")
 
     # If not mocking, ensure credentials are set
     if not args.mock:
@@ -1266,58 +2516,55 @@ def main():
             print("Required: GEMINI_API_KEY, YOUR_EMAIL, EMAIL_PASSWORD")
             exit(1)
 
-    try:
-        # 1. Generate Content
-        if args.mock:
-            # Use deterministic mock data for reliable tests
-            def generate_mock_content():
-                image_prompt = "Ethereal cosmic scene, gold and indigo palette, glowing stars, soft volumetric fog, intricate star textures, 1:1 aspect, 1080x1080, no watermark"
-                caption = "Astroboli AI - Today's cosmic energy: embrace small shifts. — Visit https://astroboli.com\n\n#AstroboliAI #astrology #numerology #horoscope #zodiac"
-                hashtags = ['#AstroboliAI', '#astrology', '#numerology', '#horoscope', '#zodiac']
-                return image_prompt, caption, {'hashtags': hashtags}
-            prompt, caption, meta = generate_mock_content()
-        else:
-            prompt, caption, meta = generate_astro_content()
-        print(f"Prompt: {prompt}")
-        print(f"Caption:\n{caption}")
+    if args.daemon:
+        if args.dry_run:
+            print("ERROR: --dry-run is not supported with --daemon.")
+            exit(1)
+        tenants = load_tenants(args.tenants, args.tenant) if args.tenants else [_tenant_settings()]
+        run_daemon(args, tenants)
+        return
+
+    if args.resume:
+        if args.tenants or args.dry_run:
+            print("ERROR: --resume cannot be combined with --tenants or --dry-run (the run stores its tenant).")
+            exit(1)
+        from run_store import open_run
+        try:
+            run = open_run(RUNS_DIR or "runs", args.resume)
+        except FileNotFoundError:
+            print(f"ERROR: no run {args.resume!r} under {RUNS_DIR or 'runs'}/")
+            exit(1)
+        done = [stage for stage in run.manifest["stages"] if run.has(stage)]
+        print(f"🔁 Resuming run {run.run_id} (done: {', '.join(done) or 'nothing'})")
+        try:
+            timings = run_pipeline(args, tenant=run.settings, run=run)
+            print("⏱️ Stage timings: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+            _print_gemini_usage()
+            _print_quota_usage()
+        except Exception as e:
+            print(f"Error: {e}")
+            exit(1)
+        return
 
-        # If dry-run, validate hashtags and exit
+    if args.tenants:
         if args.dry_run:
-            tags = meta.get('hashtags') if isinstance(meta, dict) else []
-            print(f"Hashtags generated: {tags}")
-            if not isinstance(tags, list) or len(tags) != 5:
-                print("Validation failed: hashtags must be a list of exactly 5 items.")
-                exit(2)
-            if not any(t.lower() == '#astroboliai' for t in tags):
-                print("Validation failed: #AstroboliAI must be present in hashtags.")
-                exit(3)
-            print("Dry-run validation passed: 5 hashtags (including #AstroboliAI) found.")
-            exit(0)
-
-        # 2. Get Image URL
-        image_url = get_image_url(prompt)
-        print(f"🖼️ Image URL: {image_url}")
-        
-        # 3. Download Image
-        image_data = download_image(image_url)
-        
-        # 4. Process image for Instagram (1:1 ratio, 1080x1080)
-        processed_image = process_for_instagram(image_data)
-        
-        # 5. Generate Instagram Reel (animated video from image)
-        brand_variations = ["Astro Boli", "AstroBoli AI", "Astro AI", "AstroBoli", "Astro Boli AI"]
-        brand_name = random.choice(brand_variations)
-        
-        # Video prompt for manual creation if automation fails (generated dynamically)
-        video_prompt = generate_video_prompt()
-        
-        reel_data = generate_reel(image_data, caption, brand_name)
-        
-        # 6. Send Email with post image and reel (or video prompt if reel failed)
-        send_email(processed_image, caption, reel_data, video_prompt=video_prompt if reel_data is None else None)
-        
-        print("\n✨ Done! Check your email for today's post and reel.")
-        
+            print("ERROR: --dry-run is not supported with --tenants.")
+            exit(1)
+        tenants = load_tenants(args.tenants, args.tenant)
+        results = run_tenants(args, tenants, args.workers)
+        _print_gemini_usage()
+        _print_quota_usage()
+        failed = [r["name"] for r in results if not r["ok"]]
+        if failed:
+            print(f"Error: {len(failed)}/{len(results)} tenants failed: {', '.join(failed)}")
+            exit(1)
+        return
+
+    try:
+        timings = run_pipeline(args)
+        print("⏱️ Stage timings: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+        _print_gemini_usage()
+        _print_quota_usage()
     except Exception as e:
         print(f"Error: {e}")
         exit(1)
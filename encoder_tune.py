@@ -0,0 +1,245 @@
+"""Measured libx264 preset/CRF choice for the final reel: a speed/size/quality curve per machine.
+
+    tuner = EncoderTuner("history/encoder_tune.json")
+    curve = tuner.curve((1080, 1920), 24, sample=lambda: (timeline.frame(i) for i in range(120, 144)))
+    pick = choose(curve, frames=360, budget=240, max_bytes=18 << 20, workers=4)
+    pick.preset, pick.crf, pick.reason      # "faster", 20, "best quality within 240s and 18.0MB"
+
+On a cache miss the sample frames are encoded once, losslessly, as a reference clip. Each
+preset/CRF pair then re-encodes that reference with one encoder thread. The curve records
+per-core encode speed, bytes per frame, and SSIM against the reference. Speed comes from
+ffmpeg's own CPU time (-benchmark), with decoding the reference subtracted, so a busy
+machine skews it less than wall-clock timing would. It also records how long a sample frame took to produce. The curve
+is stored per host shape (core count and architecture) and frame size, with the CPU model
+and ffmpeg build kept alongside for reference. A miss for a new frame size reuses the same
+host shape's curve at the nearest size, scaled by pixel count, instead of benchmarking
+inside a render. curve(measure=False) returns None rather than benchmark on a full miss.
+
+choose() predicts each point's wall time as frame production spread over the render
+workers plus encoding spread over the encoder threads the render starts (each worker's
+share of the cores, as reel_render gives them), and its size from bytes per frame. Among the
+points that fit the time budget and the size cap, it takes the smallest file whose SSIM
+is within `tolerance` dB of the best. SSIM is compared in dB (-10 log10(1 - SSIM)), where
+steps between CRFs are even, rather than as raw values crowded just under 1. If nothing
+fits, speed wins over size, and size wins over quality.
+"""
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+from reel_render import FfmpegWriter, encoder_threads, ffmpeg_exe
+from workspace import scratch_dir
+
+PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow")
+CRFS = (20, 23, 26)
+
+
+@dataclass
+class Point:
+    preset: str
+    crf: int
+    encode_fps: float        # frames per second on one core
+    bytes_per_frame: float
+    ssim_db: float           # -10 log10(1 - SSIM) against the lossless reference
+
+
+@dataclass
+class Choice:
+    preset: str
+    crf: int
+    seconds: float           # predicted wall time of the render
+    bytes: float             # predicted size of the video stream
+    ssim_db: float
+    reason: str
+
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith(("model name", "Hardware", "cpu model")):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or "unknown"
+
+
+def fingerprint():
+    """{cpu, cores, arch, system, ffmpeg} of this host, stored with each curve it measures."""
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-version"], capture_output=True, text=True)
+    return {"cpu": _cpu_model(), "cores": os.cpu_count() or 1, "arch": platform.machine(),
+            "system": platform.system(), "ffmpeg": (result.stdout.splitlines() or ["?"])[0]}
+
+
+def _ffmpeg(*args):
+    """Run ffmpeg; returns (CPU seconds it reported, stderr)."""
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-nostats", "-benchmark", "-y", *args], capture_output=True)
+    log = result.stderr.decode("utf-8", "replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {log.strip()[-400:]}")
+    m = re.search(r"utime=([0-9.]+)s stime=([0-9.]+)s", log)
+    return (float(m.group(1)) + float(m.group(2)) if m else 0.0), log
+
+
+def benchmark(sample, size, fps=24, presets=PRESETS, crfs=CRFS, verbose=True):
+    """Measure every preset/CRF pair on the frames from `sample()`; returns (points, seconds per sample frame)."""
+    tmp = tempfile.mkdtemp(prefix="tune_", dir=scratch_dir())
+    reference = os.path.join(tmp, "reference.mp4")
+    if verbose:
+        print(f"🎛️ Benchmarking {len(presets) * len(crfs)} encoder settings at {size[0]}x{size[1]} on this host")
+    try:
+        started = time.perf_counter()
+        with FfmpegWriter(reference, size, fps, preset="ultrafast", crf=0) as out:   # crf 0: lossless
+            produce = 0.0
+            frames = iter(sample())
+            while True:
+                t0 = time.perf_counter()
+                frame = next(frames, None)
+                produce += time.perf_counter() - t0
+                if frame is None:
+                    break
+                out.write(frame)
+        count = out.frames
+        if not count:
+            raise ValueError("no sample frames to benchmark")
+        decode, _ = _ffmpeg("-threads", "1", "-i", reference, "-f", "null", "-")
+        points = []
+        for preset in presets:
+            for crf in crfs:
+                path = os.path.join(tmp, f"{preset}-{crf}.mp4")
+                seconds, _ = _ffmpeg("-threads", "1", "-i", reference, "-an", "-c:v", "libx264", "-preset", preset,
+                                     "-crf", str(crf), "-threads", "1", path)
+                _, log = _ffmpeg("-i", path, "-i", reference, "-lavfi", "ssim", "-f", "null", "-")
+                m = re.search(r"All:[0-9.]+ \(([0-9.]+|inf)\)", log)
+                point = Point(preset, crf, count / max(seconds - decode, 1e-3), os.path.getsize(path) / count,
+                              min(float(m.group(1)), 60.0) if m else 0.0)
+                points.append(point)
+                os.unlink(path)
+                if verbose:
+                    print(f"    {preset:>9} crf {crf}: {point.encode_fps:6.1f} fps/core, "
+                          f"{point.bytes_per_frame / 1024:6.1f} KB/frame, SSIM {point.ssim_db:.2f} dB")
+        if verbose:
+            elapsed = time.perf_counter() - started
+            print(f"    ⏱️ Benchmarked {len(points)} settings on {count} frames in {elapsed:.1f}s")
+        return points, produce / count
+    finally:
+        for name in os.listdir(tmp):
+            os.unlink(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+
+class EncoderTuner:
+    """Curves from `path` (JSON) keyed by core count, architecture and frame size; measured on a miss."""
+
+    def __init__(self, path, presets=PRESETS, crfs=CRFS):
+        self.path = path
+        self.presets = presets
+        self.crfs = crfs
+        self.machine = fingerprint()
+        self.measured = False
+        self.reused = None       # key of the curve the last miss was scaled from
+
+    def key(self, size):
+        return f"{self.machine['cores']}c-{self.machine['arch']}-{size[0]}x{size[1]}"
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _nearest(self, cache, size):
+        """This host shape's cached curve closest in pixel count to `size`, scaled to it; None if there is none."""
+        area = size[0] * size[1]
+        best = None
+        for key, entry in cache.items():
+            measured = entry.get("size")
+            if not measured or [entry["machine"].get(k) for k in ("cores", "arch")] != \
+                    [self.machine["cores"], self.machine["arch"]]:
+                continue
+            ratio = area / (measured[0] * measured[1])
+            if best is None or abs(math.log(ratio)) < abs(math.log(best[0])):
+                best = (ratio, key, entry)
+        if best is None:
+            return None
+        ratio, self.reused, entry = best
+        return {"points": [Point(**dict(p, encode_fps=p["encode_fps"] / ratio,
+                                        bytes_per_frame=p["bytes_per_frame"] * ratio)) for p in entry["points"]],
+                "frame_seconds": entry["frame_seconds"] * ratio}
+
+    def curve(self, size, fps, sample, refresh=False, measure=True):
+        """{"points": [Point], "frame_seconds": s} for this host, benchmarking `sample()` if nothing fits.
+
+        A miss reuses the nearest-size curve measured on the same core count and architecture.
+        With `measure=False`, a miss with nothing to reuse returns None instead of benchmarking.
+        """
+        key = self.key(size)
+        cache = self._load()
+        self.measured, self.reused = False, None
+        if not refresh:
+            if key in cache:
+                cached = cache[key]
+                return {"points": [Point(**p) for p in cached["points"]], "frame_seconds": cached["frame_seconds"]}
+            nearest = self._nearest(cache, size)
+            if nearest is not None:
+                return nearest
+        if not measure:
+            return None
+        points, frame_seconds = benchmark(sample, size, fps, self.presets, self.crfs)
+        self.measured = True
+        cache = self._load()
+        cache[key] = {"machine": self.machine, "size": list(size), "measured": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                      "fps": fps, "frame_seconds": frame_seconds, "points": [asdict(p) for p in points]}
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, self.path)
+        return {"points": points, "frame_seconds": frame_seconds}
+
+
+def _predict(curve, point, frames, workers, cores):
+    cores = max(1, cores or os.cpu_count() or 1)
+    workers = max(1, min(workers, cores))
+    threads = workers * encoder_threads(workers, cores)
+    seconds = frames * curve["frame_seconds"] / workers + frames / (point.encode_fps * threads)
+    return Choice(point.preset, point.crf, seconds, frames * point.bytes_per_frame, point.ssim_db, "")
+
+
+def estimate(curve, frames, preset, crf, workers=1, cores=None):
+    """Predicted Choice for a given preset/CRF, or None if the curve has no such point."""
+    for point in curve["points"]:
+        if point.preset == preset and point.crf == crf:
+            return _predict(curve, point, frames, workers, cores)
+    return None
+
+
+def choose(curve, frames, budget=None, max_bytes=None, workers=1, cores=None, tolerance=0.25):
+    """The preset/CRF to render `frames` frames with, given a time budget (s) and a size cap (bytes)."""
+    options = [_predict(curve, p, frames, workers, cores) for p in curve["points"]]
+    if not options:
+        raise ValueError("empty encoder curve")
+    in_time = [c for c in options if budget is None or c.seconds <= budget]
+    fits = [c for c in in_time if max_bytes is None or c.bytes <= max_bytes]
+    limits = " and ".join(filter(None, [f"{budget:.0f}s" if budget is not None else "",
+                                        f"{max_bytes / (1 << 20):.1f}MB" if max_bytes is not None else ""]))
+    if fits:
+        best = max(c.ssim_db for c in fits)
+        pick = min((c for c in fits if c.ssim_db >= best - tolerance), key=lambda c: c.bytes)
+        pick.reason = f"best quality within {limits}" if limits else "best quality"
+    elif in_time:
+        pick = min(in_time, key=lambda c: c.bytes)
+        within = f" within {budget:.0f}s" if budget is not None else ""
+        pick.reason = f"smallest{within} (nothing fits {max_bytes / (1 << 20):.1f}MB)"
+    else:
+        pick = min(options, key=lambda c: c.seconds)
+        pick.reason = f"fastest (nothing fits {budget:.0f}s)"
+    return pick
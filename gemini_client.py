@@ -0,0 +1,129 @@
+"""Shared Gemini client: configure the SDK once, keep static instructions apart from per-call text,
+use context caching where it is available and account for every call's tokens.
+
+    client = GeminiClient(api_key, endpoint=None)
+    text = client.generate(request_text, system=STATIC_RULES, schema=None, label="content")
+    client.usage[-1]   # {"label", "model", "prompt", "cached", "output", "seconds", "cache"}
+    client.totals()
+
+With a `limiter` (rate_limit.RateLimiter) every generate call first takes a "gemini" slot,
+and a 429 / ResourceExhausted answer pauses that provider for the other workers as well.
+
+A static system instruction is sent ahead of the per-call text, so Gemini 2.5 can serve it from
+its implicit prefix cache. When the instruction is long enough for explicit caching
+(`min_cache_tokens`, estimated at 4 characters per token) a CachedContent is created once and
+reused until shortly before its TTL runs out. If cache creation fails (unsupported model,
+quota, stand-in without caching), the client falls back to a plain system instruction
+and does not try again for that instruction.
+"""
+import datetime
+import hashlib
+import threading
+import time
+
+
+class GeminiClient:
+    """Thread-safe wrapper around google.generativeai shared by every tenant in the process."""
+
+    def __init__(self, api_key, endpoint=None, model="gemini-2.5-flash", cache_ttl=3600,
+                 explicit_cache=True, min_cache_tokens=1024, verbose=True, limiter=None):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.model_name = model
+        self.cache_ttl = cache_ttl
+        self.explicit_cache = explicit_cache
+        self.min_cache_tokens = min_cache_tokens
+        self.verbose = verbose
+        self.limiter = limiter
+        self.usage = []
+        self._lock = threading.Lock()
+        self._genai = None
+        self._models = {}        # (model, system digest) -> (GenerativeModel, expires_at or None, cache name)
+        self._no_cache = set()   # system digests whose cache creation failed
+
+    def _configure(self):
+        if self._genai is None:
+            import google.generativeai as genai
+            if self.endpoint:
+                genai.configure(api_key=self.api_key, transport="rest",
+                                client_options={"api_endpoint": self.endpoint})
+            else:
+                genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
+    def _model_for(self, system, model_name):
+        digest = hashlib.sha256(system.encode("utf-8")).hexdigest()[:16] if system else None
+        key = (model_name, digest)
+        with self._lock:
+            genai = self._configure()
+            entry = self._models.get(key)
+            if entry and (entry[1] is None or entry[1] - time.time() > 60):
+                return entry[0], entry[2]
+            model, expires, cache_name = None, None, None
+            if (system and self.explicit_cache and digest not in self._no_cache
+                    and len(system) // 4 >= self.min_cache_tokens):
+                try:
+                    cached = genai.caching.CachedContent.create(
+                        model=f"models/{model_name}", system_instruction=system, display_name=f"bot-{digest}",
+                        ttl=datetime.timedelta(seconds=self.cache_ttl))
+                    model = genai.GenerativeModel.from_cached_content(cached)
+                    expires, cache_name = time.time() + self.cache_ttl, cached.name
+                    if self.verbose:
+                        print(f"🗄️ Gemini context cache {cached.name} created ({len(system) // 4} tokens est.)")
+                except Exception as e:
+                    self._no_cache.add(digest)
+                    if self.verbose:
+                        print(f"⚠️ Gemini context caching unavailable ({str(e)[:120]}); using system instruction")
+            if model is None:
+                model = genai.GenerativeModel(model_name, system_instruction=system or None)
+            self._models[key] = (model, expires, cache_name)
+            return model, cache_name
+
+    def warm(self, system=None, model=None):
+        """Configure the SDK and build (or cache) the model for `system` ahead of the first call."""
+        self._model_for(system, model or self.model_name)
+
+    def generate(self, prompt, system=None, schema=None, label="gemini", model=None):
+        """Run one generate_content call and return the response text."""
+        model_name = model or self.model_name
+        gen_model, cache_name = self._model_for(system, model_name)
+        config = {"response_mime_type": "application/json", "response_schema": schema} if schema else None
+        if self.limiter is not None:
+            self.limiter.acquire("gemini")
+        started = time.perf_counter()
+        try:
+            response = gen_model.generate_content(prompt, generation_config=config)
+        except Exception as e:
+            if self.limiter is not None and (type(e).__name__ in ("ResourceExhausted", "TooManyRequests")
+                                             or "429" in str(e)[:200]):
+                self.limiter.backoff("gemini", getattr(e, "retry_after", None))
+            raise
+        seconds = time.perf_counter() - started
+        meta = getattr(response, "usage_metadata", None)
+        record = {
+            "label": label,
+            "model": model_name,
+            "prompt": getattr(meta, "prompt_token_count", 0) or 0,
+            "cached": getattr(meta, "cached_content_token_count", 0) or 0,
+            "output": getattr(meta, "candidates_token_count", 0) or 0,
+            "seconds": round(seconds, 3),
+            "cache": cache_name,
+        }
+        with self._lock:
+            self.usage.append(record)
+        if self.verbose:
+            print(f"🧮 Gemini {label}: {record['prompt']} prompt ({record['cached']} cached) + "
+                  f"{record['output']} output tokens in {seconds:.1f}s")
+        return response.text
+
+    def totals(self):
+        """Summed token counts and latency over every call so far."""
+        with self._lock:
+            usage = list(self.usage)
+        totals = {"calls": len(usage), "prompt": 0, "cached": 0, "output": 0, "seconds": 0.0}
+        for record in usage:
+            for field in ("prompt", "cached", "output", "seconds"):
+                totals[field] += record[field]
+        totals["seconds"] = round(totals["seconds"], 3)
+        return totals
@@ -0,0 +1,149 @@
+"""Perceptual fingerprints for downloaded images and an on-disk index for near-duplicate lookups.
+
+    fp = fingerprint(image_bytes)        # pHash + dHash + contrast/entropy, a few ms per JPEG
+    fp.degenerate()                      # "blank (contrast 1.2)" / None
+    index = ImageIndex("history/image_index.sqlite")
+    distance, ref = index.nearest(fp.phash, max_distance=6)
+    index.add(fp, ref="run-id")
+
+Lookups use multi-index hashing. The 64-bit pHash is split into 4 16-bit chunks, and each
+(position, chunk) pair is an indexed SQLite key. By the pigeonhole principle, two hashes within
+Hamming distance r share at least one chunk within r // 4 bits. So a query probes each chunk
+plus its 1-bit neighbours (for r <= 7), 68 keys in all, and reads only those candidates.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+
+import numpy as np
+
+_CHUNKS = 4
+_CHUNK_BITS = 64 // _CHUNKS
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _signed64(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+@dataclass
+class Fingerprint:
+    phash: int        # 64-bit DCT hash (robust to rescaling / recompression)
+    dhash: int        # 64-bit gradient hash
+    contrast: float   # luminance standard deviation, 0-255
+    entropy: float    # bits of a 64-bin luminance histogram (max 6)
+
+    def degenerate(self, min_contrast=4.0, min_entropy=2.0):
+        """Reason string if the image looks blank or flat, else None."""
+        if self.contrast < min_contrast:
+            return f"blank (contrast {self.contrast:.1f})"
+        if self.entropy < min_entropy:
+            return f"flat (entropy {self.entropy:.2f} bits)"
+        return None
+
+
+def fingerprint(image_bytes):
+    """Compute a Fingerprint from encoded image bytes (JPEGs are decoded at reduced size)."""
+    from PIL import Image
+    img = Image.open(BytesIO(image_bytes))
+    img.draft("L", (128, 128))  # let the JPEG decoder skip most of the work
+    gray = img.convert("L")
+
+    small = np.asarray(gray.resize((64, 64), Image.Resampling.BILINEAR), dtype=np.float32)
+    hist = np.bincount((small.astype(np.uint8) >> 2).ravel(), minlength=64) / small.size
+    nonzero = hist[hist > 0]
+    entropy = float(-(nonzero * np.log2(nonzero)).sum())
+
+    px = np.asarray(gray.resize((32, 32), Image.Resampling.BOX), dtype=np.float32)
+    low = (_DCT32 @ px @ _DCT32.T)[:8, :8].ravel()
+    phash = _bits_to_int(low > np.median(low[1:]))
+
+    tiny = np.asarray(gray.resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    dhash = _bits_to_int(tiny[:, 1:] > tiny[:, :-1])
+    return Fingerprint(phash, dhash, float(small.std()), entropy)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _chunk_keys(h, radius):
+    """Keys for every chunk of h and its neighbours within `radius` bits (radius 0 or 1)."""
+    keys = []
+    mask = (1 << _CHUNK_BITS) - 1
+    for pos in range(_CHUNKS):
+        chunk = (h >> (pos * _CHUNK_BITS)) & mask
+        variants = [chunk] + ([chunk ^ (1 << b) for b in range(_CHUNK_BITS)] if radius else [])
+        keys.extend((pos << _CHUNK_BITS) | v for v in variants)
+    return keys
+
+
+class ImageIndex:
+    """pHash index backed by one SQLite file. Safe to share between threads."""
+
+    def __init__(self, path):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY, phash INTEGER, dhash INTEGER,
+                                               contrast REAL, entropy REAL, ref TEXT, created REAL);
+            CREATE TABLE IF NOT EXISTS mih (key INTEGER, image_id INTEGER);
+            CREATE INDEX IF NOT EXISTS mih_key ON mih (key);
+        """)
+
+    def nearest(self, phash, max_distance=6):
+        """(hamming distance, ref) of the closest indexed image within max_distance, or (None, None)."""
+        if max_distance >= 2 * _CHUNKS:
+            raise ValueError(f"max_distance must be < {2 * _CHUNKS} for single-bit chunk probing")
+        keys = _chunk_keys(phash, max_distance // _CHUNKS)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT DISTINCT images.phash, images.ref FROM mih JOIN images ON images.id = mih.image_id "
+                f"WHERE mih.key IN ({','.join('?' * len(keys))})", keys).fetchall()
+        best = (None, None)
+        for stored, ref in rows:
+            distance = hamming(phash, stored & ((1 << 64) - 1))
+            if distance <= max_distance and (best[0] is None or distance < best[0]):
+                best = (distance, ref)
+        return best
+
+    def add(self, fp, ref=None):
+        """Index a Fingerprint and return its row id."""
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO images (phash, dhash, contrast, entropy, ref, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (_signed64(fp.phash), _signed64(fp.dhash), fp.contrast, fp.entropy, ref, time.time()))
+            image_id = cur.lastrowid
+            self._db.executemany("INSERT INTO mih VALUES (?, ?)",
+                                 [(key, image_id) for key in _chunk_keys(fp.phash, 0)])
+            self._db.commit()
+        return image_id
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,118 @@
+"""Streamed image downloads: read the header from the first few KB and decode while bytes arrive.
+
+    data = stream_image(response.iter_content(16384), min_side=512)
+    data.image    # the decoded PIL image, finished as soon as the last chunk has arrived
+
+The chunks go through Pillow's ImageFile.Parser, which identifies the format and size from
+the first few KB. Anything that is not an image, or is too small or too large, is rejected
+then, before the rest of the body is read. Pillow's Parser only decodes incrementally for
+formats without custom load code, and that excludes JPEG. So for single-tile JPEGs the
+decoder is attached here as well: libjpeg entropy-decodes (progressive) scans as they
+arrive, leaving only the final pass once the last byte is in. JPEG's custom load code only
+pads a truncated body, so bypassing it is safe. Other formats keep theirs: PNG's
+reassembles the IDAT chunks. Attaching the decoder uses Pillow internals; if a Pillow
+release changes them, the Parser just buffers the body and opens it at the end. A
+truncated body is reported as an error instead of being padded.
+
+Some formats (WebP) are only identified from the whole file. A binary body with no header
+after `header_limit` bytes is therefore buffered and opened with Image.open at the end.
+Only a body that reads as text (an HTML or JSON error page) is rejected early.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageFile
+
+_STREAMED_FORMATS = ("JPEG",)  # custom load code that is safe to bypass with a live decoder
+_TEXT = bytes(range(32, 127)) + b"\t\r\n"
+
+
+class ImageRejected(Exception):
+    """The response is not a usable image (wrong type, size, or truncated)."""
+
+
+class ImageBytes(bytes):
+    """Encoded image bytes that carry the already decoded PIL image as `.image`."""
+    image = None
+
+
+def _attach_decoder(parser):
+    """Start decoding in place for single-tile images that Parser would otherwise buffer whole."""
+    im = parser.image
+    if parser.decoder or len(im.tile) != 1 or im.format not in _STREAMED_FORMATS:
+        return
+    try:
+        im.load_prepare()
+        codec, extents, offset, args = im.tile[0][:4]
+        decoder = Image._getdecoder(im.mode, codec, args, im.decoderconfig)
+        decoder.setimage(im.im, extents)
+    except (AttributeError, TypeError, ValueError):
+        return  # internals changed: Parser.close() opens the buffered body instead
+    im.tile = []
+    parser.decoder = decoder
+    parser.data = parser.data[offset:]
+    parser.feed(b"")
+
+
+def _check_size(image, min_side, max_side):
+    width, height = image.size
+    if min_side and min(width, height) < min_side:
+        raise ImageRejected(f"{image.format} is {width}x{height}, smaller than {min_side}px")
+    if max(width, height) > max_side:
+        raise ImageRejected(f"{image.format} is {width}x{height}, larger than {max_side}px")
+
+
+def _open_buffered(data, min_side, max_side):
+    """Image.open on the whole body, for formats the Parser could not identify incrementally."""
+    try:
+        image = Image.open(BytesIO(data))
+    except (OSError, SyntaxError, ValueError):
+        raise ImageRejected(f"not an image ({len(data)} bytes): {data[:40]!r}") from None
+    _check_size(image, min_side, max_side)
+    try:
+        image.load()
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ImageRejected(f"{e} ({len(data)} bytes)") from None
+    return image
+
+
+def stream_image(chunks, min_side=None, max_side=8192, header_limit=64 * 1024):
+    """Consume an iterable of byte chunks and return ImageBytes with `.image` decoded.
+
+    Raises ImageRejected as soon as the header shows the data is unusable.
+    """
+    parser = ImageFile.Parser()
+    received = []
+    size = 0
+    checked = buffered = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        received.append(chunk)
+        size += len(chunk)
+        if buffered:
+            continue
+        try:
+            parser.feed(chunk)
+        except OSError as e:
+            raise ImageRejected(f"corrupt image data after {size} bytes: {e}") from None
+        if checked:
+            continue
+        if parser.image is None:
+            if size > header_limit:
+                if not received[0][:512].translate(None, _TEXT):
+                    raise ImageRejected(f"no image header in the first {size} bytes: {received[0][:40]!r}")
+                buffered = True  # e.g. WebP: identified only once the whole file is in
+            continue
+        _check_size(parser.image, min_side, max_side)
+        _attach_decoder(parser)
+        checked = True
+    data = ImageBytes(b"".join(received))
+    if parser.image is None:
+        image = _open_buffered(data, min_side, max_side)
+    else:
+        try:
+            image = parser.close()
+        except OSError as e:
+            raise ImageRejected(f"{e} ({size} bytes)") from None
+    data.image = image
+    return data
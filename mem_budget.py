@@ -0,0 +1,208 @@
+"""Per-stage memory accounting and a soft memory budget that spools large artifacts out of the heap.
+
+    memory = MemoryMonitor(budget=400 << 20, trace=True)   # 400 MB, tracemalloc on
+    memory.start()
+    with memory.stage("reel"):
+        reel = render()
+    reel = memory.keep(reel)        # bytes, or a file-backed SpooledBytes once RSS is over budget
+    print(memory.summary())         # reel: py peak 212.4 MB, RSS 388.0 -> 501.3 MB (+113.3) ...
+
+Each stage gets two numbers. The Python-heap peak comes from tracemalloc, which also sees
+NumPy buffers but slows allocation-heavy code, so it is opt-in. tracemalloc has one peak
+per process, so when stages overlap (concurrent tenants) it is reset only by the first
+stage to open. A stage that overlaps others reports the process-wide heap peak since then,
+not its own. The process RSS peak is
+exact on Linux: the kernel's high-water mark (VmHWM) is reset through /proc/self/clear_refs
+when a stage starts and read when it ends. Elsewhere a background sampler polls every 20 ms.
+Render workers and ffmpeg are separate processes and are not included.
+
+The budget is checked against the current RSS. A large artifact kept while the process is over
+budget is written to an anonymous temp file (deleted on close) and mapped back read-only. A
+SpooledBytes is an mmap subclass, so it supports len(), slicing, hashing and file writes and
+works with base64 and any other buffer-protocol consumer. Its pages are clean and file-backed,
+so the kernel can drop them under pressure instead of the OOM killer dropping the run.
+"""
+import mmap
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MB = 1 << 20
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _rss_high_water():
+    """Kernel-tracked peak RSS since the last reset (Linux VmHWM), or None."""
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_high_water():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class SpooledBytes(mmap.mmap):
+    """Read-only bytes-like view of an artifact that lives in a temp file instead of the heap."""
+
+    @classmethod
+    def from_bytes(cls, data, directory=None):
+        with tempfile.TemporaryFile(dir=directory) as f:
+            f.write(data)
+            f.flush()
+            return cls(f.fileno(), len(data), access=mmap.ACCESS_READ)
+
+    def __bytes__(self):
+        return self[:]
+
+    def __repr__(self):
+        return f"<SpooledBytes {len(self)} bytes>"
+
+
+class MemoryMonitor:
+    """Stage peaks (tracemalloc + sampled RSS) and the spool-above-budget policy."""
+
+    def __init__(self, budget=0, trace=False, interval=0.02, min_spool=MB, spool_dir=None):
+        self.budget = budget
+        self.trace = trace
+        self.interval = interval
+        self.min_spool = min_spool
+        self.spool_dir = spool_dir
+        self.stages = {}
+        self.spooled = []
+        self._open = {}       # one entry per open stage() call -> RSS peak so far
+        self._running = {}    # stage name -> calls currently open
+        self._pending = {}    # stage name -> merged entry of calls that finished while others still run
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _sample(self):
+        rss = rss_bytes()
+        peak = max(rss, _rss_high_water() or 0)
+        with self._lock:
+            for name in self._open:
+                self._open[name] = max(self._open[name], peak)
+        return rss
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    @contextmanager
+    def stage(self, name):
+        """Record the RSS (and traced heap) peak while the block runs; overlapping stages share peaks.
+
+        Stages of the same name may run on several threads at once (concurrent tenants); their
+        peaks are merged into one entry when the last of them finishes.
+        """
+        token = object()
+        start = self._sample()  # folds the high-water mark into stages already open before resetting it
+        _reset_high_water()
+        traced = self.trace and tracemalloc.is_tracing()
+        with self._lock:
+            first = not self._open
+            self._open[token] = start
+            self._running[name] = self._running.get(name, 0) + 1
+            if traced:
+                traced_start = tracemalloc.get_traced_memory()[0]
+                if first:  # resetting while other stages are open would lose their peaks
+                    tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            end = self._sample()
+            with self._lock:
+                peak = self._open.pop(token)
+            entry = {"rss_start": start, "rss_peak": peak, "rss_end": end}
+            if traced and tracemalloc.is_tracing():
+                current, traced_peak = tracemalloc.get_traced_memory()
+                entry.update(py_peak=traced_peak, py_growth=current - traced_start)
+            with self._lock:
+                # Concurrent calls of one stage report together: the last to finish writes the larger peaks
+                pending = self._pending.get(name)
+                if pending is not None:
+                    entry = dict(entry, rss_start=min(pending["rss_start"], entry["rss_start"]),
+                                 **{k: max(pending.get(k, v), v) for k, v in entry.items() if k.endswith("peak")})
+                self._running[name] -= 1
+                if self._running[name]:
+                    self._pending[name] = entry
+                else:
+                    self._pending.pop(name, None)
+                    self.stages[name] = entry
+
+    def over_budget(self, extra=0):
+        return bool(self.budget) and rss_bytes() + extra > self.budget
+
+    def keep(self, data, name="artifact"):
+        """Return `data`, or a SpooledBytes copy of it when it is large and the process is over budget."""
+        if data is None or isinstance(data, SpooledBytes) or len(data) < self.min_spool or not self.over_budget():
+            return data
+        started = time.perf_counter()
+        spooled = SpooledBytes.from_bytes(data, self.spool_dir)
+        self.spooled.append((name, len(data)))
+        print(f"💽 {name}: {len(data) / MB:.1f} MB spooled to disk (RSS {rss_bytes() / MB:.0f} MB > budget "
+              f"{self.budget / MB:.0f} MB) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return spooled
+
+    def spool_file(self):
+        """Temp file that stays in memory while small and moves to disk past the remaining budget."""
+        headroom = max(self.min_spool, self.budget - rss_bytes()) if self.budget else 64 * MB
+        return tempfile.SpooledTemporaryFile(max_size=headroom, dir=self.spool_dir)
+
+    def report(self):
+        return {"budget": self.budget, "stages": self.stages,
+                "spooled": [{"name": n, "bytes": b} for n, b in self.spooled]}
+
+    def summary(self):
+        parts = []
+        for name, s in self.stages.items():
+            text = f"{name}: "
+            if "py_peak" in s:
+                text += f"py peak {s['py_peak'] / MB:.1f} MB, "
+            text += (f"RSS {s['rss_start'] / MB:.0f} -> {s['rss_peak'] / MB:.0f} MB "
+                     f"(+{(s['rss_peak'] - s['rss_start']) / MB:.0f})")
+            parts.append(text)
+        if self.spooled:
+            parts.append("spooled " + ", ".join(f"{n} {b / MB:.1f} MB" for n, b in self.spooled))
+        return "; ".join(parts)
@@ -0,0 +1,135 @@
+"""Persistent near-duplicate index for generated image prompts and captions (MinHash + LSH in SQLite).
+
+Each text becomes a set of word bigrams (k=2 shingles; captions are short). A MinHash signature (num_perm 64-bit minima) estimates
+Jaccard similarity between two sets. The signature is cut into `bands` bands, and each band is
+hashed into a single indexed key. A query only reads the few documents that share at least one
+band key, so lookups stay sub-millisecond however long the history gets. There is no linear scan.
+
+With the defaults (128 permutations, 32 bands of 4 rows) a pair with Jaccard 0.5 becomes a
+candidate ~87% of the time, and one with Jaccard 0.7 does so >99.9% of the time.
+
+    index = PromptIndex("history/prompt_index.sqlite")
+    sim, text = index.best_match(caption, kind="caption", scope="astroboli")
+    index.add(caption, kind="caption", scope="astroboli")
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text, k=2, ignore=frozenset()):
+    """Lower-cased word k-shingles with URLs, hashtags and `ignore` words removed."""
+    text = re.sub(r"https?://\S+|#\w+", " ", text.lower())
+    words = [w for w in _WORD.findall(text) if w not in ignore]
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _mix64(x):
+    """splitmix64 finalizer, vectorized over a uint64 array (multiplications wrap mod 2**64)."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _signed64(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class PromptIndex:
+    """MinHash/LSH index backed by one SQLite file. Safe to share between threads."""
+
+    def __init__(self, path, num_perm=128, bands=32, seed=1, k=2, ignore=()):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ignore = frozenset(w.lower() for w in ignore)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+            CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, scope TEXT, kind TEXT,
+                                             text TEXT, ref TEXT, created REAL, sig BLOB);
+            CREATE TABLE IF NOT EXISTS lsh (key INTEGER, doc_id INTEGER);
+            CREATE INDEX IF NOT EXISTS lsh_key ON lsh (key);
+        """)
+        stored = dict(self._db.execute("SELECT key, value FROM meta"))
+        if stored:  # an existing index keeps the parameters it was built with
+            num_perm, bands, seed, k = stored["num_perm"], stored["bands"], stored["seed"], stored["k"]
+        else:
+            self._db.executemany("INSERT INTO meta VALUES (?, ?)",
+                                 [("num_perm", num_perm), ("bands", bands), ("seed", seed), ("k", k)])
+            self._db.commit()
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm, self.bands, self.rows, self.k = num_perm, bands, num_perm // bands, k
+        # one random salt per permutation; hash_i(x) = mix64(x ^ salt_i)
+        self._salts = np.random.default_rng(seed).integers(0, np.iinfo(np.uint64).max, num_perm,
+                                                           dtype=np.uint64, endpoint=True)
+
+    # -- hashing -------------------------------------------------------------------
+    def signature(self, text):
+        """MinHash signature (uint64 array of length num_perm); all-max for empty text."""
+        sh = shingles(text, self.k, self.ignore)
+        if not sh:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        hv = np.fromiter((int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+                          for s in sh), dtype=np.uint64, count=len(sh))
+        return _mix64(hv[:, None] ^ self._salts).min(axis=0)
+
+    def _band_keys(self, sig, scope, kind):
+        prefix = f"{scope}\0{kind}\0".encode("utf-8")
+        raw = sig.tobytes()
+        width = self.rows * 8
+        return [_signed64(int.from_bytes(hashlib.blake2b(prefix + bytes([i]) + raw[i * width:(i + 1) * width],
+                                                         digest_size=8).digest(), "little"))
+                for i in range(self.bands)]
+
+    # -- queries -------------------------------------------------------------------
+    def query(self, text, kind="prompt", scope="", limit=5, sig=None):
+        """Return up to `limit` (similarity, text, ref) tuples for LSH candidates, most similar first."""
+        sig = self.signature(text) if sig is None else sig
+        keys = self._band_keys(sig, scope, kind)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, text, ref, sig FROM docs WHERE id IN "
+                f"(SELECT doc_id FROM lsh WHERE key IN ({','.join('?' * len(keys))}))", keys).fetchall()
+        matches = [(float(np.mean(np.frombuffer(blob, dtype=np.uint64) == sig)), doc_text, ref)
+                   for _, doc_text, ref, blob in rows]
+        matches.sort(key=lambda m: -m[0])
+        return matches[:limit]
+
+    def best_match(self, text, kind="prompt", scope=""):
+        """(estimated Jaccard similarity, text) of the closest indexed document, or (0.0, None)."""
+        matches = self.query(text, kind, scope, limit=1)
+        return (matches[0][0], matches[0][1]) if matches else (0.0, None)
+
+    def add(self, text, kind="prompt", scope="", ref=None):
+        """Index a document and return its id."""
+        sig = self.signature(text)
+        keys = self._band_keys(sig, scope, kind)
+        with self._lock:
+            cur = self._db.execute("INSERT INTO docs (scope, kind, text, ref, created, sig) VALUES (?, ?, ?, ?, ?, ?)",
+                                   (scope, kind, text, ref, time.time(), sig.tobytes()))
+            doc_id = cur.lastrowid
+            self._db.executemany("INSERT INTO lsh VALUES (?, ?)", [(key, doc_id) for key in keys])
+            self._db.commit()
+        return doc_id
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
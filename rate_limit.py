@@ -0,0 +1,218 @@
+"""Client-side rate limiting: one token bucket per provider plus a persisted daily quota ledger.
+
+    limiter = RateLimiter({"gemini": Limit(per_minute=10, burst=5, daily=1500)},
+                          QuotaLedger("history/quota.sqlite"))
+    limiter.acquire("gemini")                 # waits for a token, then books the call against today's quota
+    http = limiter.session(session, "fal")    # .get/.post acquire first; a 429 pauses the bucket (Retry-After)
+    limiter.backoff("gemini", 30)             # server said slow down: nobody calls gemini for 30 s
+    limiter.usage()                           # {"gemini": 12, "pollinations": 41, ...} for today
+
+Buckets are reservations. Each caller takes a token at once, even if the count goes negative,
+and sleeps outside the lock until its token would have accrued. Concurrent workers are
+therefore spaced 60/per_minute seconds apart in arrival order, with no polling. Buckets
+live in this process. The ledger is a SQLite file (WAL, BEGIN IMMEDIATE), so the daily
+caps also hold across a daemon and cron runs on the same machine. The day rolls over at
+midnight in `tz` (Gemini's free tier resets at midnight Pacific). A call that would
+pass a daily cap raises QuotaExceeded before any request is sent.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+class QuotaExceeded(Exception):
+    """The provider's daily quota is used up; no request was sent."""
+
+
+@dataclass
+class Limit:
+    per_minute: float = 0.0   # sustained rate (0 = no rate limit)
+    burst: int = 1            # calls allowed back to back after an idle period
+    daily: int = 0            # calls per day (0 = no cap)
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=1):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        """Take `n` tokens now and return how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds` (e.g. after a 429) and restart from an empty bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = max(self.updated, now)
+
+
+class QuotaLedger:
+    """Calls per provider per day in one SQLite file. Safe to share between threads and processes."""
+
+    def __init__(self, path, tz="America/Los_Angeles", keep_days=35):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        try:
+            from zoneinfo import ZoneInfo
+            self.tz = ZoneInfo(tz)
+        except Exception:  # no tz database: fall back to UTC days
+            self.tz = datetime.timezone.utc
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS usage (day TEXT, provider TEXT, calls INTEGER, updated REAL,
+                                              PRIMARY KEY (day, provider));
+        """)
+        cutoff = (datetime.datetime.now(self.tz) - datetime.timedelta(days=keep_days)).date().isoformat()
+        with self._lock:
+            self._db.execute("DELETE FROM usage WHERE day < ?", (cutoff,))
+
+    def today(self):
+        return datetime.datetime.now(self.tz).date().isoformat()
+
+    def charge(self, provider, daily=0, n=1):
+        """Book `n` calls for today; raises QuotaExceeded (booking nothing) if that passes `daily`."""
+        day = self.today()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT calls FROM usage WHERE day = ? AND provider = ?",
+                                       (day, provider)).fetchone()
+                used = row[0] if row else 0
+                if daily and used + n > daily:
+                    raise QuotaExceeded(f"{provider}: daily quota used up ({used}/{daily} calls on {day}, "
+                                        f"resets at midnight {self.tz})")
+                self._db.execute("INSERT INTO usage VALUES (?, ?, ?, ?) ON CONFLICT (day, provider) "
+                                 "DO UPDATE SET calls = calls + excluded.calls, updated = excluded.updated",
+                                 (day, provider, n, time.time()))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return used + n
+
+    def usage(self, day=None):
+        with self._lock:
+            return dict(self._db.execute("SELECT provider, calls FROM usage WHERE day = ? ORDER BY provider",
+                                         (day or self.today(),)))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RateLimiter:
+    """Token buckets and daily caps per provider name; providers without a Limit pass straight through."""
+
+    def __init__(self, limits=None, ledger=None, verbose=True):
+        self.limits = dict(limits or {})
+        self.ledger = ledger
+        self.verbose = verbose
+        self.waited = {}   # provider -> seconds spent waiting in this process
+        self._buckets = {name: TokenBucket(l.per_minute, l.burst) for name, l in self.limits.items() if l.per_minute}
+        self._lock = threading.Lock()
+
+    def acquire(self, provider):
+        """Wait for the provider's next slot and book the call; returns the seconds waited."""
+        limit = self.limits.get(provider)
+        if self.ledger is not None:
+            self.ledger.charge(provider, limit.daily if limit else 0)
+        bucket = self._buckets.get(provider)
+        wait = bucket.reserve() if bucket is not None else 0.0
+        if wait > 0:
+            if self.verbose and wait >= 1:
+                print(f"⏳ {provider}: waiting {wait:.1f}s for the rate limit")
+            time.sleep(wait)
+            with self._lock:
+                self.waited[provider] = self.waited.get(provider, 0.0) + wait
+        return wait
+
+    def backoff(self, provider, retry_after=None):
+        """The server throttled us: pause the provider's bucket for Retry-After (default 10 s)."""
+        seconds = 10.0 if retry_after is None else max(0.0, float(retry_after))
+        bucket = self._buckets.get(provider)
+        if bucket is None:
+            bucket = self._buckets[provider] = TokenBucket(60.0, 1)
+        bucket.pause(seconds)
+        if self.verbose:
+            print(f"🚦 {provider}: throttled by the server, pausing {seconds:.0f}s")
+
+    def usage(self):
+        return self.ledger.usage() if self.ledger is not None else {}
+
+    def session(self, session, provider):
+        return LimitedSession(session, self, provider)
+
+
+class LimitedSession:
+    """requests.Session front that acquires a provider slot per request and honours 429 Retry-After."""
+
+    def __init__(self, session, limiter, provider):
+        self.session = session
+        self.limiter = limiter
+        self.provider = provider
+
+    def request(self, method, url, **kwargs):
+        self.limiter.acquire(self.provider)
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code == 429:
+            self.limiter.backoff(self.provider, _retry_after(response.headers.get("Retry-After")))
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_limits(spec, defaults):
+    """{name: Limit} from `defaults` ({"gemini": {"per_minute": 10, "daily": 1500}, ...}) with a JSON
+    spec of the same shape merged over it (null removes a provider). "off" drops every limit;
+    calls are still counted in the ledger.
+    """
+    if spec and spec.strip().lower() in ("off", "0", "none"):
+        return {}
+    fields = {name: dict(f) for name, f in defaults.items()}
+    if spec:
+        import json
+        for name, override in json.loads(spec).items():
+            if override is None:
+                fields.pop(name, None)
+            else:
+                fields[name] = dict(fields.get(name, {}), **override)
+    return {name: Limit(**f) for name, f in fields.items()}
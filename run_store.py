@@ -0,0 +1,150 @@
+"""Per-run artifact directories with a manifest, so a failed run can be resumed stage by stage.
+
+Layout:
+
+    runs/<run-id>/
+        manifest.json       {"run_id", "created", "settings", "stages": {name: {"file", "bytes", "sha256", ...}}}
+        content.json        Gemini output (brand, prompt, caption, meta)
+        image_raw.jpg       downloaded image
+        post.jpg            processed 1080x1080 image
+        ...
+
+A stage counts as done only if its file still exists and matches the recorded size and hash,
+so a truncated write from a crashed run is redone instead of reused.
+"""
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import threading
+import time
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class RunDir:
+    """One run's workspace. Thread-safe; every save rewrites manifest.json atomically."""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self):
+        return self.manifest['run_id']
+
+    @property
+    def settings(self):
+        return self.manifest.get('settings')
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_manifest(self):
+        tmp = self.file('manifest.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.file('manifest.json'))
+
+    # -- stages ------------------------------------------------------------------
+    def has(self, stage):
+        """True if the stage completed and its artifact (if any) is intact."""
+        entry = self.manifest['stages'].get(stage)
+        if entry is None:
+            return False
+        if 'file' not in entry:
+            return True
+        path = self.file(entry['file'])
+        try:
+            if os.path.getsize(path) != entry['bytes']:
+                return False
+        except OSError:
+            return False
+        return _sha256(path) == entry['sha256']
+
+    def path_of(self, stage):
+        return self.file(self.manifest['stages'][stage]['file'])
+
+    def read_bytes(self, stage):
+        with open(self.path_of(stage), 'rb') as f:
+            return f.read()
+
+    def read_json(self, stage):
+        with open(self.path_of(stage), encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_bytes(self, stage, filename, data, **info):
+        """Write an artifact (via a temp file + rename) and record it in the manifest."""
+        tmp = self.file(filename + '.part')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        return self.adopt_file(stage, filename, tmp, **info)
+
+    def save_json(self, stage, filename, obj, **info):
+        return self.save_bytes(stage, filename, json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8'), **info)
+
+    def adopt_file(self, stage, filename, src, **info):
+        """Move an existing file (e.g. a rendered temp file) into the run as the stage's artifact."""
+        dest = self.file(filename)
+        shutil.move(src, dest)
+        entry = dict(info, file=filename, bytes=os.path.getsize(dest), sha256=_sha256(dest), at=time.time())
+        with self._lock:
+            self.manifest['stages'][stage] = entry
+            self._write_manifest()
+        return dest
+
+    def mark(self, stage, **info):
+        """Record a stage that has no artifact (e.g. the email was sent)."""
+        with self._lock:
+            self.manifest['stages'][stage] = dict(info, at=time.time())
+            self._write_manifest()
+
+    def forget(self, stage):
+        with self._lock:
+            if self.manifest['stages'].pop(stage, None) is not None:
+                self._write_manifest()
+
+
+def new_run(root, label='astroboli', settings=None):
+    """Create runs/<YYYYmmdd-HHMMSS>-<label>-<rand>/ and its manifest."""
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{secrets.token_hex(3)}"
+    path = os.path.join(root, run_id)
+    os.makedirs(path)
+    run = RunDir(path, {'run_id': run_id, 'created': time.time(), 'settings': settings, 'stages': {}})
+    run._write_manifest()
+    return run
+
+
+def open_run(root, run_id):
+    """Load an existing run by id (or by path). Raises FileNotFoundError if there is no manifest."""
+    path = run_id if os.path.isdir(run_id) else os.path.join(root, run_id)
+    with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    return RunDir(path, manifest)
+
+
+def prune_runs(root, keep, done_stage='email'):
+    """Delete the oldest completed runs beyond `keep`. Unfinished runs are left for --resume."""
+    if keep is None or keep < 0 or not os.path.isdir(root):
+        return []
+    done = []
+    for name in os.listdir(root):
+        try:
+            run = open_run(root, name)
+        except (OSError, ValueError):
+            continue
+        if done_stage in run.manifest['stages']:
+            done.append((run.manifest.get('created', 0), run.path))
+    done.sort(reverse=True)
+    removed = [path for _, path in done[keep:]]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
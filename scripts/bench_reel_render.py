@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Wall-clock benchmark of the segmented reel render against worker count.
+
+Renders the same captioned timeline (test_reel.mp4 looped, plus its audio) with 1..N worker
+processes through reel_render.render_parallel, and once through a single moviepy
+write_videofile for reference. Speedup is relative to one worker.
+
+Usage:
+    python scripts/bench_reel_render.py                        # 6 s timeline, 1..cpu_count workers
+    python scripts/bench_reel_render.py --duration 12 --workers 1,2,4,8 --preset veryfast
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from captions import estimate_word_timings
+from reel_render import ClipTimeline, ffmpeg_exe, render_parallel
+
+SCRIPT = ("Welcome to AstroBoli AI. The stars align for quiet courage today, and Venus softens every "
+          "conversation you start. Visit astroboli dot com for your complete reading.")
+
+
+def _extract_audio(source, duration):
+    import subprocess
+    fd, path = tempfile.mkstemp(suffix='.m4a')
+    os.close(fd)
+    subprocess.run([ffmpeg_exe(), '-hide_banner', '-loglevel', 'error', '-y', '-i', str(source), '-vn',
+                    '-t', str(duration), '-c:a', 'aac', path], check=True)
+    return path
+
+
+def _moviepy_reference(kwargs, audio_path, preset, crf):
+    """The previous single-pass render: one moviepy pipeline, one ffmpeg encode."""
+    from moviepy.audio.io.AudioFileClip import AudioFileClip
+    from moviepy.video.VideoClip import VideoClip
+    source = ClipTimeline(**kwargs)
+    clip = VideoClip(lambda t: source.frame(int(round(t * source.fps))), duration=kwargs['duration'])
+    clip = clip.with_audio(AudioFileClip(audio_path))
+    fd, path = tempfile.mkstemp(suffix='.mp4')
+    os.close(fd)
+    started = time.perf_counter()
+    clip.write_videofile(path, codec='libx264', audio_codec='aac', fps=source.fps, preset=preset,
+                         ffmpeg_params=['-crf', str(crf)], logger=None)
+    seconds = time.perf_counter() - started
+    clip.close()
+    source.close()
+    os.unlink(path)
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Segmented reel render benchmark')
+    parser.add_argument('--duration', type=float, default=6.0, help='Timeline length in seconds')
+    parser.add_argument('--workers', help='Comma-separated worker counts (default: 1..cpu_count)')
+    parser.add_argument('--preset', default='medium', help='libx264 preset (as REEL_PRESET)')
+    parser.add_argument('--crf', type=int, default=23, help='libx264 CRF (as REEL_CRF)')
+    parser.add_argument('--no-reference', action='store_true', help='Skip the single-pass moviepy render')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, *(int(n) for n in args.workers.split(','))}) if args.workers else list(range(1, cpus + 1))
+    fps = 24
+    frames = int(round(args.duration * fps))
+    audio_path = _extract_audio(ROOT / 'test_reel.mp4', args.duration - 1)
+    kwargs = {'clip_path': str(ROOT / 'test_reel.mp4'), 'duration': args.duration, 'fps': fps,
+              'words': estimate_word_timings(SCRIPT, args.duration - 1), 'script': SCRIPT}
+    print(f"{frames} frames at 1080x1920, preset {args.preset}, crf {args.crf}, {cpus} CPU(s)")
+    print(f"{'workers':>8} {'seconds':>8} {'frames/s':>9} {'speedup':>8} {'efficiency':>10}")
+    try:
+        base = None
+        for n in counts:
+            started = time.perf_counter()
+            render_parallel(ClipTimeline, kwargs, frames, (1080, 1920), fps, workers=n, preset=args.preset,
+                            crf=args.crf, audio_path=audio_path)
+            seconds = time.perf_counter() - started
+            base = base or seconds
+            print(f"{n:>8} {seconds:>8.2f} {frames / seconds:>9.1f} {base / seconds:>7.2f}x "
+                  f"{base / seconds / min(n, cpus):>9.0%}")
+        if not args.no_reference:
+            seconds = _moviepy_reference(kwargs, audio_path, args.preset, args.crf)
+            print(f"{'moviepy':>8} {seconds:>8.2f} {frames / seconds:>9.1f} {base / seconds:>7.2f}x {'':>10}")
+    finally:
+        os.unlink(audio_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the pure hot functions in daily_bot.py.
+
+Reports ops/s, p50/p99 latency and peak allocation per case and compares
+against the stored baseline in scripts/bench_fixtures/baseline.json.
+
+Usage:
+    python scripts/benchmark_daily_bot.py                    # run + compare
+    python scripts/benchmark_daily_bot.py --update-baseline  # store new baseline
+    python scripts/benchmark_daily_bot.py --only mime --fail-on-regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / 'bench_fixtures'
+BASELINE_PATH = FIXTURES / 'baseline.json'
+sys.path.insert(0, str(ROOT))
+import daily_bot as db
+
+
+def _load_cases():
+    """Build (name, inputs, fn) benchmark cases from the committed fixtures."""
+    with open(FIXTURES / 'model_outputs.json', encoding='utf-8') as f:
+        fx = json.load(f)
+    image_bytes = (FIXTURES / 'pollinations_1024x1280.jpg').read_bytes()
+    reel_bytes = (ROOT / 'test_reel.mp4').read_bytes()
+    # Unknown container: rejected by _is_valid_video at the first header
+    unknown_blob = bytes(range(256)) * 2400
+
+    processed = db.process_for_instagram(image_bytes)
+    caption = fx['captions'][0]
+
+    def build_mime(args):
+        reel, video_prompt = args
+        return db._build_email_message(processed, caption, reel, video_prompt).as_bytes()
+
+    return [
+        ('extract_json', fx['json_outputs'], db._extract_json_from_text),
+        ('clean_image_prompt', fx['image_prompts'], db._clean_image_prompt),
+        ('normalize_hashtags', fx['hashtag_inputs'], db._normalize_hashtags),
+        ('process_for_instagram', [image_bytes], db.process_for_instagram),
+        ('is_valid_video', [reel_bytes, image_bytes, unknown_blob], db._is_valid_video),
+        ('mime_image_only', [(None, fx['video_prompt'])], build_mime),
+        ('mime_with_reel', [(reel_bytes, None)], build_mime),
+    ]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def run_case(inputs, fn, min_time=0.5, max_iters=200000):
+    """Time fn over the inputs round-robin and measure peak allocation of one pass."""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        for x in inputs:  # warmup
+            fn(x)
+
+        samples = []
+        n = len(inputs)
+        deadline = time.perf_counter() + min_time
+        i = 0
+        while (time.perf_counter() < deadline or i < n) and i < max_iters:
+            x = inputs[i % n]
+            t0 = time.perf_counter_ns()
+            fn(x)
+            samples.append(time.perf_counter_ns() - t0)
+            i += 1
+            if i % 64 == 0:
+                sink.seek(0)
+                sink.truncate()
+
+        tracemalloc.start()
+        peak = 0
+        for x in inputs:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn(x)
+            _, p = tracemalloc.get_traced_memory()
+            peak = max(peak, p - base)
+        tracemalloc.stop()
+
+    samples.sort()
+    total_s = sum(samples) / 1e9
+    return {
+        'iterations': len(samples),
+        'ops_per_sec': len(samples) / total_s if total_s else 0.0,
+        'p50_us': _percentile(samples, 50) / 1000.0,
+        'p99_us': _percentile(samples, 99) / 1000.0,
+        'peak_alloc_kb': peak / 1024.0,
+    }
+
+
+def _fmt_row(name, r, verdict=''):
+    return (f"{name:<24}{r['ops_per_sec']:>12.1f}{r['p50_us']:>12.1f}{r['p99_us']:>12.1f}"
+            f"{r['peak_alloc_kb']:>14.1f}  {verdict}")
+
+
+def compare(results, baseline, tolerance):
+    """Return {name: verdict} comparing p50 latency to the stored baseline."""
+    verdicts = {}
+    for name, r in results.items():
+        ref = baseline.get('results', {}).get(name)
+        if not ref or not ref.get('p50_us'):
+            verdicts[name] = 'new'
+            continue
+        ratio = r['p50_us'] / ref['p50_us']
+        if ratio > tolerance:
+            verdicts[name] = f'REGRESSION x{ratio:.2f}'
+        elif ratio < 1.0 / tolerance:
+            verdicts[name] = f'faster x{1.0 / ratio:.2f}'
+        else:
+            verdicts[name] = f'ok x{ratio:.2f}'
+    return verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='daily_bot micro-benchmarks')
+    parser.add_argument('--only', help='Comma-separated case names to run')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend per case')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='p50 slowdown ratio flagged as regression')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Baseline JSON path')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any case regressed')
+    parser.add_argument('--json', help='Also write raw results to this path')
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    results = {}
+    for name, inputs, fn in _load_cases():
+        if only and name not in only:
+            continue
+        results[name] = run_case(inputs, fn, min_time=args.min_time)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    verdicts = compare(results, baseline, args.tolerance)
+
+    print(f"{'case':<24}{'ops/s':>12}{'p50 us':>12}{'p99 us':>12}{'peak KB':>14}  vs baseline")
+    print('-' * 92)
+    for name, r in results.items():
+        print(_fmt_row(name, r, verdicts[name]))
+
+    payload = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+    if args.update_baseline:
+        merged = dict(baseline.get('results', {}))
+        merged.update(results)
+        payload['results'] = merged
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+
+    regressed = [n for n, v in verdicts.items() if v.startswith('REGRESSION')]
+    if regressed:
+        print(f"⚠️ Slower than baseline: {', '.join(regressed)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Summarize `python -X importtime` for daily_bot.py.
+
+Usage:
+    python scripts/import_profile.py                 # profile `daily_bot.py --dry-run --mock`
+    python scripts/import_profile.py --import-only   # profile `import daily_bot`
+    python scripts/import_profile.py --top 25 --raw importtime.log
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def profile(import_only=False, extra_env=None):
+    """Run the target under -X importtime; return (entries, wall_seconds, raw_stderr).
+
+    Each entry is (name, self_us, cumulative_us, depth).
+    """
+    if import_only:
+        cmd = [sys.executable, '-X', 'importtime', '-c', 'import daily_bot']
+    else:
+        cmd = [sys.executable, '-X', 'importtime', str(ROOT / 'daily_bot.py'), '--dry-run', '--mock']
+    env = dict(os.environ, **(extra_env or {}))
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cum_us), depth))
+    return entries, wall, proc.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize -X importtime for daily_bot.py')
+    parser.add_argument('--import-only', action='store_true', help='Profile `import daily_bot` instead of a mock dry-run')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--raw', help='Also save the raw importtime output to this file')
+    args = parser.parse_args()
+
+    entries, wall, raw = profile(args.import_only)
+    if args.raw:
+        Path(args.raw).write_text(raw)
+
+    top_level = [e for e in entries if e[3] == 0]
+    total_ms = sum(e[2] for e in top_level) / 1000.0
+    print(f"Wall time: {wall * 1000:.0f} ms   import time: {total_ms:.0f} ms   modules: {len(entries)}")
+
+    print(f"\nTop {args.top} top-level imports by cumulative time:")
+    for name, _, cum, _ in sorted(top_level, key=lambda e: -e[2])[:args.top]:
+        print(f"  {cum / 1000.0:8.1f} ms  {name}")
+
+    print(f"\nTop {args.top} modules by self time:")
+    for name, self_us, _, _ in sorted(entries, key=lambda e: -e[1])[:args.top]:
+        print(f"  {self_us / 1000.0:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""End-to-end load test of daily_bot.py against the local stand-in services.
+
+Starts the HTTP stand-in and SMTP sink, points daily_bot at them through its
+base-URL environment overrides, runs the full pipeline N times and reports
+runs/hour plus per-stage tail latencies.
+
+Usage:
+    python scripts/load_test.py --iterations 20 --concurrency 4 --latency 0.3 --failure-rate 0.05
+    python scripts/load_test.py --providers none   # skip reel rendering entirely
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import ServiceProfile, SMTPSink, StandInConfig, StandInServer
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='daily_bot end-to-end load test (offline)')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--image-size', default=None, help='Force Pollinations size WxH')
+    parser.add_argument('--video-bytes', type=int, help='Pad served videos to this size')
+    parser.add_argument('--job-seconds', type=float, default=0.0)
+    parser.add_argument('--providers', default='fal,luma,replicate,modelslab',
+                        help="Video provider cascade to exercise ('none' to skip reels)")
+    parser.add_argument('--verbose', action='store_true', help='Show daily_bot output')
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        default=ServiceProfile(args.latency, args.jitter, args.failure_rate),
+        image_size=tuple(int(v) for v in args.image_size.lower().split('x')) if args.image_size else None,
+        video_bytes=args.video_bytes,
+        job_seconds=args.job_seconds,
+    )
+    http = StandInServer(config).start()
+    smtp = SMTPSink(config).start()
+
+    # daily_bot reads its configuration at import time
+    os.environ.update(http.env())
+    os.environ.update(smtp.env())
+    os.environ.update({
+        'GEMINI_API_KEY': 'stand-in', 'YOUR_EMAIL': 'bot@example.com', 'EMAIL_PASSWORD': 'stand-in',
+        'FAL_KEY': 'stand-in', 'LUMA_API_KEY': 'stand-in', 'REPLICATE_API_TOKEN': 'stand-in',
+        'VIDEO_PROVIDERS': '' if args.providers == 'none' else args.providers,
+        'VIDEO_POLL_INTERVAL': '0.05',
+        'VOICEOVER_ENABLED': '0',
+        'RUNS_DIR': '',  # no per-run artifact directories under load
+        'PROMPT_INDEX_PATH': '',  # nor a shared posting history
+        'IMAGE_INDEX_PATH': '',
+    })
+    import daily_bot as db
+
+    run_args = db.build_parser().parse_args([])
+
+    def one_run(i):
+        timings = {}
+        try:
+            db.run_pipeline(run_args, timings)
+            return True, timings, None
+        except Exception:
+            return False, timings, traceback.format_exc(limit=3)
+
+    print(f"Stand-in at {http.url}; running {args.iterations} iterations x{args.concurrency}...")
+    started = time.perf_counter()
+    # stdout is process-wide, so silence the pipeline once around the whole pool
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_run, range(args.iterations)))
+    wall = time.perf_counter() - started
+    http.stop()
+    smtp.stop()
+
+    ok = [r for r in results if r[0]]
+    failed = [r for r in results if not r[0]]
+    print(f"\nRuns: {len(results)}  ok: {len(ok)}  failed: {len(failed)}  wall: {wall:.1f}s")
+    print(f"Throughput: {len(ok) / wall * 3600:.0f} runs/hour (concurrency {args.concurrency})")
+
+    stages = {}
+    for _, timings, _ in results:
+        for name, seconds in timings.items():
+            stages.setdefault(name, []).append(seconds)
+    print(f"\n{'stage':<16}{'n':>5}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}{'max s':>10}")
+    for name, values in stages.items():
+        print(f"{name:<16}{len(values):>5}{_percentile(values, 50):>10.3f}{_percentile(values, 95):>10.3f}"
+              f"{_percentile(values, 99):>10.3f}{max(values):>10.3f}")
+
+    print(f"\nHTTP requests: {http.stats}")
+    print(f"SMTP: {smtp.stats['messages']} messages, {smtp.stats['bytes'] // 1024}KB, {smtp.stats['failures']} failures")
+    if failed:
+        print("\nFirst failure:")
+        print(failed[0][2])
+
+
+if __name__ == '__main__':
+    main()
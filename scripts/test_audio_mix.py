@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Check the reel audio mix: BS.1770 loudness on reference tones, ducking under speech, fades, the peak
+ceiling, normalization to the target, block-form speed, and daily_bot's mp3 -> mixed WAV step.
+Usage: python scripts/test_audio_mix.py
+"""
+import os
+import subprocess
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import audio_mix
+from audio_mix import RATE, duck_gain, limit, loudness, mix
+from workspace import Workspace
+
+t = np.arange(10 * RATE) / RATE
+tone = np.sin(2 * np.pi * 997 * t)
+stereo = loudness(np.stack([0.1 * tone, 0.1 * tone], axis=1))
+one_side = loudness(np.stack([tone, 0 * tone], axis=1))
+print(f"997 Hz at -20 dBFS on both channels: {stereo:.2f} LUFS; 0 dBFS on one channel: {one_side:.2f} LUFS")
+if abs(stereo + 20.0) > 0.1 or abs(one_side + 3.01) > 0.1 or loudness(np.zeros((RATE, 2))) != float('-inf'):
+    print('FAIL: loudness off the BS.1770 reference values')
+    sys.exit(1)
+
+# "Speech": 1.2 s phrases every 4 s, a voiced buzz with some noise
+rng = np.random.default_rng(7)
+seconds = 30
+t = np.arange(seconds * RATE) / RATE
+speaking = (t % 4) < 1.2
+buzz = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8)) + 0.3 * rng.standard_normal(len(t))
+voice = np.stack([0.05 * buzz * speaking] * 2, axis=1).astype(np.float32)
+
+gain_db = 20 * np.log10(duck_gain(voice, depth_db=-10.0))
+during, pause = gain_db[int(4.6 * RATE)], gain_db[int(3.2 * RATE)]
+print(f"Bed gain: {during:.1f} dB while speaking, {pause:.1f} dB in a pause, {gain_db[int(3.95 * RATE)]:.1f} dB "
+      f"just before the next phrase")
+if abs(during + 10.0) > 0.2 or pause < -0.5 or gain_db[int(3.95 * RATE)] > -5.0:
+    print('FAIL: ducking (depth, release or look-ahead)')
+    sys.exit(1)
+
+hot = np.stack([tone, tone], axis=1) * np.where(np.arange(len(tone)) % RATE < RATE // 10, 3.0, 0.2)[:, None]
+if np.abs(limit(hot, ceiling_db=-1.0)).max() > 10 ** (-1.0 / 20) + 1e-6:
+    print('FAIL: limiter let a peak through')
+    sys.exit(1)
+
+started = time.perf_counter()
+bed = audio_mix.drone(seconds + 1)
+pcm, info = mix(voice, bed, duration=seconds + 1, target_lufs=-14.0, ceiling_db=-1.0)
+elapsed = time.perf_counter() - started
+print(f"Mix of {seconds + 1}s stereo at {RATE} Hz: {elapsed:.2f}s; voice {info['input_lufs']:.1f} LUFS -> "
+      f"{info['lufs']:.2f} LUFS, peak {info['peak_db']:.2f} dBFS")
+if pcm.shape != ((seconds + 1) * RATE, 2) or pcm.dtype != np.float32:
+    print(f'FAIL: mix shape {pcm.shape} {pcm.dtype}')
+    sys.exit(1)
+if abs(info['lufs'] + 14.0) > 0.5 or info['peak_db'] > -1.0 + 1e-3 or abs(loudness(pcm) - info['lufs']) > 1e-6:
+    print('FAIL: not normalized to the target under the ceiling')
+    sys.exit(1)
+if np.abs(pcm[:8]).max() > 1e-3 or np.abs(pcm[-8:]).max() > 1e-3:
+    print('FAIL: no fade-in / fade-out')
+    sys.exit(1)
+bed_only = pcm[int(seconds * RATE):int(seconds * RATE) + RATE // 2]   # the 1 s tail holds only the bed
+if not np.abs(bed_only).max() > 1e-3:
+    print('FAIL: ambient bed missing')
+    sys.exit(1)
+if elapsed > 20:
+    print('FAIL: mix too slow for block-form processing')
+    sys.exit(1)
+
+# daily_bot: the edge-tts mp3 decoded, mixed over the drone and written as one 16-bit WAV in the workspace
+os.environ['AMBIENT_BED'] = 'drone'
+import daily_bot
+from reel_render import ffmpeg_exe
+
+with Workspace('audio-test') as ws:
+    mp3 = ws.path('.mp3')
+    subprocess.run([ffmpeg_exe(), '-hide_banner', '-loglevel', 'error', '-f', 'lavfi', '-i',
+                    'sine=frequency=220:duration=4:sample_rate=24000', '-af', 'volume=-26dB', '-ac', '1',
+                    '-c:a', 'libmp3lame', mp3], check=True)
+    wav = daily_bot._mix_reel_audio(mp3, 5.0, ws)
+    with wave.open(wav, 'rb') as f:
+        shape = (f.getframerate(), f.getnchannels(), f.getsampwidth(), f.getnframes())
+    back = audio_mix.decode(wav)
+    inside = os.path.dirname(wav) == ws.directory
+print(f"daily_bot mix: {shape[0]} Hz x{shape[1]}, {shape[3] / shape[0]:.2f}s, {loudness(back):.2f} LUFS")
+if shape != (RATE, 2, 2, 5 * RATE) or not inside or abs(loudness(back) - daily_bot.AUDIO_TARGET_LUFS) > 0.5:
+    print('FAIL: daily_bot audio stage')
+    sys.exit(1)
+
+print('PASS')
+sys.exit(0)
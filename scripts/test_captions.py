@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Check the burned-in captions: cue timing, spoken-word highlight, and per-frame blending cost.
+Usage: python scripts/test_captions.py
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import numpy as np
+from captions import HIGHLIGHT, Captions, GlyphAtlas, estimate_word_timings
+
+SCRIPT = ("Welcome to AstroBoli AI. The stars align for quiet courage today, and Venus softens every "
+          "conversation you start. Visit astroboli dot com for your complete reading. ")
+
+started = time.perf_counter()
+atlas = GlyphAtlas(SCRIPT, size=72, stroke=5)
+print(f"Atlas: {len(atlas.cells)} glyphs, {atlas.fill.shape[1]}x{atlas.height}px in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+words = estimate_word_timings(SCRIPT * 20, 600.0)  # a ten-minute script
+captions = Captions(words, (1080, 1920), atlas=atlas)
+if any(atlas.width(cue["text"]) > 1080 for cue in captions.cues):
+    print('FAIL: a cue is wider than the frame')
+    sys.exit(1)
+if captions.cue_at(0.0) is not None:
+    print('FAIL: caption shown before the first word')
+    sys.exit(2)
+
+frame = np.full((1920, 1080, 3), 40, dtype=np.uint8)
+start, end, word = words[5]
+shown = captions.cue_at((start + end) / 2)
+cue = captions.cues[shown[0]]
+if cue["words"][shown[1]][2] != word:
+    print('FAIL: wrong active word', shown, word)
+    sys.exit(3)
+out = captions.apply(frame, (start + end) / 2)
+gold = np.all(np.abs(out.astype(int) - HIGHLIGHT) < 30, axis=2)
+rows = np.nonzero(gold.any(axis=1))[0]
+print(f"Word {word!r} highlighted on {gold.sum()} px, rows {rows.min()}-{rows.max()}")
+if gold.sum() < 200 or not 1920 * 0.6 < rows.mean() < 1920 * 0.85 or frame.max() != 40:
+    print('FAIL: highlight missing or misplaced, or the input frame was modified')
+    sys.exit(4)
+
+times = np.arange(0.0, 60.0, 1 / 24)
+started = time.perf_counter()
+for t in times:
+    captions.apply(frame, t)
+per_frame = (time.perf_counter() - started) / len(times) * 1000
+print(f"Blending: {per_frame:.2f} ms per 1080x1920 frame over {len(times)} frames ({len(captions.cues)} cues)")
+if per_frame > 10:
+    print('FAIL: caption overlay too slow')
+    sys.exit(5)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Check the content API: post listing, strong ETags and 304s, byte ranges (206/416, If-Range), HEAD,
+the thumbnail rendition, bearer-token auth, path safety, keep-alive, and `daily_bot.py --serve`.
+Usage: python scripts/test_content_server.py
+"""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from content_server import ContentServer
+from run_store import new_run
+
+image = (ROOT / 'scripts' / 'bench_fixtures' / 'pollinations_1024x1280.jpg').read_bytes()
+reel = (ROOT / 'test_reel.mp4').read_bytes()
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+ids = []
+for n in range(2):
+    run = new_run(runs_dir, f'post{n}')
+    run.manifest['created'] = 1_700_000_000 + n
+    run.save_json('content', 'content.json', {'brand_name': 'AstroBoli AI', 'caption': f'Caption {n} #AstroboliAI',
+                                              'meta': {'hashtags': ['#AstroboliAI', '#a', '#b', '#c', '#d']}})
+    run.save_bytes('image_raw', 'image_raw.jpg', image)
+    run.save_bytes('post', 'post.jpg', image)
+    run.save_bytes('video_prompt', 'video_prompt.txt', b'Slow nebula drift')
+    run.save_bytes('reel', 'reel.mp4', reel)
+    ids.append(run.run_id)
+new_run(runs_dir, 'unfinished')  # no post yet: not listed
+
+server = ContentServer(runs_dir)
+host, port = server.start_in_thread('127.0.0.1', 0)
+conn = http.client.HTTPConnection(host, port, timeout=10)
+
+
+def get(path, method='GET', **headers):
+    conn.request(method, path, headers=headers)
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def check(ok, message, code):
+    if not ok:
+        print(f'FAIL: {message}')
+        sys.exit(code)
+
+
+resp, body = get('/posts')
+posts = json.loads(body)
+print(f"/posts: {[p['id'] for p in posts]}")
+check(resp.status == 200 and [p['id'] for p in posts] == ids[::-1], 'listing not newest-first', 1)
+latest = posts[0]
+check(latest['caption'] == 'Caption 1 #AstroboliAI' and latest['hashtags'][0] == '#AstroboliAI'
+      and latest['video_prompt'] == 'Slow nebula drift' and latest['reel']['bytes'] == len(reel), 'post JSON', 1)
+resp, body = get('/posts/latest')
+check(json.loads(body)['id'] == ids[1], '/posts/latest', 1)
+resp, _ = get('/posts', **{'If-None-Match': resp.getheader('ETag')})
+check(resp.status == 200, 'listing ETag differs from the post ETag', 1)
+
+resp, body = get(latest['image']['url'])
+etag = resp.getheader('ETag')
+check(resp.status == 200 and body == image and etag == latest['image']['etag'] and not etag.startswith('W/'),
+      'image body / strong ETag', 2)
+resp, body = get(latest['image']['url'], **{'If-None-Match': etag})
+check(resp.status == 304 and body == b'', 'If-None-Match did not give 304', 2)
+resp, body = get(latest['image']['url'], **{'If-Modified-Since': resp.getheader('Last-Modified')})
+check(resp.status == 304, 'If-Modified-Since did not give 304', 2)
+resp, body = get(latest['image']['url'], **{'If-None-Match': '"stale"'})
+check(resp.status == 200 and body == image, 'stale ETag should get the body', 2)
+
+url = latest['reel']['url']
+resp, body = get(url, Range='bytes=100-199')
+check(resp.status == 206 and body == reel[100:200] and resp.getheader('Content-Range') == f'bytes 100-199/{len(reel)}',
+      'explicit range', 3)
+resp, body = get(url, Range='bytes=-500')
+check(resp.status == 206 and body == reel[-500:], 'suffix range', 3)
+resp, body = get(url, Range=f'bytes={len(reel) - 10}-')
+check(resp.status == 206 and body == reel[-10:], 'open-ended range', 3)
+resp, body = get(url, Range=f'bytes={len(reel)}-')
+check(resp.status == 416 and resp.getheader('Content-Range') == f'bytes */{len(reel)}', 'unsatisfiable range', 3)
+resp, body = get(url, Range='bytes=0-9', **{'If-Range': '"old"'})
+check(resp.status == 200 and body == reel, 'If-Range mismatch should send the whole file', 3)
+resp, body = get(url, Range='bytes=0-9', **{'If-Range': latest['reel']['etag']})
+check(resp.status == 206 and body == reel[:10], 'If-Range match', 3)
+resp, body = get(url, 'HEAD')
+check(resp.status == 200 and body == b'' and int(resp.getheader('Content-Length')) == len(reel)
+      and resp.getheader('Accept-Ranges') == 'bytes', 'HEAD', 3)
+resp, body = get(url)
+check(body == reel and server.stats['sendfile_bytes'] >= 2 * len(reel), 'reel body via sendfile', 3)
+
+from PIL import Image
+resp, body = get(latest['thumb']['url'])
+thumb = Image.open(BytesIO(body))
+check(resp.status == 200 and thumb.width == 360 and resp.getheader('ETag') == latest['thumb']['etag'], 'thumb', 4)
+resp, _ = get(latest['thumb']['url'], **{'If-None-Match': latest['thumb']['etag']})
+check(resp.status == 304, 'thumb 304', 4)
+
+for path in ('/posts/../manifest.json', f'/posts/{ids[0]}/manifest', '/posts/.hidden', '/posts/nope/image',
+             f'/posts/{ids[0]}/..%2f..%2fetc', '/'):
+    resp, _ = get(path)
+    check(resp.status == 404, f'{path} -> {resp.status}', 5)
+resp, _ = get('/posts', 'POST')
+check(resp.status == 405, 'POST allowed', 5)
+
+started = time.perf_counter()
+for _ in range(300):
+    resp, _ = get(url, **{'If-None-Match': latest['reel']['etag']})
+per_request = (time.perf_counter() - started) / 300 * 1000
+print(f"Conditional GET: {per_request:.2f} ms per request on one keep-alive connection; stats {server.stats}")
+check(resp.status == 304, 'keep-alive conditional GET', 6)
+conn.close()
+
+secure = ContentServer(runs_dir, token='s3cret')
+host, port = secure.start_in_thread('127.0.0.1', 0)
+conn = http.client.HTTPConnection(host, port, timeout=10)
+check(get('/posts')[0].status == 401 and get('/posts', Authorization='Bearer wrong')[0].status == 401,
+      'missing/wrong token accepted', 7)
+check(get('/posts', Authorization='Bearer s3cret')[0].status == 200 and get('/posts?token=s3cret')[0].status == 200,
+      'valid token refused', 7)
+conn.close()
+
+with socket.socket() as s:
+    s.bind(('127.0.0.1', 0))
+    free_port = s.getsockname()[1]
+env = {k: v for k, v in os.environ.items() if k not in ('GEMINI_API_KEY', 'YOUR_EMAIL', 'EMAIL_PASSWORD')}
+env.update(RUNS_DIR=runs_dir, CONTENT_API_PORT=str(free_port))  # serving needs no credentials
+proc = subprocess.Popen([sys.executable, str(ROOT / 'daily_bot.py'), '--serve'], env=env, stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT, text=True)
+try:
+    deadline = time.time() + 30
+    while True:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', free_port, timeout=5)
+            resp, body = get('/posts/latest/caption')
+            break
+        except OSError:
+            check(time.time() < deadline and proc.poll() is None, 'daily_bot --serve did not come up', 8)
+            time.sleep(0.2)
+    print(f"daily_bot --serve: {resp.status} {json.loads(body)['caption']!r}")
+    check(resp.status == 200 and json.loads(body)['caption'] == 'Caption 1 #AstroboliAI', '--serve caption', 8)
+finally:
+    proc.terminate()
+    proc.wait(10)
+print('PASS')
+sys.exit(0)
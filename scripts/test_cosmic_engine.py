@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Check the procedural cosmic reel: deterministic frames, smooth motion, glyph reveal, flat per-frame
+cost, a chunked multi-process render that concatenates into one valid MP4, and the cascade fallback.
+Usage: python scripts/test_cosmic_engine.py
+"""
+import datetime
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import numpy as np
+from cosmic_engine import CosmicEngine, cosmic_reel, sun_sign_glyph
+from stand_in import ServiceProfile, StandInConfig, StandInServer
+
+for date, glyph in ((datetime.date(2026, 1, 5), '♑'), (datetime.date(2026, 3, 21), '♈'),
+                    (datetime.date(2026, 10, 19), '♎'), (datetime.date(2026, 12, 25), '♑')):
+    if sun_sign_glyph(date) != glyph:
+        print(f'FAIL: wrong sun sign for {date}: {sun_sign_glyph(date)!r}')
+        sys.exit(1)
+
+engine = CosmicEngine(duration=10.0, seed=3, glyph='♌')
+if not np.array_equal(engine.frame(131), CosmicEngine(duration=10.0, seed=3, glyph='♌').frame(131)):
+    print('FAIL: frames are not a pure function of the index')
+    sys.exit(2)
+
+steps = [np.abs(engine.frame(i + 1).astype(np.int16) - engine.frame(i)).mean() for i in (30, 120, 200)]
+drift = np.abs(engine.frame(239).astype(np.int16) - engine.frame(0)).mean()
+print(f"Change per frame {min(steps):.2f}-{max(steps):.2f}, first vs last frame {drift:.1f}")
+if min(steps) == 0 or max(steps) > 6 or drift < 4 * max(steps):
+    print('FAIL: motion is not smooth and continuous')
+    sys.exit(3)
+
+# The glyph is revealed by a sweep: no gold at the start, plenty once it is drawn
+gold = np.array([212, 175, 55])
+def gold_pixels(frame):
+    return int((np.abs(frame.astype(np.int16) - gold).max(axis=2) < 45).sum())
+before, after = gold_pixels(engine.frame(0)), gold_pixels(engine.frame(239))
+print(f"Gold pixels: {before} at t=0, {after} at the end")
+if before > 200 or after < 5000:
+    print('FAIL: glyph/constellations not revealed over time')
+    sys.exit(4)
+
+costs = []
+for i in (0, 120, 239):
+    started = time.perf_counter()
+    engine.frame(i)
+    costs.append((time.perf_counter() - started) * 1000)
+print(f"Frame cost {', '.join(f'{c:.0f}' for c in costs)} ms (start, middle, end)")
+if max(costs) > 2 * min(costs) + 10:
+    print('FAIL: per-frame cost depends on the content')
+    sys.exit(5)
+
+started = time.perf_counter()
+data = cosmic_reel(duration=1.5, seed=3, workers=3)
+seconds = time.perf_counter() - started
+from moviepy.video.io.VideoFileClip import VideoFileClip
+path = Path(os.environ.get('TMPDIR', '/tmp')) / 'cosmic_test.mp4'
+path.write_bytes(data)
+clip = VideoFileClip(str(path))
+frames = sum(1 for _ in clip.iter_frames())
+print(f"1.5 s reel in 3 chunks rendered in {seconds:.1f}s: {clip.size[0]}x{clip.size[1]}, {clip.duration:.2f}s, "
+      f"{frames} frames, {len(data) // 1024}KB")
+if tuple(clip.size) != (1080, 1920) or abs(clip.duration - 1.5) > 0.1 or frames != 36:
+    print('FAIL: concatenated segments have the wrong geometry or frame count')
+    sys.exit(6)
+clip.close()
+path.unlink()
+
+with StandInServer(StandInConfig(services={'fal': ServiceProfile(failure_rate=1.0)})) as http:
+    os.environ.update(http.env(), FAL_KEY='stand-in', VIDEO_POLL_INTERVAL='0.1', RENDER_WORKERS='1')
+    import daily_bot
+    data = daily_bot.download_ai_video('cosmic', duration=2, provider_names=['fal', 'kenburns', 'cosmic'],
+                                       local_duration=1.0)
+    if not data or not daily_bot._is_valid_video(data) or http.stats['fal']['failures'] < 1:
+        print('FAIL: cascade did not fall through to the cosmic provider', http.stats)
+        sys.exit(7)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Check cron parsing, then run the daemon (with --serve) against the stand-in services:
+wait for an idle pre-generated post, trigger delivery over the control socket, see it listed on /posts, stop.
+Usage: python scripts/test_daemon.py
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from http.client import HTTPConnection
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from bot_daemon import CronSchedule, send_command
+from stand_in import SMTPSink, StandInServer
+
+base = datetime(2026, 1, 13, 9, 59, 30, tzinfo=timezone.utc)  # a Tuesday
+cases = {
+    '0 10 * * *': datetime(2026, 1, 13, 10, 0, tzinfo=timezone.utc),
+    '*/15 * * * *': datetime(2026, 1, 13, 10, 0, tzinfo=timezone.utc),
+    '30 8 * * 1-5': datetime(2026, 1, 14, 8, 30, tzinfo=timezone.utc),
+    '0 0 1 2 *': datetime(2026, 2, 1, 0, 0, tzinfo=timezone.utc),
+    '0 12 * * 7': datetime(2026, 1, 18, 12, 0, tzinfo=timezone.utc),
+}
+for expr, expected in cases.items():
+    got = CronSchedule(expr).next_after(base)
+    if got != expected:
+        print(f'FAIL: {expr!r} -> {got}, expected {expected}')
+        sys.exit(1)
+
+tmp = tempfile.mkdtemp()
+control = os.path.join(tmp, 'bot.sock')
+with socket.socket() as s:
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+with StandInServer() as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(),
+               GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in',
+               VIDEO_PROVIDERS='', VOICEOVER_ENABLED='0', RUNS_DIR=os.path.join(tmp, 'runs'),
+               CONTENT_API_HOST='127.0.0.1', CONTENT_API_PORT=str(port), CONTENT_API_TOKEN='')
+    proc = subprocess.Popen([sys.executable, str(ROOT / 'daily_bot.py'), '--daemon', '--serve', '--schedule',
+                             '0 0 1 1 *', '--control', control], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        status = {}
+        deadline = time.time() + 90
+        while time.time() < deadline:
+            time.sleep(0.5)
+            if not os.path.exists(control):
+                continue
+            status = send_command(control, 'status', timeout=10)
+            if status.get('ready', {}).get('astroboli') == 1:
+                break
+        if status.get('ready', {}).get('astroboli') != 1:
+            print('FAIL: no pre-generated post, status:', status)
+            sys.exit(2)
+
+        started = time.perf_counter()
+        reply = send_command(control, 'trigger', timeout=60)
+        elapsed = time.perf_counter() - started
+        result = reply['results'][0]
+        if not (result['ok'] and result['pregenerated']) or smtp.stats['messages'] != 1:
+            print('FAIL: trigger did not deliver the pre-generated post:', reply, smtp.stats)
+            sys.exit(3)
+        print(f'Delivered pre-generated post in {elapsed:.2f}s')
+
+        conn = HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', '/posts')
+        resp = conn.getresponse()
+        posts = json.loads(resp.read()) if resp.status == 200 else None
+        conn.close()
+        print(f'--serve /posts: {resp.status} {posts}')
+        if not posts or not posts[0]['delivered']:
+            print('FAIL: the delivered daemon post is not listed on /posts')
+            sys.exit(4)
+        send_command(control, 'stop', timeout=10)
+        proc.wait(timeout=30)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        print(proc.stdout.read()[-3000:])
+print('PASS')
+sys.exit(0)
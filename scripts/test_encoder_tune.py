@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Check the encoder autotuner: a measured curve that orders presets and CRFs sensibly, the per-host cache and
+its nearest-size reuse, choices under time budgets and size caps, and daily_bot's segmented render picking its
+settings from the curve (or skipping the benchmark when the budget is short).
+Usage: python scripts/test_encoder_tune.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from encoder_tune import EncoderTuner, Point, choose, estimate
+from reel_render import ClipTimeline, encoder_threads
+from video_probe import probe
+
+CLIP = str(ROOT / 'test_reel.mp4')
+SIZE = (360, 640)
+tmp = tempfile.mkdtemp(prefix='astroboli-tune-')
+cache = os.path.join(tmp, 'encoder_tune.json')
+
+
+def sample():
+    source = ClipTimeline(CLIP, 4.0, size=SIZE, fps=12)
+    try:
+        for index in range(12, 36):
+            yield source.frame(index)
+    finally:
+        source.close()
+
+
+tuner = EncoderTuner(cache, presets=('ultrafast', 'medium'), crfs=(20, 32))
+curve = tuner.curve(SIZE, 12, sample)
+points = {(p.preset, p.crf): p for p in curve['points']}
+if len(points) != 4 or not tuner.measured or curve['frame_seconds'] <= 0:
+    print('FAIL: benchmark did not measure every setting')
+    sys.exit(1)
+for preset in ('ultrafast', 'medium'):
+    low, high = points[(preset, 20)], points[(preset, 32)]
+    if not (low.bytes_per_frame > high.bytes_per_frame and low.ssim_db > high.ssim_db):
+        print(f'FAIL: {preset} CRF 20 should be bigger and better than CRF 32: {low} {high}')
+        sys.exit(1)
+if not points[('ultrafast', 32)].encode_fps > points[('medium', 32)].encode_fps:
+    print('FAIL: ultrafast not faster than medium')
+    sys.exit(1)
+
+
+def no_sample():
+    raise AssertionError('benchmarked again despite a cached curve')
+
+
+again = EncoderTuner(cache, presets=('ultrafast', 'medium'), crfs=(20, 32))
+if again.curve(SIZE, 12, no_sample)['points'] != curve['points'] or again.measured:
+    print('FAIL: cached curve not reused')
+    sys.exit(1)
+with open(cache) as f:
+    stored = json.load(f)
+key = f"{os.cpu_count() or 1}c-{tuner.machine['arch']}-{SIZE[0]}x{SIZE[1]}"
+if list(stored) != [key] or stored[key]['size'] != list(SIZE):
+    print('FAIL: cache not keyed by core count, architecture and size', list(stored))
+    sys.exit(1)
+half = again.curve((180, 320), 12, no_sample)
+scaled = {(p.preset, p.crf): p for p in half['points']}[('medium', 20)]
+if again.measured or again.reused != key or abs(half['frame_seconds'] - curve['frame_seconds'] / 4) > 1e-12 \
+        or abs(scaled.encode_fps - 4 * points[('medium', 20)].encode_fps) > 1e-9:
+    print('FAIL: a new frame size should reuse the nearest curve, scaled by pixel count')
+    sys.exit(1)
+other = EncoderTuner(cache, presets=('ultrafast',), crfs=(26,))
+other.machine = dict(other.machine, cores=other.machine['cores'] + 1)
+if other.curve(SIZE, 12, no_sample, measure=False) is not None:
+    print('FAIL: measure=False benchmarked or reused another host shape')
+    sys.exit(1)
+other_points = other.curve(SIZE, 12, sample)['points']
+with open(cache) as f:
+    stored = json.load(f)
+if len(other_points) != 1 or not other.measured or len(stored) != 2:
+    print('FAIL: a different core count should measure its own curve next to the first')
+    sys.exit(1)
+print('Curve: ' + ', '.join(f'{p.preset}/{p.crf} {p.encode_fps:.0f}fps {p.bytes_per_frame / 1024:.1f}KB {p.ssim_db:.1f}dB'
+                           for p in curve['points']))
+
+# choose() on a fixed curve: 240 frames, one core, 10 ms to produce a frame
+fixed = {'frame_seconds': 0.01, 'points': [
+    Point('ultrafast', 20, 200.0, 90000, 45.0), Point('ultrafast', 26, 220.0, 40000, 40.0),
+    Point('medium', 20, 40.0, 30000, 44.9), Point('medium', 26, 45.0, 15000, 40.5),
+    Point('slow', 20, 20.0, 26000, 45.1)]}
+cases = [
+    (dict(), ('slow', 20)),                                     # best quality, smallest among equals
+    (dict(budget=10), ('medium', 20)),                          # slow (14.4s) no longer fits
+    (dict(budget=5), ('ultrafast', 20)),                        # only ultrafast fits
+    (dict(budget=5, max_bytes=12 << 20), ('ultrafast', 26)),    # ultrafast crf 20 (20.6MB) is too big
+    (dict(budget=1), ('ultrafast', 26)),                        # nothing fits: fastest
+    (dict(budget=10, max_bytes=1 << 20), ('medium', 26)),       # nothing small enough in time: smallest
+]
+for kwargs, expected in cases:
+    pick = choose(fixed, 240, cores=1, **kwargs)
+    if (pick.preset, pick.crf) != expected:
+        print(f'FAIL: choose({kwargs}) -> {pick}, expected {expected}')
+        sys.exit(1)
+if abs(estimate(fixed, 240, 'medium', 20, cores=1).seconds - (2.4 + 6.0)) > 1e-9 or estimate(fixed, 240, 'x', 1):
+    print('FAIL: estimate()')
+    sys.exit(1)
+# 3 workers on 8 cores: each chunk's ffmpeg gets 2 threads, so 6 encode at once, not 8
+if encoder_threads(3, 8) != 2 or abs(estimate(fixed, 240, 'medium', 20, workers=3, cores=8).seconds - 1.8) > 1e-9:
+    print('FAIL: estimate() does not follow the per-worker encoder threads')
+    sys.exit(1)
+print(f"choose: {len(cases)} budget/size cases OK ({choose(fixed, 240, budget=5, cores=1).reason})")
+
+# daily_bot: the segmented render benchmarks once, then picks from the cache within its budget
+env = dict(os.environ, ENCODER_TUNE_PATH=os.path.join(tmp, 'bot_tune.json'), REEL_AUTOTUNE='1', RENDER_WORKERS='1',
+           REEL_TARGET_MB='8', CAPTIONS_ENABLED='0', REEL_RENDER_BUDGET='0', JOB_DEADLINE='')
+code = f"""
+import daily_bot
+for _ in range(2):
+    data = daily_bot._render_reel_segmented({CLIP!r}, None, 2.0, 'Hello stars', [], {SIZE!r}, 12)
+open({os.path.join(tmp, 'bot.mp4')!r}, 'wb').write(data)
+"""
+proc = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT), env=env, capture_output=True, text=True, timeout=600)
+print(proc.stdout[-900:])
+info = probe(open(os.path.join(tmp, 'bot.mp4'), 'rb').read()) if proc.returncode == 0 else None
+if info is None or (info.width, info.height) != SIZE:
+    print(proc.stderr[-1500:])
+    print('FAIL: daily_bot render with autotune')
+    sys.exit(1)
+if proc.stdout.count('Benchmarking') != 1 or proc.stdout.count('🎛️ Encoder:') != 2 \
+        or proc.stdout.count('of the budget') != 1:
+    print('FAIL: expected one benchmark, charged to the budget, and two tuned renders')
+    sys.exit(1)
+
+# A 5 s budget cannot absorb a benchmark: render with the configured preset, measure nothing
+env.update(ENCODER_TUNE_PATH=os.path.join(tmp, 'short_tune.json'), REEL_RENDER_BUDGET='5')
+proc = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT), env=env, capture_output=True, text=True, timeout=600)
+print(proc.stdout[-400:])
+if proc.returncode != 0 or 'Benchmarking' in proc.stdout or 'benchmarking needs' not in proc.stdout \
+        or os.path.exists(env['ENCODER_TUNE_PATH']):
+    print(proc.stderr[-1500:])
+    print('FAIL: a short budget should skip the benchmark')
+    sys.exit(1)
+
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Check the shared Gemini client against the stand-in: one explicit context cache reused across calls,
+fallback to a plain system instruction when caching is unavailable, and per-call token accounting.
+Usage: python scripts/test_gemini_client.py
+"""
+import json
+import sys
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+warnings.simplefilter('ignore', FutureWarning)
+from gemini_client import GeminiClient
+from stand_in import StandInConfig, StandInServer
+
+SYSTEM = "Return a JSON object with image_prompt, caption, hashtags and alt_text. " * 80  # ~1500 tokens
+
+with StandInServer() as http:
+    client = GeminiClient('stand-in', endpoint=http.url, min_cache_tokens=1024, verbose=False)
+    for brand in ('Astro AI', 'Lunar Notes', 'Astro Boli'):
+        data = json.loads(client.generate(f"Brand: {brand}", system=SYSTEM, label='content'))
+        if brand.replace(' ', '') not in data['hashtags'][0]:
+            print('FAIL: per-call text did not reach the model:', data)
+            sys.exit(1)
+    caches = http.stats.get('gemini_cache', {}).get('requests', 0)
+    cached = [u['cached'] for u in client.usage]
+    totals = client.totals()
+    print(f"Explicit cache: {caches} cache create(s), cached tokens per call {cached}, totals {totals}")
+    if caches != 1 or not all(c >= len(SYSTEM) // 4 for c in cached) or totals['calls'] != 3:
+        print('FAIL: expected one cache shared by every call')
+        sys.exit(2)
+
+with StandInServer(StandInConfig(context_cache=False)) as http:
+    client = GeminiClient('stand-in', endpoint=http.url, min_cache_tokens=1024, verbose=False)
+    client.generate("Brand: Astro AI", system=SYSTEM)
+    client.generate("Brand: Astro AI", system=SYSTEM)
+    cached = [u['cached'] for u in client.usage]
+    print(f"Without explicit caching: cache attempts {http.stats['gemini_cache']['requests']}, cached tokens {cached}")
+    if http.stats['gemini_cache']['requests'] != 1 or cached[0] != 0 or cached[1] == 0:
+        print('FAIL: expected one failed cache attempt, then implicit prefix caching')
+        sys.exit(3)
+print('PASS')
+sys.exit(0)
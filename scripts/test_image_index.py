@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Check perceptual hashing, the blank/flat detector, multi-index Hamming lookups and the reseed loop.
+Usage: python scripts/test_image_index.py
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from PIL import Image, ImageFilter
+from image_index import Fingerprint, ImageIndex, fingerprint, hamming
+from stand_in import StandInConfig, StandInServer
+
+
+def jpeg(img, quality=90):
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality)
+    return out.getvalue()
+
+
+def scene(seed, size=1080):
+    rng = random.Random(seed)
+    base = Image.frombytes('RGB', (10, 10), rng.randbytes(300))
+    return base.resize((size, size), Image.Resampling.BICUBIC)
+
+
+original = scene(1)
+fp = fingerprint(jpeg(original))
+resaved = fingerprint(jpeg(original.resize((800, 800)).filter(ImageFilter.GaussianBlur(1)), quality=60))
+other = fingerprint(jpeg(scene(2)))
+print(f'pHash distance: recompressed {hamming(fp.phash, resaved.phash)}, different {hamming(fp.phash, other.phash)}')
+if hamming(fp.phash, resaved.phash) > 6 or hamming(fp.phash, other.phash) <= 6:
+    print('FAIL: pHash does not separate re-encodes from different images')
+    sys.exit(1)
+if fp.degenerate() or not fingerprint(jpeg(Image.new('RGB', (1080, 1080), (20, 10, 40)))).degenerate():
+    print('FAIL: blank detector wrong', fp)
+    sys.exit(2)
+
+index = ImageIndex(os.path.join(tempfile.mkdtemp(), 'images.sqlite'))
+rng = random.Random(3)
+for _ in range(20000):
+    index.add(Fingerprint(rng.getrandbits(64), 0, 50.0, 5.0), ref='random')
+index.add(fp, ref='original')
+for flips in (0, 3, 7):
+    probe = fp.phash
+    for bit in rng.sample(range(64), flips):
+        probe ^= 1 << bit
+    distance, ref = index.nearest(probe, max_distance=7)
+    if ref != 'original' or distance != flips:
+        print(f'FAIL: {flips}-bit neighbour not found: {distance} {ref}')
+        sys.exit(3)
+timings = []
+for _ in range(200):
+    started = time.perf_counter()
+    index.nearest(other.phash, max_distance=6)
+    timings.append(time.perf_counter() - started)
+print(f'Lookup p50 {statistics.median(timings) * 1000:.3f} ms over {len(index)} images')
+
+# Stand-in serving one cached image for every prompt: the second post must be reseeded
+with StandInServer(StandInConfig(image_seed=42)) as http:
+    os.environ.update(http.env(), IMAGE_INDEX_PATH=os.path.join(tempfile.mkdtemp(), 'images.sqlite'),
+                      IMAGE_RESEED_ATTEMPTS='2')
+    import daily_bot
+    daily_bot.download_unique_image('first prompt')
+    daily_bot.download_unique_image('second prompt')
+    requests = http.stats['pollinations']['requests']
+    if requests != 1 + 3:
+        print('FAIL: expected 1 + 3 Pollinations requests, got', requests)
+        sys.exit(4)
+print('PASS')
+sys.exit(0)
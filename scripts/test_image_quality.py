@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Check the image quality scores (sharpness, palette), scoring speed, best-of-N seed selection, and that a
+rejected single-seed download is reseeded.
+Usage: python scripts/test_image_quality.py
+"""
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from PIL import Image, ImageFilter
+from image_quality import score_image
+from stand_in import StandInServer
+from stand_in.server import _fake_image
+
+
+def jpeg(img):
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=90)
+    return out.getvalue()
+
+
+sharp = Image.open(BytesIO(_fake_image(1080, 1080, 7))).convert('RGB')
+base, blurred = score_image(jpeg(sharp)), score_image(jpeg(sharp.filter(ImageFilter.GaussianBlur(4))))
+print(f"Sharpness: original {base['sharpness']:.2f}, blurred {blurred['sharpness']:.2f}")
+if blurred['sharpness'] >= base['sharpness'] - 0.1:
+    print('FAIL: blur did not lower sharpness')
+    sys.exit(1)
+
+brand = Image.new('RGB', (1080, 1080), (45, 27, 78))
+brand.paste((212, 175, 55), (0, 0, 540, 1080))
+grey = Image.new('RGB', (1080, 1080), (128, 128, 128))
+on, off = score_image(jpeg(brand))['palette'], score_image(jpeg(grey))['palette']
+print(f"Palette affinity: brand colours {on:.2f}, grey {off:.2f}")
+if on <= off + 0.3:
+    print('FAIL: brand palette not preferred')
+    sys.exit(2)
+
+images = [_fake_image(1080, 1080, seed) for seed in range(8)]
+started = time.perf_counter()
+scores = [score_image(data) for data in images]
+elapsed = time.perf_counter() - started
+print(f"Scored {len(images)} 1080x1080 images in {elapsed * 1000:.0f} ms")
+if elapsed >= 1.0:
+    print('FAIL: scoring too slow')
+    sys.exit(3)
+
+with StandInServer() as http:
+    os.environ.update(http.env(), IMAGE_INDEX_PATH=os.path.join(tempfile.mkdtemp(), 'images.sqlite'),
+                      IMAGE_CANDIDATES='4', IMAGE_FETCH_WORKERS='2')
+    import daily_bot
+    urls, get_image_url = [], daily_bot.get_image_url
+    daily_bot.get_image_url = lambda *a, **kw: urls.append(get_image_url(*a, **kw)) or urls[-1]
+    chosen = daily_bot.download_unique_image('best of four')
+    requests = http.stats['pollinations']['requests']
+    seeds = [int(url.split('seed=')[1].split('&')[0]) for url in urls]
+    if requests != 4:
+        print('FAIL: expected 4 Pollinations requests, got', requests)
+        sys.exit(4)
+    totals = [score_image(_fake_image(1080, 1080, seed))['total'] for seed in seeds]
+    print(f"Candidate totals {[round(t, 3) for t in totals]}, kept {score_image(chosen)['total']:.3f}")
+    if score_image(chosen)['total'] < max(totals) - 1e-6:
+        print('FAIL: did not keep the best-scoring candidate', totals)
+        sys.exit(5)
+
+    from image_stream import ImageRejected
+    daily_bot.IMAGE_CANDIDATES = 1
+    calls, download_image = [], daily_bot.download_image
+
+    def reject_first(url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise ImageRejected('not an image (12 bytes)')
+        return download_image(url)
+
+    daily_bot.download_image = reject_first
+    try:
+        daily_bot.download_unique_image('one seed at a time')
+    except Exception as e:
+        print('FAIL: a rejected single download was not reseeded:', e)
+        sys.exit(6)
+    if len(calls) != 2:
+        print('FAIL: expected one reseed after the rejected download, got', len(calls), 'downloads')
+        sys.exit(6)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Check streamed image downloads: early rejection from the header, truncation detection, decoding that is
+finished when the last chunk arrives, PNG and WebP bodies that cannot be decoded incrementally, and the buffered
+fallback when Pillow's decoder internals are missing.
+Usage: python scripts/test_image_stream.py
+"""
+import os
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from PIL import Image
+import image_stream
+from image_stream import ImageRejected, stream_image
+from stand_in import StandInConfig, StandInServer
+from stand_in.server import _fake_image
+
+baseline = _fake_image(1080, 1080, 5)
+progressive = BytesIO()
+Image.open(BytesIO(baseline)).save(progressive, format='JPEG', quality=90, progressive=True)
+
+
+def chunked(data, size=16 * 1024, pause=0.0, consumed=None, done=None):
+    for start in range(0, len(data), size):
+        if consumed is not None:
+            consumed.append(start)
+        time.sleep(pause)
+        yield data[start:start + size]
+    if done is not None:
+        done.append(time.perf_counter())
+
+
+for name, data in (('baseline', baseline), ('progressive', progressive.getvalue())):
+    started = time.perf_counter()
+    Image.open(BytesIO(data)).load()
+    full = time.perf_counter() - started
+    tails = []
+    for _ in range(3):
+        done = []
+        image = stream_image(chunked(data, pause=0.005, done=done)).image
+        tails.append(time.perf_counter() - done[0])
+    print(f"{name}: decode after last byte {min(tails) * 1000:.2f} ms vs full decode {full * 1000:.2f} ms")
+    if image.tobytes() != Image.open(BytesIO(data)).convert('RGB').tobytes():
+        print('FAIL: streamed decode differs from a normal decode')
+        sys.exit(1)
+    if min(tails) > full / 2:
+        print('FAIL: decoding did not overlap the download')
+        sys.exit(2)
+
+for label, data, kwargs in (('HTML page', b'<!doctype html><title>rate limited</title>' * 8000, {}),
+                            ('200x200 image', _fake_image(200, 200, 1) + b'\0' * 300000, {'min_side': 512})):
+    consumed = []
+    try:
+        stream_image(chunked(data, consumed=consumed), **kwargs)
+        print(f'FAIL: {label} accepted')
+        sys.exit(3)
+    except ImageRejected as e:
+        print(f"{label}: rejected after {len(consumed)} of {-(-len(data) // (16 * 1024))} chunks ({e})")
+    if len(consumed) > 5:
+        print(f'FAIL: {label} was not rejected early')
+        sys.exit(4)
+try:
+    stream_image(chunked(baseline[:len(baseline) // 2]))
+    print('FAIL: truncated image accepted')
+    sys.exit(5)
+except ImageRejected as e:
+    print(f"Truncated image: rejected ({e})")
+
+# Noise keeps these large: a PNG with many IDAT chunks, a WebP well past the 64 KB header window
+noise = Image.frombytes('RGB', (900, 700), os.urandom(900 * 700 * 3))
+for fmt in ('PNG', 'WebP'):
+    out = BytesIO()
+    noise.save(out, format=fmt)
+    data = out.getvalue()
+    try:
+        image = stream_image(chunked(data), min_side=512).image
+    except ImageRejected as e:
+        print(f'FAIL: valid {len(data) // 1024} KB {fmt} rejected ({e})')
+        sys.exit(5)
+    if image.size != (900, 700) or image.tobytes() != Image.open(BytesIO(data)).convert('RGB').tobytes():
+        print(f'FAIL: {fmt} decoded wrongly')
+        sys.exit(5)
+    print(f"{fmt}: {len(data) // 1024} KB, decoded")
+
+image_stream.Image = SimpleNamespace()   # as if a Pillow release renamed Image._getdecoder
+try:
+    image = stream_image(chunked(progressive.getvalue())).image
+finally:
+    image_stream.Image = Image
+if image.tobytes() != Image.open(progressive).convert('RGB').tobytes():
+    print('FAIL: buffered fallback did not decode the image')
+    sys.exit(5)
+print('Without Pillow decoder internals: buffered and decoded on close')
+
+with StandInServer(StandInConfig(image_size=(256, 256))) as http:
+    os.environ.update(http.env())
+    import daily_bot
+    for url in (daily_bot.get_image_url('tiny'), f"{http.url}/__stats"):
+        try:
+            daily_bot.download_image(url)
+            print('FAIL: expected the download to be rejected:', url)
+            sys.exit(6)
+        except Exception as e:
+            print(f"Rejected: {e}")
+    http.config.image_size = None
+    data = daily_bot.download_image(daily_bot.get_image_url('full size'))
+    if getattr(data, 'image', None) is None or daily_bot.process_for_instagram(data) is None:
+        print('FAIL: download did not carry its decoded image')
+        sys.exit(7)
+print('PASS')
+sys.exit(0)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-"""Test the JSON extraction helper with a code-fenced JSON response."""
+"""Test the JSON extraction helper with a code-fenced JSON response, and the content fallback for JSON
+that is not a plain object."""
 from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -19,5 +20,21 @@ print('Extracted:', data)
 if not data or data.get('image_prompt') is None:
     print('FAIL')
     sys.exit(2)
+
+
+class ArrayReply:
+    def generate(self, *args, **kwargs):
+        return '[' + sample.strip('`').removeprefix('json') + ']'
+
+
+db.GEMINI_STRUCTURED = False
+db._gemini = ArrayReply
+settings = db._tenant_settings()
+image_prompt, caption, meta = db._generate_astro_content_once(settings, 'Astroboli AI')
+print('Fallback:', image_prompt, '|', caption.replace('\n', ' '), '|', meta)
+if (not image_prompt.startswith('An ethereal') or meta.get('hashtags', [None])[0] != settings['required_hashtag']
+        or not caption.endswith(' '.join(meta['hashtags']))):
+    print('FAIL: array-wrapped JSON not normalized by the fallback')
+    sys.exit(3)
 print('PASS')
 sys.exit(0)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Check the local Ken Burns reel: smooth subpixel motion, a valid 1080x1920 MP4, and its place as
+the last provider in the video cascade (used when the remote providers fail).
+Usage: python scripts/test_ken_burns.py
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import numpy as np
+from PIL import Image
+from reel_render import KenBurns, ken_burns_reel
+from stand_in import ServiceProfile, StandInConfig, StandInServer
+
+FIXTURE = ROOT / 'scripts' / 'bench_fixtures' / 'pollinations_1024x1280.jpg'
+image_bytes = FIXTURE.read_bytes()
+
+source = KenBurns(Image.open(FIXTURE), duration=15.0, fps=24)
+top, n = source.card_top, source.card_size
+frames = [source.frame(i).astype(np.int16) for i in range(170, 190)]
+steps = [np.abs(b[top:top + n] - a[top:top + n]).mean() for a, b in zip(frames, frames[1:])]
+drift = np.abs(source.frame(source.frames - 1).astype(np.int16) - source.frame(0)).mean()
+print(f"Card change per frame mid-reel {min(steps):.2f}-{max(steps):.2f}, first vs last frame {drift:.1f}")
+if min(steps) == 0 or max(steps) > 3 * min(steps) + 0.5 or drift < 2 * max(steps):
+    print('FAIL: motion is not smooth and continuous')
+    sys.exit(1)
+
+started = time.perf_counter()
+data = ken_burns_reel(image_bytes, duration=2.0)
+seconds = time.perf_counter() - started
+from moviepy.video.io.VideoFileClip import VideoFileClip
+path = Path(os.environ.get('TMPDIR', '/tmp')) / 'ken_burns_test.mp4'
+path.write_bytes(data)
+clip = VideoFileClip(str(path))
+print(f"2 s reel rendered in {seconds:.1f}s: {clip.size[0]}x{clip.size[1]}, {clip.duration:.2f}s, {len(data) // 1024}KB")
+if tuple(clip.size) != (1080, 1920) or abs(clip.duration - 2.0) > 0.1:
+    print('FAIL: wrong reel geometry')
+    sys.exit(2)
+clip.close()
+path.unlink()
+
+with StandInServer(StandInConfig(services={'fal': ServiceProfile(failure_rate=1.0)})) as http:
+    os.environ.update(http.env(), FAL_KEY='stand-in', VIDEO_POLL_INTERVAL='0.1')
+    import daily_bot
+    data = daily_bot.download_ai_video('cosmic', duration=2, provider_names=['fal', 'kenburns'],
+                                       image_bytes=image_bytes, local_duration=1.0)
+    if not data or not daily_bot._is_valid_video(data) or http.stats['fal']['failures'] < 1:
+        print('FAIL: cascade did not fall through to the Ken Burns provider', http.stats)
+        sys.exit(3)
+    if daily_bot.download_ai_video('cosmic', duration=2, provider_names=['kenburns']) is not None:
+        print('FAIL: Ken Burns provider needs the post image')
+        sys.exit(4)
+print('PASS')
+sys.exit(0)
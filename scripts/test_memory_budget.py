@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Check the memory budget: per-stage peaks, spooling of big artifacts to file-backed buffers once RSS is
+over budget, streamed SMTP delivery of a large reel, the spooled SMTP transaction's error handling, and the
+per-stage report of a full run.
+Usage: python scripts/test_memory_budget.py
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import smtplib
+import subprocess
+import sys
+import tempfile
+import threading
+from email import message_from_bytes
+from email.mime.text import MIMEText
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from mem_budget import MB, MemoryMonitor, SpooledBytes, rss_bytes
+from stand_in import ServiceProfile, SMTPSink, StandInConfig, StandInServer
+
+monitor = MemoryMonitor(trace=True).start()
+with monitor.stage('allocate'):
+    block = bytearray(40 * MB)
+    block[::4096] = b'x' * len(block[::4096])
+    del block
+monitor.stop()
+s = monitor.stages['allocate']
+print(f"Stage peak: py {s['py_peak'] / MB:.1f} MB, RSS +{(s['rss_peak'] - s['rss_start']) / MB:.1f} MB")
+if s['py_peak'] < 40 * MB or s['rss_peak'] - s['rss_start'] < 30 * MB:
+    print('FAIL: stage peak not recorded')
+    sys.exit(1)
+
+# Concurrent tenants: the same stage open on several threads at once, one of them allocating 30 MB
+monitor = MemoryMonitor(trace=True).start()
+inside, errors = threading.Barrier(3), []
+
+
+def tenant(size):
+    try:
+        with monitor.stage('content'):
+            inside.wait(timeout=10)
+            block = bytearray(size)
+            inside.wait(timeout=10)
+            del block
+    except Exception as e:
+        errors.append(repr(e))
+
+
+threads = [threading.Thread(target=tenant, args=(n,)) for n in (30 * MB, MB, MB)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+monitor.stop()
+c = monitor.stages.get('content')
+print(f"Concurrent stage: {errors or 'no errors'}, py peak {c and c['py_peak'] / MB:.1f} MB")
+if errors or not c or c['py_peak'] < 30 * MB or monitor._open or monitor._running.get('content'):
+    print('FAIL: overlapping stages of one name')
+    sys.exit(1)
+
+data = os.urandom(8 * MB)
+if MemoryMonitor(budget=0).keep(data) is not data or MemoryMonitor(budget=1 << 40).keep(data) is not data:
+    print('FAIL: spooled without budget pressure')
+    sys.exit(2)
+spooled = MemoryMonitor(budget=rss_bytes() // 2).keep(data, 'reel')
+if not isinstance(spooled, SpooledBytes) or len(spooled) != len(data) or bytes(spooled[:64]) != data[:64] \
+        or hashlib.sha256(spooled).digest() != hashlib.sha256(data).digest() \
+        or base64.encodebytes(spooled) != base64.encodebytes(data):
+    print('FAIL: spooled artifact is not a faithful bytes-like copy')
+    sys.exit(3)
+print(f"Spooled {spooled!r}")
+
+# The sender runs in its own process so the sink's buffering of the received message is not traced
+SENDER = """
+import os, sys, tracemalloc
+sys.path.insert(0, sys.argv[1])
+import daily_bot
+image = open(sys.argv[2], 'rb').read()
+reel = open(sys.argv[3], 'rb').read()
+tracemalloc.start()
+base = tracemalloc.get_traced_memory()[0]
+daily_bot.send_email(image, ".leading dot line\\n#AstroboliAI", reel_data=reel)
+print('peak', tracemalloc.get_traced_memory()[1] - base)
+"""
+reel = os.urandom(20 * MB)
+with SMTPSink() as smtp, tempfile.NamedTemporaryFile(suffix='.mp4') as reel_file:
+    reel_file.write(reel)
+    reel_file.flush()
+    env = dict(os.environ, **smtp.env(), YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in')
+    proc = subprocess.run([sys.executable, '-c', SENDER, str(ROOT),
+                           str(ROOT / 'scripts' / 'bench_fixtures' / 'pollinations_1024x1280.jpg'), reel_file.name],
+                          env=env, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0 or not smtp.messages:
+        print(proc.stdout[-1500:], proc.stderr[-1500:])
+        print('FAIL: streamed send did not complete')
+        sys.exit(4)
+    peak = int(proc.stdout.split('peak ')[-1])
+    msg = message_from_bytes(smtp.messages[-1]['data'])
+    attached = next(p.get_payload(decode=True) for p in msg.walk() if p.get_filename() == 'astroboli_reel.mp4')
+    print(f"20 MB reel emailed: sender heap peak {peak / MB:.1f} MB ({peak / len(reel):.2f}x the reel)")
+    if attached != reel:
+        print('FAIL: reel attachment corrupted in the streamed DATA')
+        sys.exit(4)
+    if peak > len(reel) // 2:
+        print('FAIL: sending still holds several whole-message copies')
+        sys.exit(5)
+
+# One SMTP connection through dot-stuffed lines, a refused recipient and a 4xx after DATA, then reused
+import daily_bot
+
+dotted = '.leading dot\n.\n..two dots\nplain'
+
+
+def send_spooled(server, recipient):
+    msg = daily_bot._new_message(recipient)
+    msg.attach(MIMEText(dotted, 'plain'))
+    spool, streams = daily_bot._flatten_message(msg)
+    with spool:
+        daily_bot._smtp_send_spooled(server, msg, spool, streams)
+
+
+config = StandInConfig(rejected_recipients=('nobody@example.com',))
+with SMTPSink(config) as smtp:
+    server = smtplib.SMTP(*smtp.address, timeout=10)
+    send_spooled(server, 'bot@example.com')
+    text = next(p for p in message_from_bytes(smtp.messages[-1]['data']).walk() if p.get_content_type() == 'text/plain')
+    if text.get_payload().replace('\r\n', '\n') != dotted:
+        print('FAIL: lines starting with "." not dot-stuffed', repr(text.get_payload()))
+        sys.exit(5)
+    try:
+        send_spooled(server, 'nobody@example.com')
+        print('FAIL: refused recipient not raised')
+        sys.exit(5)
+    except smtplib.SMTPRecipientsRefused as e:
+        refused = e.recipients
+    config.services['smtp'] = ServiceProfile(failure_rate=1.0)
+    try:
+        send_spooled(server, 'bot@example.com')
+        print('FAIL: 4xx after DATA not raised')
+        sys.exit(5)
+    except smtplib.SMTPDataError as e:
+        data_code = e.smtp_code
+    config.services.clear()
+    send_spooled(server, 'bot@example.com')
+    server.quit()
+    print(f"Spooled SMTP: refused {refused}, DATA answered {data_code}, then {smtp.stats['messages']} messages "
+          f"on one connection")
+    if data_code != 451 or smtp.stats['messages'] != 2 or smtp.messages[-1]['to'] != ['<bot@example.com>']:
+        print('FAIL: connection not reusable after a failed transaction', smtp.messages[-1]['to'])
+        sys.exit(5)
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+with StandInServer(StandInConfig()) as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(), GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com',
+               EMAIL_PASSWORD='stand-in', VIDEO_PROVIDERS='kenburns', VOICEOVER_ENABLED='0', RENDER_WORKERS='1',
+               REEL_PRESET='ultrafast', RUNS_DIR=runs_dir, PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='',
+               MEMORY_BUDGET_MB='1')
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--memory-report'], env=env,
+                          capture_output=True, text=True, timeout=600)
+    report_line = next((l for l in proc.stdout.splitlines() if l.startswith('🧠')), '')
+    print(report_line[:400])
+    if proc.returncode != 0 or smtp.stats['messages'] != 1:
+        print(proc.stdout[-1500:], proc.stderr[-1500:])
+        print('FAIL: run did not complete')
+        sys.exit(6)
+    run_id = re.search(r'Run (\S+): artifacts', proc.stdout).group(1)
+    report = json.loads((Path(runs_dir) / run_id / 'memory.json').read_text())
+    spooled = {s['name'] for s in report['spooled']}
+    if not {'content', 'reel', 'email'} <= set(report['stages']) or 'reel' not in spooled \
+            or 'py_peak' not in report['stages']['reel']:
+        print('FAIL: memory report incomplete', sorted(report['stages']), spooled)
+        sys.exit(7)
+    msg = message_from_bytes(smtp.messages[-1]['data'])
+    if not any(p.get_filename() == 'astroboli_reel.mp4' for p in msg.walk()):
+        print('FAIL: spooled reel not attached')
+        sys.exit(8)
+print('PASS')
+sys.exit(0)
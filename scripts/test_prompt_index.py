@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Check the MinHash/LSH history index: near-duplicates found, unrelated text not, lookups sub-millisecond.
+Usage: python scripts/test_prompt_index.py
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from prompt_index import PromptIndex
+
+rng = random.Random(7)
+vocab = [f"word{i}" for i in range(5000)]
+path = os.path.join(tempfile.mkdtemp(), 'history.sqlite')
+index = PromptIndex(path)
+docs = [" ".join(rng.choice(vocab) for _ in range(40)) for _ in range(5000)]
+for i, doc in enumerate(docs):
+    index.add(doc, 'caption', scope='brand-a' if i % 2 else 'brand-b')
+index.close()
+
+index = PromptIndex(path)  # reopen: history persists
+if len(index) != len(docs):
+    print('FAIL: expected', len(docs), 'documents after reopening, got', len(index))
+    sys.exit(1)
+
+words = docs[101].split()
+words[3], words[17], words[30] = 'nebula', 'comet', 'aurora'
+near = " ".join(words)
+similarity, match = index.best_match(near, 'caption', 'brand-a')
+if match != docs[101] or similarity < 0.6:
+    print(f'FAIL: near-duplicate not found (similarity {similarity:.2f})')
+    sys.exit(2)
+if index.best_match(near, 'caption', 'brand-b')[1] is not None:
+    print('FAIL: scopes should not see each other')
+    sys.exit(3)
+unrelated = " ".join(rng.choice(vocab) for _ in range(40))
+if index.best_match(unrelated, 'caption', 'brand-a')[0] >= 0.3:
+    print('FAIL: unrelated text reported as similar')
+    sys.exit(4)
+
+timings = []
+for _ in range(300):
+    started = time.perf_counter()
+    index.best_match(near, 'caption', 'brand-a')
+    timings.append(time.perf_counter() - started)
+p50 = statistics.median(timings) * 1000
+print(f'Near-duplicate similarity {similarity:.2f}; lookup p50 {p50:.3f} ms over {len(docs)} documents')
+if p50 > 1.0:
+    print('FAIL: lookup slower than 1 ms')
+    sys.exit(5)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Check the rate-limiting layer: token buckets spacing concurrent workers, the persisted daily quota ledger
+(atomic across connections, nothing booked past the cap), 429 Retry-After backoff, Gemini calls going through
+the limiter, and a full run honouring RATE_LIMITS / the daily cap.
+Usage: python scripts/test_rate_limit.py
+"""
+import http.server
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+warnings.simplefilter('ignore', FutureWarning)
+from rate_limit import Limit, QuotaExceeded, QuotaLedger, RateLimiter, parse_limits
+from stand_in import SMTPSink, StandInConfig, StandInServer
+
+limiter = RateLimiter({'api': Limit(per_minute=600, burst=2)}, verbose=False)
+starts = []
+lock = threading.Lock()
+
+
+def worker():
+    for _ in range(2):
+        limiter.acquire('api')
+        with lock:
+            starts.append(time.perf_counter())
+
+
+began = time.perf_counter()
+threads = [threading.Thread(target=worker) for _ in range(8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+starts.sort()
+gaps = [b - a for a, b in zip(starts[2:], starts[3:])]
+print(f"16 calls from 8 workers at 10/s, burst 2: {starts[-1] - began:.2f}s, min gap {min(gaps) * 1000:.0f} ms")
+if not 1.2 < starts[-1] - began < 1.8 or min(gaps) < 0.07 or starts[1] - began > 0.05:
+    print('FAIL: bucket does not smooth concurrent callers')
+    sys.exit(1)
+
+path = os.path.join(tempfile.mkdtemp(), 'quota.sqlite')
+ledgers = [QuotaLedger(path), QuotaLedger(path)]  # two connections, as a daemon and a cron run would have
+booked = []
+
+
+def charge(ledger):
+    for _ in range(40):
+        try:
+            ledger.charge('gemini', daily=50)
+            booked.append(1)
+        except QuotaExceeded:
+            pass
+
+
+threads = [threading.Thread(target=charge, args=(l,)) for l in ledgers for _ in range(2)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(f"Ledger: {len(booked)} of 160 calls booked against a cap of 50, usage {ledgers[0].usage()}")
+if len(booked) != 50 or ledgers[1].usage() != {'gemini': 50}:
+    print('FAIL: daily cap not enforced atomically')
+    sys.exit(2)
+try:
+    RateLimiter(parse_limits('{"gemini": {"daily": 50}}', {}), QuotaLedger(path), verbose=False).acquire('gemini')
+    print('FAIL: call allowed past the daily cap')
+    sys.exit(2)
+except QuotaExceeded as e:
+    print(f"  {e}")
+
+
+class Throttling(http.server.BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        Throttling.hits.append(time.perf_counter())
+        status = 429 if len(Throttling.hits) == 1 else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Throttling)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+import requests
+limited = RateLimiter({}, verbose=False).session(requests.Session(), 'media')
+url = f'http://127.0.0.1:{server.server_address[1]}/'
+statuses = [limited.get(url, timeout=5).status_code for _ in range(2)]
+server.shutdown()
+pause = Throttling.hits[1] - Throttling.hits[0]
+print(f"429 with Retry-After: 1 -> next request {pause:.2f}s later, statuses {statuses}")
+if statuses != [429, 200] or not 0.9 < pause < 1.5:
+    print('FAIL: Retry-After not honoured')
+    sys.exit(3)
+
+from gemini_client import GeminiClient
+with StandInServer() as stand_in:
+    limiter = RateLimiter({'gemini': Limit(per_minute=120, burst=1)}, QuotaLedger(':memory:'), verbose=False)
+    client = GeminiClient('stand-in', endpoint=stand_in.url, verbose=False, limiter=limiter)
+    started = time.perf_counter()
+    for _ in range(3):
+        client.generate('Brand: Astro AI', label='content')
+    seconds = time.perf_counter() - started
+    print(f"Gemini through the limiter: usage {limiter.usage()}, 3 calls at 2/s in {seconds:.2f}s")
+    if limiter.usage() != {'gemini': 3} or seconds < 0.9:
+        print('FAIL: Gemini calls bypass the limiter')
+        sys.exit(4)
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+ledger_path = os.path.join(tempfile.mkdtemp(), 'quota.sqlite')
+with StandInServer(StandInConfig()) as stand_in, SMTPSink() as smtp:
+    env = dict(os.environ, **stand_in.env(), **smtp.env(), GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com',
+               EMAIL_PASSWORD='stand-in', VIDEO_PROVIDERS='kenburns', VOICEOVER_ENABLED='0', RENDER_WORKERS='1',
+               REEL_PRESET='ultrafast', RUNS_DIR=runs_dir, PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='',
+               IMAGE_CANDIDATES='3', QUOTA_LEDGER_PATH=ledger_path)
+    env['RATE_LIMITS'] = '{"pollinations": {"per_minute": 60, "burst": 1}, "gemini": {"daily": 1}}'  # over "off"
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py')], env=env, capture_output=True, text=True,
+                          timeout=600)
+    line = next((l for l in proc.stdout.splitlines() if l.startswith('📊')), '')
+    print(f"Run: exit {proc.returncode}, {line}")
+    usage = QuotaLedger(ledger_path).usage()
+    if proc.returncode != 0 or usage.get('gemini') != 1 or usage.get('pollinations', 0) < 3 \
+            or 'gemini 1/1' not in line or '⏳ pollinations' not in proc.stdout:
+        print(proc.stdout[-1500:], proc.stderr[-1500:])
+        print('FAIL: run did not go through the limiter')
+        sys.exit(5)
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py')], env=env, capture_output=True, text=True,
+                          timeout=600)
+    print(f"Second run with the daily cap used up: exit {proc.returncode}")
+    if proc.returncode == 0 or 'daily quota used up' not in proc.stdout + proc.stderr \
+            or QuotaLedger(ledger_path).usage()['gemini'] != 1:
+        print(proc.stdout[-1500:], proc.stderr[-1500:])
+        print('FAIL: daily cap not enforced across runs')
+        sys.exit(6)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Fail a run at the email stage, then --resume it: only the email should be redone.
+Usage: python scripts/test_resume.py
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import ServiceProfile, SMTPSink, StandInConfig, StandInServer
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+smtp_config = StandInConfig(services={'smtp': ServiceProfile(failure_rate=1.0)})
+with StandInServer() as http, SMTPSink(smtp_config) as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(), RUNS_DIR=runs_dir,
+               GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in',
+               VIDEO_PROVIDERS='', VOICEOVER_ENABLED='0')
+    first = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py')], env=env,
+                           capture_output=True, text=True, timeout=120)
+    match = re.search(r'--resume (\S+)', first.stdout)
+    if first.returncode != 1 or not match:
+        print(first.stdout[-1500:], first.stderr[-1500:])
+        print('FAIL: expected the first run to fail at email and print a resume hint')
+        sys.exit(1)
+    run_id = match.group(1)
+    manifest = json.loads((Path(runs_dir) / run_id / 'manifest.json').read_text())
+    if not {'content', 'image_raw', 'post', 'video_prompt'} <= set(manifest['stages']):
+        print('FAIL: missing checkpoints:', sorted(manifest['stages']))
+        sys.exit(2)
+
+    before = json.loads(json.dumps(http.stats))
+    smtp_config.services['smtp'] = ServiceProfile()
+    second = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--resume', run_id], env=env,
+                            capture_output=True, text=True, timeout=120)
+    print(second.stdout[-1200:])
+    if second.returncode != 0 or smtp.stats['messages'] != 1:
+        print(second.stderr[-1500:])
+        print('FAIL: resume did not deliver', smtp.stats)
+        sys.exit(3)
+    if http.stats != before:
+        print('FAIL: resume called upstream services again:', before, '->', http.stats)
+        sys.exit(4)
+
+    third = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--resume', run_id], env=env,
+                           capture_output=True, text=True, timeout=120)
+    if third.returncode != 0 or smtp.stats['messages'] != 1:
+        print('FAIL: resuming a delivered run sent the email again')
+        sys.exit(5)
+print('PASS')
+sys.exit(0)
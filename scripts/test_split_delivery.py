@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Run daily_bot.py --split-delivery against the stand-in with a slow, failing video provider:
+the image email must arrive before the reel stage ends, and the reel email must reply to it.
+Usage: python scripts/test_split_delivery.py
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from email import message_from_bytes
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import ServiceProfile, SMTPSink, StandInConfig, StandInServer
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+config = StandInConfig(services={'fal': ServiceProfile(latency=3.0, failure_rate=1.0)})
+with StandInServer(config) as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(),
+               GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in', FAL_KEY='stand-in',
+               VIDEO_PROVIDERS='fal', VOICEOVER_ENABLED='0', RUNS_DIR=runs_dir, PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='')
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--split-delivery'], env=env,
+                          capture_output=True, text=True, timeout=180)
+    print(proc.stdout[-1200:])
+    if proc.returncode != 0 or smtp.stats['messages'] != 2:
+        print(proc.stderr[-1500:])
+        print('FAIL: expected two emails, got', smtp.stats)
+        sys.exit(1)
+
+    first, second = (message_from_bytes(m['data']) for m in smtp.messages)
+    gap = smtp.messages[1]['received'] - smtp.messages[0]['received']
+    print(f"Image email: {first['Subject']!r}; reel email {gap:.1f}s later: {second['Subject']!r}")
+    if not any(part.get_filename() == 'astroboli_post.jpg' for part in first.walk()) or 'reel to follow' not in first['Subject']:
+        print('FAIL: first email should carry the image and announce the reel')
+        sys.exit(2)
+    if gap < 2.5:
+        print('FAIL: the image email waited for the reel stage')
+        sys.exit(3)
+    if second['In-Reply-To'] != first['Message-ID'] or second['References'] != first['Message-ID']:
+        print('FAIL: reel email is not threaded to the image email')
+        sys.exit(4)
+    html = ''.join(part.get_payload(decode=True).decode() for part in second.walk() if part.get_content_type() == 'text/html')
+    if 'Video Prompt' not in html:
+        print('FAIL: failed reel should send the manual video prompt in the follow-up')
+        sys.exit(5)
+
+    run_id = re.search(r'Run (\S+): artifacts', proc.stdout).group(1)
+    stages = json.loads((Path(runs_dir) / run_id / 'manifest.json').read_text())['stages']
+    if stages.get('email_post', {}).get('message_id') != first['Message-ID'] or 'email' not in stages:
+        print('FAIL: run manifest does not record both deliveries:', sorted(stages))
+        sys.exit(6)
+print('PASS')
+sys.exit(0)
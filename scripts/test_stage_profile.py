@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Check the per-stage sampling profiler: self time lands on the right functions, other threads are not
+mixed in, collapsed stacks and the HTML flamegraph are written, and --profile reports a full run's stages,
+one-shot and under --daemon.
+Usage: python scripts/test_stage_profile.py
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from bot_daemon import send_command
+from stage_profile import StageProfiler
+from stand_in import SMTPSink, StandInConfig, StandInServer
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def wait(seconds):
+    time.sleep(seconds)
+
+
+def bystander(stop):
+    while not stop.is_set():
+        spin(0.01)
+
+
+stop = threading.Event()
+other = threading.Thread(target=bystander, args=(stop,))
+other.start()
+profiler = StageProfiler(interval=0.002).start()
+with profiler.stage('work'):
+    spin(0.6)
+    wait(0.3)
+profiler.stop()
+stop.set()
+other.join()
+
+top = {f.split(' ')[0]: (s, p) for f, s, p in profiler.top_self('work', 5)}
+print('Top self:', ', '.join(f"{f} {s:.2f}s ({p:.0%})" for f, (s, p) in top.items()))
+# Shares, not seconds: on a busy machine the sampler is starved while spin() holds the GIL,
+# which skews the per-sample time but still leaves both functions clearly present.
+if 'spin' not in top or 'wait' not in top or top['spin'][1] < 0.25 or top['wait'][1] < 0.15 \
+        or top['spin'][1] + top['wait'][1] < 0.9:
+    print('FAIL: self time not attributed to spin/wait')
+    sys.exit(1)
+if 'bystander' in ''.join(profiler.collapsed('work')):
+    print('FAIL: samples from an unprofiled thread')
+    sys.exit(2)
+lines = profiler.collapsed('work')
+if not all(re.fullmatch(r'.+ \d+', l) and ';' in l for l in lines) or not lines[0].split(' ')[0].startswith('<module>'):
+    print('FAIL: collapsed stacks malformed', lines[:2])
+    sys.exit(3)
+out = tempfile.mkdtemp(prefix='astroboli-profile-')
+profiler.write(out)
+page = Path(out, 'work.html').read_text()
+if sorted(os.listdir(out)) != ['profile.json', 'work.collapsed', 'work.html'] or '<svg' not in page \
+        or 'spin (test_stage_profile.py' not in page:
+    print('FAIL: profile files', sorted(os.listdir(out)))
+    sys.exit(4)
+
+# Two concurrent "runs" with the same stage name: each takes only its own samples
+shared = StageProfiler(interval=0.002).start()
+
+
+def tenant_run(owner, work):
+    with shared.stage('content', owner=owner):
+        work(0.3)
+
+
+runs = [threading.Thread(target=tenant_run, args=(owner, work)) for owner, work in (('a', spin), ('b', wait))]
+for t in runs:
+    t.start()
+for t in runs:
+    t.join()
+shared.stop()
+part_a, part_b = shared.take('a'), shared.take('b')
+leaves_a = {f.split(' ')[0] for f, _, _ in part_a.top_self('content')}
+leaves_b = {f.split(' ')[0] for f, _, _ in part_b.top_self('content')}
+print(f"Concurrent runs: a {sorted(leaves_a)}, b {sorted(leaves_b)}")
+if 'spin' not in leaves_a or 'wait' in leaves_a or 'wait' not in leaves_b or 'spin' in leaves_b \
+        or shared.samples or not 0.25 < part_a.wall['content'] < 1.5:
+    print('FAIL: samples of concurrent runs mixed up')
+    sys.exit(7)
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+with StandInServer(StandInConfig()) as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(), GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com',
+               EMAIL_PASSWORD='stand-in', VIDEO_PROVIDERS='kenburns', VOICEOVER_ENABLED='0', RENDER_WORKERS='1',
+               REEL_PRESET='ultrafast', RUNS_DIR=runs_dir, PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='')
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--profile'], env=env,
+                          capture_output=True, text=True, timeout=600)
+    if proc.returncode != 0:
+        print(proc.stdout[-1500:], proc.stderr[-1500:])
+        print('FAIL: profiled run did not complete')
+        sys.exit(5)
+    report = proc.stdout[proc.stdout.index('🔥 Top self time'):].splitlines()
+    print('\n'.join(report[:8]))
+    run_id = re.search(r'Run (\S+): artifacts', proc.stdout).group(1)
+    profile_dir = Path(runs_dir) / run_id / 'profile'
+    summary = json.loads((profile_dir / 'profile.json').read_text())
+    reel = (profile_dir / 'reel.collapsed').read_text()
+    if not {'content', 'download_image', 'process_image', 'reel', 'email'} <= set(summary) \
+            or 'ken_burns_reel (reel_render.py' not in reel or not (profile_dir / 'reel.html').exists():
+        print('FAIL: per-stage profiles missing', sorted(summary))
+        sys.exit(6)
+
+    # --daemon: the prepared post's stages and then its delivery land in the same run's profile
+    daemon_runs = tempfile.mkdtemp(prefix='astroboli-runs-')
+    control = os.path.join(daemon_runs, 'bot.sock')
+    env.update(RUNS_DIR=daemon_runs, VIDEO_PROVIDERS='')
+    proc = subprocess.Popen([sys.executable, str(ROOT / 'daily_bot.py'), '--daemon', '--profile', '--schedule',
+                             '0 0 1 1 *', '--control', control], env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    try:
+        deadline = time.time() + 120
+        while time.time() < deadline and not (
+                os.path.exists(control) and send_command(control, 'status', timeout=10).get('ready', {}).get('astroboli')):
+            time.sleep(0.5)
+        reply = send_command(control, 'trigger', timeout=60)
+        send_command(control, 'stop', timeout=10)
+        proc.wait(timeout=30)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        output = proc.stdout.read()
+    run_id = re.search(r'Run (\S+): artifacts', output).group(1)
+    summary_path = Path(daemon_runs) / run_id / 'profile' / 'profile.json'
+    summary = json.loads(summary_path.read_text()) if summary_path.exists() else {}
+    print(f"--daemon profile: {sorted(summary)}")
+    if not reply['results'][0]['ok'] or not {'content', 'process_image', 'email'} <= set(summary):
+        print(output[-2000:])
+        print('FAIL: --daemon --profile did not write the prepared and delivered stages')
+        sys.exit(8)
+print('PASS')
+sys.exit(0)
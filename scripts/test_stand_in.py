@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Run daily_bot.py end-to-end against the local stand-in services (no reel).
+Usage: python scripts/test_stand_in.py
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import SMTPSink, StandInServer
+
+with StandInServer() as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(),
+               GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in',
+               VIDEO_PROVIDERS='', VOICEOVER_ENABLED='0', RUNS_DIR='', PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='')
+    proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py')], env=env,
+                          capture_output=True, text=True, timeout=120)
+    print(proc.stdout[-1500:])
+
+    if proc.returncode != 0:
+        print(proc.stderr[-1500:])
+        print('FAIL: pipeline exited with', proc.returncode)
+        sys.exit(1)
+    if smtp.stats['messages'] != 1 or b'astroboli_post.jpg' not in smtp.messages[0]['data']:
+        print('FAIL: expected one email with the post image, got', smtp.stats)
+        sys.exit(2)
+    if http.stats.get('gemini', {}).get('requests', 0) != 1:
+        print('FAIL: expected one structured Gemini call for content + video prompt', http.stats)
+        sys.exit(3)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Assert `daily_bot.py --dry-run --mock` starts within budget and never loads heavy dependencies.
+Budget defaults to 1000 ms wall time (best of 3); override with STARTUP_BUDGET_MS.
+Usage: python scripts/test_startup_time.py
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from import_profile import profile
+
+BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', '1000'))
+HEAVY = ('google.generativeai', 'PIL', 'numpy', 'requests', 'smtplib', 'email.mime', 'asyncio', 'moviepy')
+
+best_ms, loaded = None, set()
+for _ in range(3):
+    entries, wall, raw = profile()
+    if not entries:
+        print(raw[-1500:])
+        print('FAIL: no importtime output (did daily_bot.py crash?)')
+        sys.exit(1)
+    best_ms = wall * 1000 if best_ms is None else min(best_ms, wall * 1000)
+    loaded.update(name for name, _, _, _ in entries)
+
+heavy_loaded = sorted(name for name in loaded if name.startswith(HEAVY))
+print(f'Startup: {best_ms:.0f} ms (budget {BUDGET_MS:.0f} ms), {len(loaded)} modules imported')
+if heavy_loaded:
+    print('FAIL: heavy modules imported during --dry-run --mock:', ', '.join(heavy_loaded[:10]))
+    sys.exit(2)
+if best_ms > BUDGET_MS:
+    print('FAIL: startup over budget; run scripts/import_profile.py to see why')
+    sys.exit(3)
+print('PASS')
+sys.exit(0)
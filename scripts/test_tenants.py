@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Run two tenants plus one broken tenant against the stand-in services.
+Checks each healthy tenant gets its own email and the broken one is isolated.
+Usage: python scripts/test_tenants.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import SMTPSink, StandInServer
+
+tenants = {
+    "defaults": {"video_providers": []},
+    "tenants": [
+        {"name": "astroboli", "recipient": "astro@example.com"},
+        {"name": "lunar", "title": "Lunar Notes", "brands": ["Lunar Notes"], "recipient": "lunar@example.com",
+         "website": "lunarnotes.example", "required_hashtag": "#LunarNotes"},
+        {"name": "broken", "brands": [], "recipient": "broken@example.com"},
+    ],
+}
+
+with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+    json.dump(tenants, f)
+    config_path = f.name
+
+try:
+    with StandInServer() as http, SMTPSink() as smtp:
+        env = dict(os.environ, **http.env(), **smtp.env(),
+                   GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com', EMAIL_PASSWORD='stand-in',
+                   VOICEOVER_ENABLED='0')
+        proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py'), '--tenants', config_path, '--workers', '3'],
+                              env=env, capture_output=True, text=True, timeout=180)
+        print(proc.stdout[-2000:])
+        recipients = sorted(r for m in smtp.messages for r in m['to'])
+finally:
+    os.unlink(config_path)
+
+if proc.returncode != 1:
+    print('FAIL: expected exit code 1 because one tenant is broken, got', proc.returncode)
+    sys.exit(1)
+if recipients != ['<astro@example.com>', '<lunar@example.com>']:
+    print('FAIL: unexpected recipients', recipients)
+    sys.exit(2)
+if 'broken: ❌' not in proc.stdout:
+    print('FAIL: broken tenant missing from summary')
+    sys.exit(3)
+print('PASS')
+sys.exit(0)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Check the container-level video validator: metadata from MP4 and WebM headers, durations of fragmented MP4
+and live WebM, rejection of truncated, moov-less, image and unknown payloads, and a probe cost in microseconds
+whatever the file size.
+Usage: python scripts/test_video_probe.py
+"""
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from reel_render import ffmpeg_exe
+from video_probe import VideoInvalid, probe, probe_file
+
+REEL = ROOT / 'test_reel.mp4'
+mp4 = REEL.read_bytes()
+
+info = probe_file(REEL)
+print(f"MP4: {info}")
+if (info.container, info.width, info.height, info.codec, info.fps) != ('mp4', 1080, 1920, 'avc1', 24.0) \
+        or abs(info.duration - 10.29) > 0.05 or not info.has_audio:
+    print('FAIL: wrong MP4 metadata')
+    sys.exit(1)
+
+fd, webm = tempfile.mkstemp(suffix='.webm')
+os.close(fd)
+subprocess.run([ffmpeg_exe(), '-hide_banner', '-loglevel', 'error', '-y', '-i', str(REEL), '-t', '1',
+                '-vf', 'scale=180:320', '-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-an', webm], check=True)
+webm_bytes = Path(webm).read_bytes()
+os.unlink(webm)
+info = probe(webm_bytes)
+print(f"WebM: {info}")
+if (info.container, info.width, info.height, info.has_audio) != ('webm', 180, 320, False) \
+        or abs(info.duration - 1.0) > 0.05 or not info.codec.startswith('V_VP9'):
+    print('FAIL: wrong WebM metadata')
+    sys.exit(2)
+
+
+def encode(*args):
+    return subprocess.run([ffmpeg_exe(), '-hide_banner', '-loglevel', 'error', '-i', str(REEL), '-vf', 'scale=180:320',
+                           '-an', *args, 'pipe:1'], check=True, capture_output=True).stdout
+
+
+# Streamed outputs: no duration in the moov / no Duration element in the Segment Info
+fragmented = encode('-t', '2', '-c:v', 'libx264', '-preset', 'ultrafast',
+                    '-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4')
+live = encode('-t', '1', '-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-live', '1', '-f', 'webm')
+unknown = fragmented.replace(b'moof', b'free')   # no fragments left to time
+for name, data, seconds in (('fragmented MP4', fragmented, 2.0), ('live WebM', live, 1.0), ('unknown', unknown, 0.0)):
+    info = probe(data)
+    print(f"{name}: {info.duration:.3f}s {info.width}x{info.height} {info.fps:g}fps")
+    if abs(info.duration - seconds) > 0.05 or (info.width, info.height) != (180, 320):
+        print(f'FAIL: {name} duration')
+        sys.exit(2)
+
+image = (ROOT / 'scripts' / 'bench_fixtures' / 'pollinations_1024x1280.jpg').read_bytes()
+bad = {
+    'mp4 cut mid-mdat': mp4[:len(mp4) // 2],
+    'mp4 cut inside moov': mp4[:-100],
+    'mp4 without moov': mp4.replace(b'moov', b'free', 1),
+    'webm cut short': webm_bytes[:len(webm_bytes) * 2 // 3],
+    'jpeg': image,
+    'unknown 600KB blob': bytes(range(256)) * 2400,
+    'html error page': b'<!DOCTYPE html><html><body>Rate limited</body></html>' * 30,
+}
+
+
+def zero_durations(data):
+    """`data` with the mvhd and every mdhd duration set to 0."""
+    data = bytearray(data)
+    for box in (b'mvhd', b'mdhd'):
+        at = data.find(box)
+        while at != -1:
+            offset = at + 4 + (24 if data[at + 4] == 1 else 16)
+            width = 8 if data[at + 4] == 1 else 4
+            data[offset:offset + width] = bytes(width)
+            at = data.find(box, at + 4)
+    return bytes(data)
+
+
+def ebml(element, payload):
+    return element + b'\x01' + len(payload).to_bytes(7, 'big') + payload
+
+
+def webm_with(scale=b'\x0f\x42\x40', width=b'\x00\xb4', info_extra=b''):
+    """A minimal WebM: Info, one 180x320 video track, one cluster with one block."""
+    video = ebml(b'\xb0', width) + ebml(b'\xba', b'\x01\x40')
+    tracks = ebml(b'\x16\x54\xae\x6b', ebml(b'\xae', ebml(b'\x83', b'\x01') + ebml(b'\xe0', video)))
+    cluster = ebml(b'\x1f\x43\xb6\x75', ebml(b'\xe7', b'\x00') + ebml(b'\xa3', b'\x81\x00\x28\x80' + bytes(8)))
+    info = ebml(b'\x15\x49\xa9\x66', ebml(b'\x2a\xd7\xb1', scale) + info_extra)
+    return ebml(b'\x1a\x45\xdf\xa3', ebml(b'\x42\x82', b'webm')) + ebml(b'\x18\x53\x80\x67', info + tracks + cluster)
+
+
+if abs(probe(webm_with()).duration - 0.04) > 1e-9:
+    print('FAIL: minimal WebM')
+    sys.exit(3)
+bad.update({
+    'webm with a 200-byte TimecodeScale': webm_with(scale=b'\xff' * 200),
+    'webm with a 2000-byte PixelWidth': webm_with(width=b'\x7f' * 2000),
+    'webm element overrunning its parent': webm_with(info_extra=b'\x44\x89\x90' + bytes(8)),
+    'mp4 with zero durations (not fragmented)': zero_durations(mp4),
+})
+for value in (0.0, -1.0, float('nan'), float('inf')):
+    bad[f'webm with Duration {value}'] = webm_with(info_extra=ebml(b'\x44\x89', struct.pack('>d', value)))
+for name, data in bad.items():
+    try:
+        probe(data)
+    except VideoInvalid as e:
+        print(f"  rejected {name}: {e}")
+        continue
+    print(f'FAIL: accepted {name}')
+    sys.exit(3)
+
+padded = mp4 + (50 * 1024 * 1024).to_bytes(4, 'big') + b'free' + bytes(50 * 1024 * 1024 - 8)  # ~60 MB file
+for name, data in (('0.5 MB reel', mp4), ('60 MB padded reel', padded), ('WebM', webm_bytes)):
+    started = time.perf_counter()
+    for _ in range(1000):
+        probe(data)
+    micros = (time.perf_counter() - started) * 1000
+    print(f"Probe {name}: {micros:.0f} us")
+    if micros > 1000:
+        print('FAIL: probe too slow')
+        sys.exit(4)
+
+import daily_bot
+if not daily_bot._is_valid_video(mp4) or daily_bot._is_valid_video(mp4[:len(mp4) // 2]):
+    print('FAIL: _is_valid_video does not use the container probe')
+    sys.exit(5)
+print('PASS')
+sys.exit(0)
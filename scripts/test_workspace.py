@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check the run-scoped media workspace: tmpfs preference with disk fallback, removal on success, exception,
+SIGTERM and (via the stale sweep) SIGKILL, forked workers leaving it alone, and a full run leaving nothing behind.
+Usage: python scripts/test_workspace.py
+"""
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from stand_in import SMTPSink, StandInConfig, StandInServer
+from workspace import SHM, Workspace, current, free_bytes, scratch_dir, sweep_stale
+
+disk = tempfile.mkdtemp(prefix='astroboli-wsroot-')
+shm_ok = os.path.isdir(SHM) and free_bytes(SHM) > 64 << 20
+with Workspace('pick', min_free=1 << 20, candidates=[SHM, disk]) as ws:
+    print(f"Picked {ws!r}")
+    if shm_ok and not ws.tmpfs:
+        print('FAIL: tmpfs not preferred')
+        sys.exit(1)
+with Workspace('full', min_free=1 << 60, candidates=[SHM, disk]) as ws:
+    if ws.root != tempfile.gettempdir() or ws.tmpfs:
+        print('FAIL: no fallback when tmpfs is short of space')
+        sys.exit(1)
+
+try:
+    with Workspace('boom', candidates=[disk]) as ws:
+        kept = ws.write(os.urandom(1 << 20), '.mp4')
+        gone = ws.path('.mp3')
+        Path(gone).write_bytes(b'x')
+        ws.release(gone)
+        nested = tempfile.mkstemp(dir=scratch_dir())[1]
+        if current() is not ws or os.path.exists(gone) or not os.path.exists(kept) or ws.peak_bytes < 1 << 20:
+            print('FAIL: tracking / release / scratch_dir')
+            sys.exit(2)
+        raise RuntimeError('render failed')
+except RuntimeError:
+    pass
+if os.path.exists(ws.directory) or current() is not None or os.path.exists(nested):
+    print('FAIL: workspace left behind after an exception')
+    sys.exit(2)
+
+ws = Workspace('fork', candidates=[disk])
+pid = os.fork()
+if pid == 0:
+    ws.cleanup()
+    os._exit(0)
+os.waitpid(pid, 0)
+if not os.path.isdir(ws.directory):
+    print('FAIL: a forked child removed the parent workspace')
+    sys.exit(3)
+ws.cleanup()
+
+CHILD = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from workspace import Workspace, install_signal_handlers
+install_signal_handlers()
+ws = Workspace('child', candidates=[sys.argv[2]])
+open(ws.path('.mp4'), 'wb').write(b'x' * 4096)
+print(ws.directory, flush=True)
+time.sleep(60)
+"""
+for signum in (signal.SIGTERM, signal.SIGKILL):
+    proc = subprocess.Popen([sys.executable, '-c', CHILD, str(ROOT), disk], stdout=subprocess.PIPE, text=True)
+    directory = proc.stdout.readline().strip()
+    proc.send_signal(signum)
+    code = proc.wait(10)
+    print(f"{signal.Signals(signum).name}: exit {code}, workspace {'left' if os.path.exists(directory) else 'removed'}")
+    if signum == signal.SIGTERM and (os.path.exists(directory) or code != 128 + signum):
+        print('FAIL: SIGTERM did not remove the workspace')
+        sys.exit(4)
+if not os.path.exists(directory):
+    print('FAIL: expected the SIGKILLed workspace to remain until the sweep')
+    sys.exit(4)
+if sweep_stale(disk) != 1 or os.path.exists(directory):  # what the first Workspace in a process does
+    print('FAIL: stale workspace of a dead process not swept')
+    sys.exit(5)
+
+runs_dir = tempfile.mkdtemp(prefix='astroboli-runs-')
+with StandInServer(StandInConfig()) as http, SMTPSink() as smtp:
+    env = dict(os.environ, **http.env(), **smtp.env(), GEMINI_API_KEY='stand-in', YOUR_EMAIL='bot@example.com',
+               EMAIL_PASSWORD='stand-in', VIDEO_PROVIDERS='kenburns', VOICEOVER_ENABLED='0', RENDER_WORKERS='2',
+               REEL_PRESET='ultrafast', RUNS_DIR=runs_dir, PROMPT_INDEX_PATH='', IMAGE_INDEX_PATH='',
+               WORKSPACE_DIR=disk)
+    for name, overrides, expect in (('delivered', {}, 0), ('failed at email', {'SMTP_PORT': '1'}, 1)):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, str(ROOT / 'daily_bot.py')], env=dict(env, **overrides),
+                              capture_output=True, text=True, timeout=600)
+        used = re.search(r'🗂️ Workspace: (\S+)', proc.stdout)
+        left = os.listdir(disk)
+        print(f"Run {name}: exit {proc.returncode} in {time.perf_counter() - started:.0f}s, "
+              f"workspace {used.group(1) if used else None}, left behind {left}")
+        if proc.returncode != expect or not used or not used.group(1).startswith(disk) or left:
+            print(proc.stdout[-1500:], proc.stderr[-1500:])
+            print('FAIL: run did not use or clean up its workspace')
+            sys.exit(6)
+os.rmdir(disk)
+print('PASS')
+sys.exit(0)
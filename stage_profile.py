@@ -0,0 +1,248 @@
+"""Per-stage sampling CPU profiler with collapsed-stack and HTML flamegraph output.
+
+    profiler = StageProfiler(interval=0.005).start()
+    with profiler.stage("reel"):
+        render()
+    profiler.write("runs/<id>/profile")   # reel.collapsed (flamegraph.pl / speedscope format), reel.html
+    print(profiler.summary())             # reel (12.4s): 38% frame (reel_render.py:143), 21% ...
+
+A background thread reads the stack of every thread that is inside a stage through
+sys._current_frames() every `interval` seconds and counts it under the innermost stage
+of that thread. Sampling measures wall-clock time, so a thread blocked in a socket read
+or a subprocess wait shows up in the Python frame making the call (e.g. `readinto
+(socket.py:...)`), as does time in NumPy or Pillow C code. cProfile only sees its own
+thread and keeps caller/callee pairs rather than whole stacks. Sampling runs at about 1%
+overhead and needs no instrumentation, and stages running on different threads are kept
+apart. Render worker processes and ffmpeg run outside this process; the stage waiting on
+them shows up as the wait.
+
+Samples are filed under the `owner` passed to stage(), which defaults to the thread. Concurrent
+runs in one process (tenants) pass their own owner and take() their share when they finish,
+so each run's flamegraphs hold only its own stages.
+"""
+import html
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class StageProfiler:
+    """Stack sampler attributing samples to named stages of the thread that entered them."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._samples = defaultdict(lambda: defaultdict(Counter))   # owner -> stage -> Counter({stack: n})
+        self._wall = defaultdict(Counter)     # owner -> stage -> seconds inside the stage
+        self._threads = {}                    # thread ident -> [(stage name, owner)], innermost last
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def samples(self):
+        """stage -> Counter({(frame, ...): count}), root first, over all owners."""
+        merged = defaultdict(Counter)
+        with self._lock:
+            for stages in self._samples.values():
+                for name, stacks in stages.items():
+                    merged[name].update(stacks)
+        return merged
+
+    @property
+    def wall(self):
+        """stage -> seconds inside the stage, over all owners."""
+        merged = Counter()
+        with self._lock:
+            for walls in self._wall.values():
+                merged.update(walls)
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._wall.clear()
+
+    def take(self, owner=None):
+        """Remove the samples filed under `owner` (default: this thread) and return them as a new profiler."""
+        owner = threading.get_ident() if owner is None else owner
+        part = StageProfiler(self.interval)
+        with self._lock:
+            part._samples[owner] = self._samples.pop(owner, defaultdict(Counter))
+            part._wall[owner] = self._wall.pop(owner, Counter())
+        return part
+
+    @contextmanager
+    def stage(self, name, owner=None):
+        """Attribute the calling thread's samples to `name` (filed under `owner`) while the block runs."""
+        ident = threading.get_ident()
+        owner = ident if owner is None else owner
+        with self._lock:
+            self._threads.setdefault(ident, []).append((name, owner))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._wall[owner][name] += time.perf_counter() - started
+                names = self._threads[ident]
+                names.pop()
+                if not names:
+                    del self._threads[ident]
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, names in self._threads.items():
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    if stack:
+                        name, owner = names[-1]
+                        self._samples[owner][name][tuple(reversed(stack))] += 1
+            del frames
+
+    def collapsed(self, name):
+        """`root;...;leaf count` lines, heaviest first."""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.samples[name].most_common()]
+
+    def top_self(self, name, n=5):
+        """[(function, seconds, share)] with the most samples as the innermost frame."""
+        stacks = self.samples.get(name)
+        if not stacks:
+            return []
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack[-1]] += count
+        total = sum(leaves.values())
+        per_sample = self.wall[name] / total
+        return [(label, count * per_sample, count / total) for label, count in leaves.most_common(n)]
+
+    def report(self, n=10):
+        return {name: {"seconds": round(self.wall[name], 3), "samples": sum(stacks.values()),
+                       "top_self": [{"function": f, "seconds": round(s, 3), "share": round(p, 4)}
+                                    for f, s, p in self.top_self(name, n)]}
+                for name, stacks in self.samples.items() if stacks}
+
+    def summary(self, n=3):
+        lines = []
+        for name, stacks in self.samples.items():
+            if stacks:
+                top = ", ".join(f"{p:.0%} {f}" for f, _, p in self.top_self(name, n))
+                lines.append(f"{name} ({self.wall[name]:.1f}s): {top}")
+        return "\n".join(lines)
+
+    def write(self, directory):
+        """<stage>.collapsed, <stage>.html and profile.json into `directory`; returns the paths written.
+
+        Stages already in the directory's profile.json (an earlier part of the same run) are kept.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, stacks in self.samples.items():
+            if not stacks:
+                continue
+            base = os.path.join(directory, "".join(c if c.isalnum() or c in "-_" else "_" for c in name))
+            with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                f.write("\n".join(self.collapsed(name)) + "\n")
+            with open(base + ".html", "w", encoding="utf-8") as f:
+                f.write(flamegraph_html(stacks, f"{name}: {self.wall[name]:.2f}s wall", self.wall[name]))
+            paths += [base + ".collapsed", base + ".html"]
+        summary = os.path.join(directory, "profile.json")
+        try:
+            with open(summary, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        report.update(self.report())
+        with open(summary, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return paths + [summary]
+
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font:12px sans-serif;margin:8px}} rect{{stroke:#fff;stroke-width:.5}} text{{pointer-events:none}}
+g{{cursor:pointer}}</style></head><body>
+<h3>{title}</h3><p>Icicle graph, callers on top; width = share of samples. Click a frame to zoom, the top bar to reset.</p>
+<svg id="fg" width="{width}" height="{height}" font-size="11">{rects}</svg>
+<script>
+const W = {width}, svg = document.getElementById('fg');
+function zoom(x0, w0) {{
+  for (const g of svg.querySelectorAll('g')) {{
+    const x = +g.dataset.x, w = +g.dataset.w, r = g.querySelector('rect'), t = g.querySelector('text');
+    const nx = (x - x0) / w0 * W, nw = w / w0 * W, visible = nx + nw > 0 && nx < W && nw > 0.3;
+    g.style.display = visible ? '' : 'none';
+    r.setAttribute('x', nx); r.setAttribute('width', nw);
+    t.setAttribute('x', nx + 3);
+    const chars = Math.floor((nw - 6) / 6.5), name = g.dataset.n;
+    t.textContent = chars < 3 ? '' : name.length > chars ? name.slice(0, chars - 1) + '…' : name;
+  }}
+}}
+svg.addEventListener('click', e => {{
+  const g = e.target.closest('g');
+  if (g) zoom(+g.dataset.x, +g.dataset.w);
+}});
+zoom(0, W);
+</script></body></html>
+"""
+
+
+def flamegraph_html(stacks, title="profile", seconds=None, width=1200, row=17):
+    """Self-contained HTML icicle graph (inline SVG, click to zoom) for {(root, ..., leaf): count}."""
+    tree = {"children": {}, "value": 0}
+    for stack, count in stacks.items():
+        node = tree
+        node["value"] += count
+        for frame in stack:
+            node = node["children"].setdefault(frame, {"children": {}, "value": 0})
+            node["value"] += count
+    total = tree["value"] or 1
+    rects, depth_max = [], 0
+    todo = [("all", tree, 0.0, 0)]
+    while todo:
+        name, node, x, depth = todo.pop()
+        depth_max = max(depth_max, depth)
+        w = node["value"] / total * width
+        share = node["value"] / total
+        timing = f", {share * seconds:.3f}s" if seconds else ""
+        hue = 0 if depth == 0 else zlib.crc32(name.encode()) % 55
+        label = html.escape(name, quote=True)
+        rects.append(f'<g data-x="{x:.3f}" data-w="{w:.3f}" data-n="{label}"><title>{label} '
+                     f'({node["value"]} samples, {share:.1%}{timing})</title>'
+                     f'<rect x="{x:.2f}" y="{depth * row}" width="{w:.2f}" height="{row - 1}" '
+                     f'fill="hsl({hue},{80 if depth else 0}%,{62 if depth else 80}%)"/>'
+                     f'<text x="{x + 3:.2f}" y="{depth * row + row - 5}"></text></g>')
+        offset = x
+        for child_name, child in sorted(node["children"].items()):
+            todo.append((child_name, child, offset, depth + 1))
+            offset += child["value"] / total * width
+    return _PAGE.format(title=html.escape(title), width=width, height=(depth_max + 1) * row,
+                        rects="".join(rects))
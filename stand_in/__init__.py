@@ -0,0 +1,6 @@
+"""Local stand-in services for offline end-to-end and load testing of daily_bot.py."""
+from .config import ServiceProfile, StandInConfig
+from .server import StandInServer
+from .smtp_sink import SMTPSink
+
+__all__ = ['ServiceProfile', 'StandInConfig', 'StandInServer', 'SMTPSink']
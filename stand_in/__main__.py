@@ -0,0 +1,49 @@
+"""Run the stand-in services in the foreground.
+
+    python -m stand_in --port 8765 --smtp-port 8025 --latency 0.2 --failure-rate 0.05
+
+Prints the environment variables that point daily_bot.py at them.
+"""
+import argparse
+import time
+
+from . import ServiceProfile, SMTPSink, StandInConfig, StandInServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in services for daily_bot.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--smtp-port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean added latency per request (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- latency jitter (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Probability of a 5xx / SMTP 451')
+    parser.add_argument('--image-size', help='Force image size WxH (default: honour request)')
+    parser.add_argument('--video', help='Video file to serve (default: test_reel.mp4)')
+    parser.add_argument('--video-bytes', type=int, help='Pad the served video to this many bytes')
+    parser.add_argument('--job-seconds', type=float, default=0.0, help='Time async video jobs stay in progress')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        default=ServiceProfile(args.latency, args.jitter, args.failure_rate),
+        image_size=tuple(int(v) for v in args.image_size.lower().split('x')) if args.image_size else None,
+        video_path=args.video,
+        video_bytes=args.video_bytes,
+        job_seconds=args.job_seconds,
+        seed=args.seed,
+    )
+    with StandInServer(config, args.host, args.port) as http, SMTPSink(config, args.host, args.smtp_port) as smtp:
+        print(f"Stand-in HTTP on {http.url}, SMTP on {smtp.address[0]}:{smtp.address[1]}")
+        for key, value in {**http.env(), **smtp.env()}.items():
+            print(f"export {key}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(f"HTTP stats: {http.stats}")
+            print(f"SMTP stats: {smtp.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Tunable behaviour for the local stand-in services."""
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ServiceProfile:
+    """Latency / failure behaviour for one emulated service."""
+    latency: float = 0.0        # mean seconds added to every response
+    jitter: float = 0.0         # +/- uniform seconds around the mean
+    failure_rate: float = 0.0   # probability of answering with a 5xx / SMTP 451
+
+    def sample_delay(self, rng):
+        if not (self.latency or self.jitter):
+            return 0.0
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self, rng):
+        return self.failure_rate > 0 and rng.random() < self.failure_rate
+
+
+@dataclass
+class StandInConfig:
+    """Configuration shared by the HTTP stand-in and the SMTP sink.
+
+    ``services`` overrides the default profile per service name: gemini,
+    pollinations, fal, luma, replicate, modelslab, media, smtp.
+    """
+    default: ServiceProfile = field(default_factory=ServiceProfile)
+    services: dict = field(default_factory=dict)
+    image_size: tuple | None = None   # force (w, h) instead of honouring ?width/&height
+    caption_padding: int = 0          # extra characters appended to generated captions
+    image_seed: int | None = None     # serve this image for every prompt (emulates cached outputs)
+    context_cache: bool = True        # accept Gemini cachedContents.create (False: answer 400)
+    video_path: str | None = None     # file served as the generated video
+    video_bytes: int | None = None    # or: synthetic MP4-headed payload of this size
+    job_seconds: float = 0.0          # time async video jobs stay IN_PROGRESS
+    rejected_recipients: tuple = ()   # SMTP RCPT addresses answered with 550
+    seed: int | None = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def profile(self, service):
+        return self.services.get(service, self.default)
+
+    def roll(self, service):
+        """Apply latency for a request and return True if it should fail."""
+        profile = self.profile(service)
+        with self._lock:
+            fail = profile.should_fail(self._rng)
+            pause = profile.sample_delay(self._rng)
+        if pause:
+            time.sleep(pause)
+        return fail
@@ -0,0 +1,317 @@
+"""HTTP stand-in for every remote service used by daily_bot.py.
+
+Emulates the request/response shape of Gemini (REST generateContent),
+Pollinations images, the Fal queue, Luma, Replicate and ModelsLab, and
+serves the generated media itself so the full pipeline can run offline.
+"""
+import itertools
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qs
+
+from .config import StandInConfig
+
+DEFAULT_VIDEO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_reel.mp4')
+
+_BRANDS = ["Astro Boli", "AstroBoli AI", "Astro AI", "AstroBoli", "Astro Boli AI"]
+_SCENES = [
+    "cosmic oracle weaving constellations from golden thread",
+    "crystal lotus floating above a violet nebula",
+    "celestial lion made of starlight guarding a portal",
+    "moonlit temple of sacred geometry under an aurora",
+    "astral traveller surfing a river of stardust",
+]
+
+
+def _fake_image(width, height, seed):
+    """Small seeded noise field upscaled to the requested size, JPEG encoded."""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    base = Image.frombytes('RGB', (12, 12), rng.randbytes(12 * 12 * 3))
+    img = base.resize((width, height), Image.Resampling.BICUBIC)
+    draw = ImageDraw.Draw(img)
+    for _ in range(200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.point((x, y), fill=(255, 240, 200))
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=85)
+    return out.getvalue()
+
+
+def _padded_mp4(data, target_size):
+    """Append an MP4 'free' box so the payload reaches target_size but still decodes."""
+    missing = target_size - len(data)
+    if missing < 8:
+        return data
+    return data + struct.pack('>I', missing) + b'free' + bytes(missing - 8)
+
+
+class StandInServer:
+    """Threaded HTTP server emulating the remote APIs. Use as a context manager."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or StandInConfig()
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._video = None
+        self.caches = {}             # cachedContents/<id> -> system instruction text
+        self._seen_prefixes = set()  # system instructions already sent (emulates implicit caching)
+        handler = type('Handler', (_Handler,), {'standin': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Environment overrides that point daily_bot.py at this server."""
+        return {
+            'GEMINI_API_ENDPOINT': self.url,
+            'POLLINATIONS_URL': self.url,
+            'FAL_QUEUE_URL': self.url,
+            'LUMA_API_URL': self.url,
+            'REPLICATE_API_URL': self.url,
+            'MODELSLAB_API_URL': self.url,
+            'RATE_LIMITS': 'off',  # the stand-in never throttles; calls are still counted in the quota ledger
+            'REEL_AUTOTUNE': '0',  # no encoder benchmark inside load tests
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='stand-in-http', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, service, failed=False):
+        with self._stats_lock:
+            entry = self.stats.setdefault(service, {'requests': 0, 'failures': 0})
+            entry['requests'] += 1
+            if failed:
+                entry['failures'] += 1
+
+    def video_payload(self):
+        if self._video is None:
+            path = self.config.video_path or DEFAULT_VIDEO
+            with open(path, 'rb') as f:
+                data = f.read()
+            if self.config.video_bytes:
+                data = _padded_mp4(data, self.config.video_bytes)
+            self._video = data
+        return self._video
+
+    def new_job(self):
+        job_id = f"job-{next(self._ids)}"
+        self._jobs[job_id] = time.monotonic()
+        return job_id
+
+    def job_done(self, job_id):
+        started = self._jobs.get(job_id)
+        return started is not None and time.monotonic() - started >= self.config.job_seconds
+
+
+class _Handler(BaseHTTPRequestHandler):
+    standin = None  # set per server via a subclass
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- helpers -------------------------------------------------------------
+    def _send(self, status, body, content_type='application/json'):
+        if not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def _gate(self, service):
+        """Record the request, apply latency and answer 503 on injected failure."""
+        fail = self.standin.config.roll(service)
+        self.standin.count(service, failed=fail)
+        if fail:
+            self._send(503, {'error': {'code': 503, 'message': f'stand-in {service} failure', 'status': 'UNAVAILABLE'}})
+        return not fail
+
+    def _media_url(self):
+        return f"{self.standin.url}/media/video.mp4"
+
+    # -- routing -------------------------------------------------------------
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path == '/__stats':
+            return self._send(200, self.standin.stats)
+        if path.startswith('/prompt/'):
+            return self._pollinations(parse_qs(parts.query))
+        if path == '/media/video.mp4':
+            if self._gate('media'):
+                self._send(200, self.standin.video_payload(), 'video/mp4')
+            return
+        m = re.match(r'^/fal-ai/.+/requests/([^/]+)(/status)?$', path)
+        if m:
+            return self._fal_poll(m.group(1), bool(m.group(2)))
+        m = re.match(r'^/dream-machine/v1/generations/([^/]+)$', path)
+        if m:
+            return self._luma_poll(m.group(1))
+        m = re.match(r'^/v1/predictions/([^/]+)$', path)
+        if m:
+            return self._replicate_poll(m.group(1))
+        self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self._body()
+        if re.match(r'^/v1(beta)?/models/[^/:]+:generateContent$', path):
+            return self._gemini(body)
+        if re.match(r'^/v1(beta)?/cachedContents$', path):
+            return self._gemini_cache(body)
+        if path.startswith('/fal-ai/'):
+            if self._gate('fal'):
+                self._send(200, {'request_id': self.standin.new_job()})
+            return
+        if path == '/dream-machine/v1/generations':
+            if self._gate('luma'):
+                self._send(201, {'id': self.standin.new_job(), 'state': 'queued'})
+            return
+        if path == '/v1/predictions':
+            if self._gate('replicate'):
+                self._send(201, {'id': self.standin.new_job(), 'status': 'starting'})
+            return
+        if path == '/api/v6/video/text2video':
+            if self._gate('modelslab'):
+                self._send(200, {'status': 'success', 'output': [self._media_url()]})
+            return
+        self._send(404, {'error': 'not found'})
+
+    # -- services ------------------------------------------------------------
+    def _gemini(self, body):
+        if not self._gate('gemini'):
+            return
+        texts = [p.get('text', '') for c in body.get('contents', []) for p in c.get('parts', [])]
+        system = '\n'.join(p.get('text', '') for p in body.get('systemInstruction', {}).get('parts', []))
+        cached_tokens = 0
+        if body.get('cachedContent'):
+            system = self.standin.caches.get(body['cachedContent'])
+            if system is None:
+                return self._send(404, {'error': {'code': 404, 'message': 'cached content not found', 'status': 'NOT_FOUND'}})
+            cached_tokens = len(system) // 4
+        elif system:
+            with self.standin._stats_lock:
+                if system in self.standin._seen_prefixes:
+                    cached_tokens = len(system) // 4
+                self.standin._seen_prefixes.add(system)
+        prompt = '\n'.join([system] + texts)
+        schema = body.get('generationConfig', {}).get('responseSchema')
+        text = self._gemini_text(prompt, schema)
+        self._send(200, {
+            'candidates': [{
+                'content': {'parts': [{'text': text}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0,
+            }],
+            'usageMetadata': {
+                'promptTokenCount': len(prompt) // 4,
+                'cachedContentTokenCount': cached_tokens,
+                'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': (len(prompt) + len(text)) // 4,
+            },
+        })
+
+    def _gemini_cache(self, body):
+        if not self._gate('gemini_cache'):
+            return
+        if not self.standin.config.context_cache:
+            return self._send(400, {'error': {'code': 400, 'message': 'caching not supported', 'status': 'INVALID_ARGUMENT'}})
+        system = '\n'.join(p.get('text', '') for p in body.get('systemInstruction', {}).get('parts', []))
+        name = f"cachedContents/stand-in-{next(self.standin._ids)}"
+        self.standin.caches[name] = system
+        self._send(200, {'name': name, 'model': body.get('model'), 'displayName': body.get('displayName', ''),
+                         'expireTime': '2099-01-01T00:00:00Z', 'usageMetadata': {'totalTokenCount': len(system) // 4}})
+
+    def _gemini_text(self, prompt, schema=None):
+        """Video-prompt text, or the post JSON (plus any extra string fields a response schema asks for)."""
+        rng = random.Random()
+        scene = rng.choice(_SCENES)
+        if 'image_prompt' not in prompt:
+            return (f"A {scene}, slow cinematic drift through glowing nebula clouds. "
+                    "FORMAT: Instagram Reels vertical 9:16 aspect ratio, 10-15 seconds, 1080x1920 resolution.")
+        m = re.search(r"^Brand: (.+)$", prompt, re.M) or re.search(r"You are '([^']+)'", prompt)
+        brand = m.group(1) if m else rng.choice(_BRANDS)
+        caption = (f"The stars align for quiet courage today. {brand} sees a {scene.split(' ')[1]} of new beginnings. "
+                   "✨ Visit astroboli.com for your reading 🌙")
+        caption += ' ' * self.standin.config.caption_padding
+        post = {
+            'image_prompt': f"{scene}, deep purple and gold palette, volumetric light, masterpiece, 8K, square format 1:1, no text, seed {rng.randint(1, 10**6)}",
+            'caption': caption,
+            'hashtags': [f"#{brand.replace(' ', '')}", '#Astrology', '#CosmicEnergy', '#Spirituality', '#ZodiacSigns'],
+            'alt_text': f"A {scene} rendered in purple and gold.",
+        }
+        for name in (schema or {}).get('properties', {}):
+            if name == 'video_prompt':
+                post[name] = self._gemini_text('')
+            post.setdefault(name, f"stand-in {name}")
+        return json.dumps(post)
+
+    def _pollinations(self, query):
+        if not self._gate('pollinations'):
+            return
+        forced = self.standin.config.image_size
+        width = forced[0] if forced else int(query.get('width', ['1080'])[0])
+        height = forced[1] if forced else int(query.get('height', ['1080'])[0])
+        seed = self.standin.config.image_seed
+        if seed is None:
+            seed = int(query.get('seed', ['0'])[0])
+        self._send(200, _fake_image(width, height, seed), 'image/jpeg')
+
+    def _fal_poll(self, job_id, status_only):
+        if not self._gate('fal'):
+            return
+        done = self.standin.job_done(job_id)
+        if status_only:
+            return self._send(200, {'status': 'COMPLETED' if done else 'IN_PROGRESS'})
+        self._send(200, {'video': {'url': self._media_url()}})
+
+    def _luma_poll(self, job_id):
+        if not self._gate('luma'):
+            return
+        if self.standin.job_done(job_id):
+            return self._send(200, {'id': job_id, 'state': 'completed', 'assets': {'video': self._media_url()}})
+        self._send(200, {'id': job_id, 'state': 'dreaming'})
+
+    def _replicate_poll(self, job_id):
+        if not self._gate('replicate'):
+            return
+        if self.standin.job_done(job_id):
+            return self._send(200, {'id': job_id, 'status': 'succeeded', 'output': [self._media_url()]})
+        self._send(200, {'id': job_id, 'status': 'processing'})
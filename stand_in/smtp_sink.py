@@ -0,0 +1,124 @@
+"""Minimal SMTP sink that accepts (and counts) everything smtplib sends.
+
+Supports EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP and
+QUIT. STARTTLS is not offered, so run daily_bot.py with SMTP_STARTTLS=0.
+"""
+import socketserver
+import threading
+import time
+
+from .config import StandInConfig
+
+
+class SMTPSink:
+    """Threaded SMTP server that stores the last few messages in memory."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, keep=20):
+        self.config = config or StandInConfig()
+        self.keep = keep
+        self.messages = []
+        self.stats = {'messages': 0, 'bytes': 0, 'failures': 0}
+        self._lock = threading.Lock()
+        handler = type('Handler', (_SMTPHandler,), {'sink': self})
+        self.server = socketserver.ThreadingTCPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def env(self):
+        host, port = self.address
+        return {'SMTP_HOST': host, 'SMTP_PORT': str(port), 'SMTP_STARTTLS': '0'}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stand-in-smtp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def deliver(self, sender, recipients, data):
+        with self._lock:
+            self.stats['messages'] += 1
+            self.stats['bytes'] += len(data)
+            self.messages.append({'from': sender, 'to': list(recipients), 'data': data, 'received': time.time()})
+            del self.messages[:-self.keep]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    sink = None
+
+    def _reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+        self.wfile.flush()
+
+    def handle(self):
+        self._reply('220 stand-in ESMTP ready')
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            verb = line.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b'250-stand-in\r\n250-8BITMIME\r\n250-SIZE 52428800\r\n250 AUTH PLAIN LOGIN\r\n')
+                self.wfile.flush()
+            elif verb == 'HELO':
+                self._reply('250 stand-in')
+            elif verb == 'AUTH':
+                args = line.split()
+                if len(args) == 2 and args[1].upper() == 'LOGIN':
+                    self._reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                elif len(args) == 2:  # PLAIN without initial response
+                    self._reply('334 ')
+                    self.rfile.readline()
+                self._reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = line.split(':', 1)[1].strip()
+                if recipient.strip('<>') in self.sink.config.rejected_recipients:
+                    self._reply('550 5.1.1 No such user')
+                else:
+                    recipients.append(recipient)
+                    self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                chunks = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk == b'.\r\n':
+                        break
+                    chunks.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                if self.sink.config.roll('smtp'):
+                    with self.sink._lock:
+                        self.sink.stats['failures'] += 1
+                    self._reply('451 4.3.0 stand-in injected failure')
+                else:
+                    self.sink.deliver(sender, recipients, b''.join(chunks))
+                    self._reply('250 OK queued')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 5.5.2 Command not recognized')
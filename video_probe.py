@@ -0,0 +1,364 @@
+"""Container-level video validation: walk MP4 boxes / WebM elements, never decode a frame.
+
+    info = probe(data)             # VideoInfo(container='mp4', duration=10.29, width=1080, height=1920, ...)
+    info = probe_file("clip.mp4")  # same, through mmap (only the header pages are read)
+
+Only the container structure is read. A top-level walk skips `mdat` (or the WebM clusters) by
+its declared size, and then the small `moov` (or Segment Info and Tracks) tree is parsed for
+duration, tracks, codec and dimensions. That makes a probe a few tens of microseconds
+whatever the file size. Anything that would only fail later inside a decoder raises
+VideoInvalid with the reason. That covers an image served as a video, a body cut short
+mid-`mdat`, a missing `moov`, a zero, negative or NaN declared duration, no video track,
+and absurd dimensions.
+
+Streamed recordings often leave the header duration at zero. A fragmented MP4 then gets it
+from `mvex/mehd`, or else from the sample durations in the `moof/traf/trun` fragments. A
+WebM without a Duration element gets it from the last cluster's timecode and blocks. When
+neither says, such a file with a valid video track is still accepted, with `duration` 0.0.
+A header that does declare a duration must declare a positive, finite one.
+"""
+import math
+import mmap
+import struct
+from dataclasses import dataclass
+
+MIN_SIDE = 16
+MAX_SIDE = 8192
+
+_IMAGE_MAGIC = ((b"\xff\xd8", "JPEG image"), (b"\x89PNG", "PNG image"), (b"GIF8", "GIF image"))
+
+
+class VideoInvalid(Exception):
+    """The data is not a complete, playable MP4/WebM video."""
+
+
+@dataclass
+class VideoInfo:
+    container: str      # "mp4" or "webm"
+    duration: float     # seconds; 0.0 when the container does not say
+    width: int
+    height: int
+    codec: str          # sample entry / CodecID, e.g. "avc1", "V_VP9"
+    fps: float          # 0.0 when the container does not say
+    has_audio: bool
+    faststart: bool     # index before the media data (MP4 moov before mdat; always True for WebM)
+
+
+def probe(data, min_side=MIN_SIDE, max_side=MAX_SIDE):
+    """VideoInfo for MP4/MOV or WebM/Matroska bytes (bytes, memoryview or mmap); raises VideoInvalid."""
+    view = memoryview(data)
+    if len(view) < 16:
+        raise VideoInvalid(f"only {len(view)} bytes")
+    head = bytes(view[:12])
+    if head[4:8] == b"ftyp" or head[:4] == b"\x1a\x45\xdf\xa3":
+        try:
+            info = _probe_mp4(view) if head[4:8] == b"ftyp" else _probe_webm(view)
+        except (struct.error, IndexError) as e:  # a field running past its box/element
+            raise VideoInvalid(f"corrupt header ({e})") from None
+    else:
+        kind = next((name for magic, name in _IMAGE_MAGIC if head.startswith(magic)), None)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            kind = "WebP image"
+        raise VideoInvalid(f"{kind}, not a video" if kind else f"unknown container (starts {head[:8].hex()})")
+    if not (math.isfinite(info.duration) and info.duration >= 0):
+        raise VideoInvalid(f"duration {info.duration}")
+    if not (min_side <= info.width <= max_side and min_side <= info.height <= max_side):
+        raise VideoInvalid(f"implausible size {info.width}x{info.height}")
+    return info
+
+
+def probe_file(path, **limits):
+    """probe() a file through mmap, so only the pages holding headers are read from disk."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return probe(view, **limits)
+            finally:
+                view.release()
+
+
+# -- MP4 / ISO BMFF -------------------------------------------------------------
+
+def _boxes(view, start, end):
+    """(type, payload start, box end) for each box in view[start:end]; raises on a box that overruns."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", view, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise VideoInvalid(f"truncated '{kind.decode('latin-1')}' header")
+            size = struct.unpack_from(">Q", view, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            raise VideoInvalid(f"corrupt box size {size} at offset {pos}")
+        if pos + size > end:
+            raise VideoInvalid(f"truncated '{kind.decode('latin-1')}' box ({end - pos} of {size} bytes)")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _child(view, start, end, *path):
+    """Payload range of the first box along `path` (e.g. b"mdia", b"minf"), or None."""
+    for kind in path:
+        found = next(((s, e) for k, s, e in _boxes(view, start, end) if k == kind), None)
+        if found is None:
+            return None
+        start, end = found
+    return start, end
+
+
+def _full_box_times(view, start):
+    """(timescale, duration) of an mvhd/mdhd payload (version 0 or 1)."""
+    if view[start] == 1:
+        return struct.unpack_from(">IQ", view, start + 20)
+    return struct.unpack_from(">II", view, start + 12)
+
+
+def _track_id(view, trak):
+    tkhd = _child(view, *trak, b"tkhd")
+    if tkhd is None:
+        return None
+    return struct.unpack_from(">I", view, tkhd[0] + (20 if view[tkhd[0]] == 1 else 12))[0]
+
+
+def _fragment_ticks(view, moofs, track_id, default_duration):
+    """(ticks, samples) of `track_id` summed over the `trun` boxes of every `moof`."""
+    ticks = samples = 0
+    for moof in moofs:
+        for kind, start, end in _boxes(view, *moof):
+            if kind != b"traf":
+                continue
+            tfhd = _child(view, start, end, b"tfhd")
+            if tfhd is None or struct.unpack_from(">I", view, tfhd[0] + 4)[0] != track_id:
+                continue
+            flags = struct.unpack_from(">I", view, tfhd[0])[0] & 0xFFFFFF
+            offset = tfhd[0] + 8 + (8 if flags & 0x1 else 0) + (4 if flags & 0x2 else 0)
+            duration = struct.unpack_from(">I", view, offset)[0] if flags & 0x8 else default_duration
+            for box, s, _ in _boxes(view, start, end):
+                if box != b"trun":
+                    continue
+                flags, count = struct.unpack_from(">II", view, s)
+                flags &= 0xFFFFFF
+                if not flags & 0x100:
+                    ticks += count * duration
+                else:
+                    pos = s + 8 + (4 if flags & 0x1 else 0) + (4 if flags & 0x4 else 0)
+                    stride = 4 * bin(flags & 0xF00).count("1")
+                    ticks += sum(struct.unpack_from(">I", view, pos + i * stride)[0] for i in range(count))
+                samples += count
+    return ticks, samples
+
+
+def _probe_mp4(view):
+    moov = None
+    moofs = []
+    mdat_seen = faststart = False
+    for kind, start, end in _boxes(view, 0, len(view)):
+        if kind == b"moov":
+            moov = (start, end)
+            faststart = not mdat_seen
+        elif kind == b"mdat":
+            mdat_seen = True
+        elif kind == b"moof":
+            moofs.append((start, end))
+    if moov is None:
+        raise VideoInvalid("no 'moov' box (unfinished or truncated MP4)")
+    if not mdat_seen:
+        raise VideoInvalid("no 'mdat' box (no media data)")
+    mvhd = _child(view, *moov, b"mvhd")
+    if mvhd is None:
+        raise VideoInvalid("no 'mvhd' box")
+    timescale, duration = _full_box_times(view, mvhd[0])
+    seconds = duration / timescale if timescale else 0.0
+
+    video, has_audio = None, False
+    for kind, start, end in _boxes(view, *moov):
+        if kind != b"trak":
+            continue
+        hdlr = _child(view, start, end, b"mdia", b"hdlr")
+        handler = bytes(view[hdlr[0] + 8:hdlr[0] + 12]) if hdlr else b""
+        if handler == b"soun":
+            has_audio = True
+        elif handler == b"vide" and video is None:
+            video = (start, end)
+    if video is None:
+        raise VideoInvalid("no video track")
+
+    codec, width, height = "", 0, 0
+    stsd = _child(view, *video, b"mdia", b"minf", b"stbl", b"stsd")
+    if stsd and stsd[1] - stsd[0] >= 8 + 36:
+        entry = stsd[0] + 8  # version/flags + entry count
+        codec = bytes(view[entry + 4:entry + 8]).decode("latin-1")
+        width, height = struct.unpack_from(">HH", view, entry + 32)
+    if not (width and height):
+        tkhd = _child(view, *video, b"tkhd")
+        if tkhd:
+            offset = 88 if view[tkhd[0]] == 1 else 76  # 16.16 fixed-point width/height after the matrix
+            width, height = (v >> 16 for v in struct.unpack_from(">II", view, tkhd[0] + offset))
+
+    fps = 0.0
+    mdhd = _child(view, *video, b"mdia", b"mdhd")
+    stsz = _child(view, *video, b"mdia", b"minf", b"stbl", b"stsz")
+    if mdhd and stsz:
+        track_scale, track_duration = _full_box_times(view, mdhd[0])
+        samples = struct.unpack_from(">I", view, stsz[0] + 8)[0]
+        if track_scale and track_duration:
+            fps = samples * track_scale / track_duration
+            seconds = seconds or track_duration / track_scale
+        if samples == 0 and not _child(view, *moov, b"mvex"):
+            raise VideoInvalid("video track has no samples")
+    mvex = _child(view, *moov, b"mvex")
+    if not mvex and not seconds:
+        raise VideoInvalid("zero duration")
+    if mvex and not seconds:
+        mehd = _child(view, *mvex, b"mehd")
+        if mehd and timescale:
+            fragments = struct.unpack_from(">Q" if view[mehd[0]] == 1 else ">I", view, mehd[0] + 4)[0]
+            seconds = fragments / timescale
+        track_id = _track_id(view, video)
+        if mdhd and track_id is not None and moofs:
+            track_scale = _full_box_times(view, mdhd[0])[0]
+            trex = next((s for k, s, _ in _boxes(view, *mvex)
+                         if k == b"trex" and struct.unpack_from(">I", view, s + 4)[0] == track_id), None)
+            default = struct.unpack_from(">I", view, trex + 12)[0] if trex is not None else 0
+            ticks, samples = _fragment_ticks(view, moofs, track_id, default)
+            if track_scale and ticks:
+                seconds = seconds or ticks / track_scale
+                fps = fps or samples * track_scale / ticks
+    return VideoInfo("mp4", seconds, width, height, codec, round(fps, 3), has_audio, faststart)
+
+
+# -- WebM / Matroska ------------------------------------------------------------
+
+_EBML, _SEGMENT, _INFO, _TRACKS, _CLUSTER = 0x1A45DFA3, 0x18538067, 0x1549A966, 0x1654AE6B, 0x1F43B675
+_TRACK_ENTRY, _TRACK_TYPE, _CODEC_ID, _DEFAULT_DURATION, _VIDEO = 0xAE, 0x83, 0x86, 0x23E383, 0xE0
+_PIXEL_WIDTH, _PIXEL_HEIGHT, _TIMECODE_SCALE, _DURATION, _DOCTYPE = 0xB0, 0xBA, 0x2AD7B1, 0x4489, 0x4282
+_TIMECODE, _SIMPLE_BLOCK, _BLOCK_GROUP, _BLOCK = 0xE7, 0xA3, 0xA0, 0xA1
+
+
+def _vint(view, pos, keep_marker):
+    """EBML variable-length integer at pos: (value, length, all-ones i.e. unknown size)."""
+    if pos >= len(view):
+        raise VideoInvalid("truncated EBML header")
+    first = view[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or pos + length > len(view):
+        raise VideoInvalid(f"corrupt EBML element at offset {pos}")
+    value = first if keep_marker else first & (0xFF >> length)
+    for i in range(1, length):
+        value = (value << 8) | view[pos + i]
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _elements(view, start, end):
+    """(id, payload start, payload end) of the EBML elements in view[start:end]."""
+    pos = start
+    while pos < end:
+        element, id_len, _ = _vint(view, pos, True)
+        size, size_len, unknown = _vint(view, pos + id_len, False)
+        payload = pos + id_len + size_len
+        stop = end if unknown else payload + size
+        if stop > len(view):
+            raise VideoInvalid(f"truncated element 0x{element:X} ({len(view) - payload} of {size} bytes)")
+        if stop > end:
+            raise VideoInvalid(f"element 0x{element:X} overruns its parent ({end - payload} of {size} bytes)")
+        yield element, payload, stop
+        pos = stop
+
+
+def _uint(view, start, end):
+    if end - start > 8:
+        raise VideoInvalid(f"{end - start}-byte integer element at offset {start}")
+    return int.from_bytes(view[start:end], "big")
+
+
+def _block_timecode(view, start, end):
+    """Relative timecode of a (Simple)Block payload: after the track number, a signed 16-bit value."""
+    _, length, _ = _vint(view, start, False)
+    return struct.unpack_from(">h", view, start + length)[0] if start + length + 2 <= end else 0
+
+
+def _cluster_end(view, start, end):
+    """Timecode (in TimecodeScale ticks) of the last block starting in the cluster at view[start:end].
+
+    A live-written cluster has an unknown size and so runs to the end of the segment; the
+    clusters that follow it then appear as its children and are walked the same way.
+    """
+    base, last = 0, None
+    for element, s, e in _elements(view, start, end):
+        if element == _TIMECODE:
+            base = _uint(view, s, e)
+        elif element == _SIMPLE_BLOCK:
+            last = base + _block_timecode(view, s, e)
+        elif element == _BLOCK_GROUP:
+            block = next(((bs, be) for i, bs, be in _elements(view, s, e) if i == _BLOCK), None)
+            if block is not None:
+                last = base + _block_timecode(view, *block)
+        elif element == _CLUSTER:
+            nested = _cluster_end(view, s, e)
+            last = nested if nested is not None else last
+    return last
+
+
+def _probe_webm(view):
+    elements = _elements(view, 0, len(view))
+    element, start, end = next(elements)
+    if element != _EBML:
+        raise VideoInvalid("no EBML header")
+    doctype = next((bytes(view[s:e]).decode("latin-1") for i, s, e in _elements(view, start, end)
+                    if i == _DOCTYPE), "")
+    if doctype not in ("webm", "matroska"):
+        raise VideoInvalid(f"EBML document type {doctype!r}")
+    segment = next(((s, e) for i, s, e in elements if i == _SEGMENT), None)
+    if segment is None:
+        raise VideoInvalid("no Segment")
+
+    scale, duration, tracks, last_cluster = 1_000_000, None, [], None
+    for element, start, end in _elements(view, *segment):
+        if element == _INFO:
+            for child, s, e in _elements(view, start, end):
+                if child == _TIMECODE_SCALE:
+                    scale = _uint(view, s, e)
+                    if not scale:
+                        raise VideoInvalid("zero TimecodeScale")
+                elif child == _DURATION:
+                    if e - s not in (4, 8):
+                        raise VideoInvalid(f"{e - s}-byte Duration")
+                    duration = struct.unpack_from(">d" if e - s == 8 else ">f", view, s)[0]
+        elif element == _TRACKS:
+            for child, s, e in _elements(view, start, end):
+                if child == _TRACK_ENTRY:
+                    tracks.append({i: (cs, ce) for i, cs, ce in _elements(view, s, e)})
+        elif element == _CLUSTER:
+            last_cluster = (start, end)
+            if duration is not None:
+                break  # headers come before the first cluster; the media itself is not walked
+            # No Duration: skip from cluster to cluster by size, then read the last one's blocks
+    if last_cluster is None:
+        raise VideoInvalid("no Cluster (no media data)")
+
+    video = next((t for t in tracks if _TRACK_TYPE in t and _uint(view, *t[_TRACK_TYPE]) == 1), None)
+    if video is None:
+        raise VideoInvalid("no video track")
+    width = height = 0
+    if _VIDEO in video:
+        fields = {i: (s, e) for i, s, e in _elements(view, *video[_VIDEO])}
+        width = _uint(view, *fields[_PIXEL_WIDTH]) if _PIXEL_WIDTH in fields else 0
+        height = _uint(view, *fields[_PIXEL_HEIGHT]) if _PIXEL_HEIGHT in fields else 0
+    codec = bytes(view[slice(*video[_CODEC_ID])]).decode("latin-1") if _CODEC_ID in video else ""
+    frame_ns = _uint(view, *video[_DEFAULT_DURATION]) if _DEFAULT_DURATION in video else 0
+    if duration is None:  # live-written: no Duration element, time it from the last cluster
+        last = _cluster_end(view, *last_cluster)
+        duration = last + frame_ns / scale if last is not None else 0.0
+    elif not duration > 0:
+        raise VideoInvalid(f"duration {duration}")
+    has_audio = any(_TRACK_TYPE in t and _uint(view, *t[_TRACK_TYPE]) == 2 for t in tracks)
+    return VideoInfo("webm", duration * scale / 1e9, width, height, codec,
+                     round(1e9 / frame_ns, 3) if frame_ns else 0.0, has_audio, True)
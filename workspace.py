@@ -0,0 +1,221 @@
+"""Run-scoped scratch space for temporary media, on tmpfs when there is room.
+
+    with Workspace("astroboli", min_free=512 << 20) as ws:
+        audio = ws.path(".mp3")           # /dev/shm/astroboli-ws-4242-astroboli-k3j2/0001.mp3
+        clip = ws.write(data, ".mp4")     # bytes (or any buffer) written to a tracked file
+        ws.release(audio)                 # deleted early once it is no longer needed
+    # the directory and everything in it are gone, whether the block returned or raised
+
+    tmp = tempfile.mkdtemp(dir=scratch_dir())   # library code: inside the active workspace, else $TMPDIR
+
+The root is the first candidate that is a writable directory with at least `min_free`
+bytes available: WORKSPACE_DIR if set, then /dev/shm (RAM-backed tmpfs), then the system
+temp dir. The temp dir is used as a last resort even when it is short of space. Media
+written to tmpfs is never flushed to a disk. It counts as shared memory, not as this
+process's RSS.
+
+A workspace is removed on exit from its `with` block, at interpreter exit, and on SIGTERM
+or SIGHUP once install_signal_handlers() is called. A SIGKILL or OOM kill cannot be
+intercepted, so each workspace directory is named after the owning PID. The first
+workspace opened in a process sweeps directories left behind by processes that no longer
+exist. Worker processes forked while a workspace is open never remove it; only the
+process that created it does.
+"""
+import atexit
+import itertools
+import os
+import re
+import shutil
+import signal
+import tempfile
+import threading
+
+PREFIX = "astroboli-ws-"
+SHM = "/dev/shm"
+
+_active = {}            # id -> Workspace, for atexit and signal cleanup
+_active_lock = threading.Lock()
+_local = threading.local()  # per-thread stack of entered workspaces (scratch_dir / current)
+_swept = set()
+
+
+def free_bytes(path):
+    try:
+        st = os.statvfs(path)
+    except (OSError, AttributeError):
+        return 0
+    return st.f_bavail * st.f_frsize
+
+
+def pick_root(min_free=0, candidates=None):
+    """First writable candidate directory with `min_free` bytes available (else the system temp dir)."""
+    fallback = tempfile.gettempdir()
+    for root in candidates or (SHM, fallback):
+        if root and os.path.isdir(root) and os.access(root, os.W_OK | os.X_OK) and free_bytes(root) >= min_free:
+            return root
+    return fallback
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_stale(root):
+    """Remove workspace directories under `root` whose owning process is gone; returns how many."""
+    removed = 0
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    for name in names:
+        m = re.match(re.escape(PREFIX) + r"(\d+)-", name)
+        if m and int(m.group(1)) != os.getpid() and not _pid_alive(int(m.group(1))):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class Workspace:
+    """A temp directory that tracks the files made in it and is removed as a whole on cleanup()."""
+
+    def __init__(self, label="run", min_free=512 << 20, candidates=None):
+        self.root = pick_root(min_free, candidates)
+        if self.root not in _swept:
+            _swept.add(self.root)
+            stale = sweep_stale(self.root)
+            if stale:
+                print(f"🧹 Removed {stale} stale workspace(s) from {self.root}")
+        label = re.sub(r"[^A-Za-z0-9_.-]", "-", label)[:40]
+        self.directory = tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}-{label}-", dir=self.root)
+        self.tmpfs = os.path.realpath(self.root).startswith(SHM)
+        self.pid = os.getpid()
+        self.files = set()
+        self.peak_bytes = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        with _active_lock:
+            _active[id(self)] = self
+
+    def __repr__(self):
+        return f"<Workspace {self.directory} ({'tmpfs' if self.tmpfs else 'disk'}, {len(self.files)} files)>"
+
+    def path(self, suffix="", name=None):
+        """A new tracked path in the workspace (the file itself is not created)."""
+        with self._lock:
+            name = name or f"{next(self._counter):04d}{suffix}"
+            path = os.path.join(self.directory, name)
+            self.files.add(path)
+        return path
+
+    def subdir(self, prefix="tmp"):
+        """A new subdirectory (removed with the workspace)."""
+        return tempfile.mkdtemp(prefix=f"{prefix}-", dir=self.directory)
+
+    def write(self, data, suffix=""):
+        """Write a bytes-like object to a new tracked file and return its path."""
+        path = self.path(suffix)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.measure()
+        return path
+
+    def release(self, *paths):
+        """Delete files that are no longer needed before the workspace itself goes away."""
+        self.measure()
+        for path in paths:
+            if not path:
+                continue
+            with self._lock:
+                self.files.discard(path)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def used_bytes(self):
+        total = 0
+        for base, _, names in os.walk(self.directory):
+            for name in names:
+                try:
+                    total += os.path.getsize(os.path.join(base, name))
+                except OSError:
+                    pass
+        return total
+
+    def measure(self):
+        self.peak_bytes = max(self.peak_bytes, self.used_bytes())
+
+    def cleanup(self):
+        """Remove the directory and everything in it (idempotent; a no-op in forked children)."""
+        if os.getpid() != self.pid:
+            return
+        with _active_lock:
+            if _active.pop(id(self), None) is None:
+                return
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        _stack().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.cleanup()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current():
+    """The innermost workspace entered on this thread, or None."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def scratch_dir():
+    """Directory for temp files: the active workspace, or None (tempfile's default)."""
+    ws = current()
+    return ws.directory if ws is not None else None
+
+
+def cleanup_all():
+    with _active_lock:
+        workspaces = list(_active.values())
+    for ws in workspaces:
+        ws.cleanup()
+
+
+def install_signal_handlers(signums=(signal.SIGTERM, getattr(signal, "SIGHUP", None))):
+    """Remove all workspaces on SIGTERM/SIGHUP, then hand the signal to the previous handler.
+
+    With no previous handler the process exits via SystemExit(128 + signum), so `finally`
+    blocks still run. Only possible from the main thread; returns False elsewhere.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    for signum in filter(None, signums):
+        previous = signal.getsignal(signum)
+
+        def handler(sig, frame, previous=previous):
+            cleanup_all()
+            if callable(previous):
+                return previous(sig, frame)
+            if previous != signal.SIG_IGN:
+                raise SystemExit(128 + sig)
+
+        signal.signal(signum, handler)
+    return True
+
+
+atexit.register(cleanup_all)